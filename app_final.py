@@ -1,18 +1,67 @@
 import os
 import logging
 import json
-from flask import Flask, render_template, jsonify, request, send_from_directory, g
+from flask import (
+    Flask, render_template, jsonify, request, send_from_directory, g, Response, stream_with_context,
+    has_request_context
+)
 from flask_cors import CORS
-from neo4j import GraphDatabase, exceptions, basic_auth
+from neo4j import GraphDatabase, Query, exceptions, basic_auth
 from dotenv import load_dotenv
 import time
 import math
 import re
+import atexit
+import uuid
+import zipfile
+import threading
+import click
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 from werkzeug.utils import secure_filename
-from backend.utils.kg_gen import extract_entities_and_relations
-import PyPDF2
-from docx import Document
+from backend.utils.kg_gen import extract_entities_and_relations, get_extraction_cache
+from backend.utils.entity_types import get_type_cache
+from backend.utils.file_reader import iter_text_from_file, parse_documents
+from backend.utils.pagination import encode_cursor, decode_cursor, keyset_condition, CountCache
+from backend.utils.neo4j_pool import Neo4jSessionPool
+from backend.utils.search_index import FulltextIndexManager, build_lucene_query
+from backend.utils.autocomplete import AutocompleteIndex
+from backend.utils.graph_stats import GraphStats
+from backend.utils.graph_traversal import bounded_bfs
+from backend.utils.graph_format import to_columnar
+from backend.utils.graph_export import iter_export
+from backend.utils.graph_import import (
+    BulkImporter, detect_format, open_import_file, read_rows, IMPORT_ENTITY_QUERY, IMPORT_RELATION_QUERY,
+    ENTITY_TYPES_QUERY
+)
+from backend.utils.entity_dedupe import merge_unknown_duplicates
+from backend.utils.schema import SchemaManager
+from backend.utils.cypher import (
+    node_pattern, relationship_pattern, where_clause, count_nodes_query, count_relationships_query,
+    label_count_queries, label_union, without_sort_key
+)
+from backend.utils.crud_queries import (
+    NameWhitelist, property_map, create_node_query,
+    delete_relations_between_query, relation_properties_query,
+    update_node_tx, delete_node_tx, create_relation_tx, replace_relation_tx, save_relation_tx
+)
+from backend.utils.response_cache import ResponseCache, create_cache_backend
+from backend.utils.neo4j_utils import (
+    write_in_batches,
+    NAMED_ENTITY_UNWIND_QUERY,
+    NAMED_RELATION_UNWIND_QUERY,
+    dedupe_named_entities,
+    ENTITY_UNWIND_QUERY,
+    RELATION_UNWIND_QUERY
+)
+from backend.utils.job_queue import (
+    JobQueue,
+    MemoryJobStore,
+    SQLiteJobStore,
+    QueueFullError,
+    FINISHED_STATES
+)
 
 
 # 加载环境变量(如果存在)
@@ -56,7 +105,63 @@ app.config.update(
     DEBUG=os.getenv('DEBUG', 'True') == 'True',
     HOST=os.getenv('HOST', '127.0.0.1'),
     PORT=int(os.getenv('PORT', 5050)),
-    SECRET_KEY=os.getenv('SECRET_KEY', 'dev_key')
+    SECRET_KEY=os.getenv('SECRET_KEY', 'dev_key'),
+    # Neo4j连接池配置
+    NEO4J_MAX_POOL_SIZE=int(os.getenv('NEO4J_MAX_POOL_SIZE', 50)),
+    NEO4J_POOL_ACQUIRE_TIMEOUT=float(os.getenv('NEO4J_POOL_ACQUIRE_TIMEOUT', 60)),
+    NEO4J_HEALTH_CHECK_INTERVAL=float(os.getenv('NEO4J_HEALTH_CHECK_INTERVAL', 30)),
+    # 批量写入配置
+    NEO4J_WRITE_BATCH_SIZE=int(os.getenv('NEO4J_WRITE_BATCH_SIZE', 500)),
+    # 批量只读查询的并发数和单个查询超时(秒)
+    NEO4J_BATCH_QUERY_WORKERS=int(os.getenv('NEO4J_BATCH_QUERY_WORKERS', 8)),
+    NEO4J_BATCH_QUERY_TIMEOUT=float(os.getenv('NEO4J_BATCH_QUERY_TIMEOUT', 10)),
+    # 后台任务队列配置
+    JOB_BACKEND=os.getenv('JOB_BACKEND', 'sqlite'),
+    JOB_DB_PATH=os.getenv('JOB_DB_PATH', os.path.join('logs', 'jobs.db')),
+    JOB_MAX_WORKERS=int(os.getenv('JOB_MAX_WORKERS', 2)),
+    JOB_MAX_PENDING=int(os.getenv('JOB_MAX_PENDING', 100)),
+    JOB_LEASE_TIMEOUT=float(os.getenv('JOB_LEASE_TIMEOUT', 60)),
+    JOB_POLL_INTERVAL=float(os.getenv('JOB_POLL_INTERVAL', 1)),
+    # 批量上传配置
+    UPLOAD_PARSE_WORKERS=int(os.getenv('UPLOAD_PARSE_WORKERS', 0)) or None,
+    UPLOAD_MAX_FILES=int(os.getenv('UPLOAD_MAX_FILES', 1000)),
+    UPLOAD_MAX_ARCHIVE_BYTES=int(os.getenv('UPLOAD_MAX_ARCHIVE_BYTES', 500 * 1024 * 1024)),
+    # 分页总数缓存时间(秒)
+    COUNT_CACHE_TTL=float(os.getenv('COUNT_CACHE_TTL', 60)),
+    # 节点搜索全文索引配置
+    FULLTEXT_INDEX_ENABLED=os.getenv('FULLTEXT_INDEX_ENABLED', 'True') == 'True',
+    FULLTEXT_INDEX_NAME=os.getenv('FULLTEXT_INDEX_NAME', 'node_name_title_fulltext'),
+    FULLTEXT_INDEX_RETRY_INTERVAL=float(os.getenv('FULLTEXT_INDEX_RETRY_INTERVAL', 300)),
+    # 启动时检查并创建索引和约束，为每个标签的 name/title 建索引，等待索引填充的最长时间(秒)
+    SCHEMA_AUTO_APPLY=os.getenv('SCHEMA_AUTO_APPLY', 'True') == 'True',
+    SCHEMA_LABEL_INDEXES=os.getenv('SCHEMA_LABEL_INDEXES', 'True') == 'True',
+    SCHEMA_AWAIT_TIMEOUT=float(os.getenv('SCHEMA_AWAIT_TIMEOUT', 300)),
+    # 管理接口是否允许新建节点类型/关系类型（False 时只能使用数据库中已有的类型）
+    ADMIN_ALLOW_NEW_TYPES=os.getenv('ADMIN_ALLOW_NEW_TYPES', 'True') == 'True',
+    # 节点搜索自动补全索引配置
+    AUTOCOMPLETE_ENABLED=os.getenv('AUTOCOMPLETE_ENABLED', 'True') == 'True',
+    AUTOCOMPLETE_PAGE_SIZE=int(os.getenv('AUTOCOMPLETE_PAGE_SIZE', 5000)),
+    # 统计数据校准间隔(秒)，0 表示只在首次请求时计算
+    STATS_RECONCILE_INTERVAL=float(os.getenv('STATS_RECONCILE_INTERVAL', 300)),
+    # 子图扩展时每个节点默认最多展开的关系数
+    SUBGRAPH_MAX_FANOUT=int(os.getenv('SUBGRAPH_MAX_FANOUT', 50)),
+    # 按需获取属性接口一次最多返回的元素数
+    GRAPH_PROPERTIES_MAX_IDS=int(os.getenv('GRAPH_PROPERTIES_MAX_IDS', 1000)),
+    # 全图导出时每次从Neo4j拉取的记录数
+    EXPORT_FETCH_SIZE=int(os.getenv('EXPORT_FETCH_SIZE', 1000)),
+    # 批量导入：并行分区数、每条 UNWIND 语句的行数、每次写入前缓冲的行数
+    IMPORT_PARTITIONS=int(os.getenv('IMPORT_PARTITIONS', 4)),
+    IMPORT_BATCH_SIZE=int(os.getenv('IMPORT_BATCH_SIZE', 1000)),
+    IMPORT_BUFFER_ROWS=int(os.getenv('IMPORT_BUFFER_ROWS', 100000)),
+    # ASGI模式(uvicorn asgi_app:app)：异步驱动连接池大小、处理其他同步接口的线程数
+    NEO4J_ASYNC_MAX_POOL_SIZE=int(os.getenv('NEO4J_ASYNC_MAX_POOL_SIZE', 100)),
+    ASGI_WSGI_THREADS=int(os.getenv('ASGI_WSGI_THREADS', 32)),
+    # 接口响应缓存 (memory / sqlite / none)
+    # sqlite 后端的版本号由所有工作进程和 flask CLI 共享；memory 只适用于单进程部署
+    RESPONSE_CACHE_BACKEND=os.getenv('RESPONSE_CACHE_BACKEND', 'memory'),
+    RESPONSE_CACHE_PATH=os.getenv('RESPONSE_CACHE_PATH', os.path.join('logs', 'response_cache.db')),
+    RESPONSE_CACHE_MAX_ENTRIES=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512)),
+    RESPONSE_CACHE_TTL=float(os.getenv('RESPONSE_CACHE_TTL', 300))
 )
 
 # 在请求前设置全局变量
@@ -70,120 +175,417 @@ def before_request():
     # 在这里可以添加用户认证逻辑
     # 例如，从session或cookie获取用户信息等
 
+def mark_degraded():
+    """标记当前请求的结果不完整（查询出错后返回了空结果或默认数据），这样的响应不写入缓存"""
+    if has_request_context():
+        g.degraded = True
+
 # Neo4j连接管理
 class Neo4jConnection:
-    _driver = None
-    _max_retries = 3  # 最大重试次数
+    _pool = None
+    _batch_executor = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_pool(cls):
+        """获取共享的Neo4j会话池(单例模式)"""
+        if cls._pool is None:
+            cls._pool = Neo4jSessionPool(
+                app.config['NEO4J_URI'],
+                app.config['NEO4J_USER'],
+                app.config['NEO4J_PASSWORD'],
+                max_pool_size=app.config['NEO4J_MAX_POOL_SIZE'],
+                acquisition_timeout=app.config['NEO4J_POOL_ACQUIRE_TIMEOUT'],
+                max_connection_lifetime=300,  # 设置连接最大生命周期为5分钟
+                health_check_interval=app.config['NEO4J_HEALTH_CHECK_INTERVAL']
+            )
+        return cls._pool
     
     @classmethod
     def get_driver(cls):
         """获取Neo4j数据库连接驱动(单例模式)"""
-        if cls._driver is None:
-            retries = 0
-            while retries < cls._max_retries:
-                try:
-                    cls._driver = GraphDatabase.driver(
-                        app.config['NEO4J_URI'], 
-                        auth=(app.config['NEO4J_USER'], app.config['NEO4J_PASSWORD']),
-                        max_connection_lifetime=300  # 设置连接最大生命周期为5分钟
-                    )
-                    # 测试连接
-                    with cls._driver.session() as session:
-                        session.run("MATCH (n) RETURN count(n) LIMIT 1")
-                    logger.info("成功连接到Neo4j数据库")
-                    break
-                except exceptions.ServiceUnavailable:
-                    retries += 1
-                    if retries >= cls._max_retries:
-                        logger.error(f"无法连接到Neo4j数据库，请确保数据库正在运行 (尝试 {retries}/{cls._max_retries})")
-                        cls._driver = None
-                    else:
-                        logger.warning(f"Neo4j连接失败，正在重试 ({retries}/{cls._max_retries})...")
-                        time.sleep(1)  # 等待1秒后重试
-                except Exception as e:
-                    logger.error(f"连接Neo4j数据库时出错: {str(e)}")
-                    cls._driver = None
-                    break
-        return cls._driver
+        return cls.get_pool().get_driver()
     
     @classmethod
     def close(cls):
         """关闭数据库连接"""
-        if cls._driver is not None:
+        if cls._batch_executor is not None:
+            cls._batch_executor.shutdown(wait=False)
+        if cls._pool is not None:
             try:
-                cls._driver.close()
+                cls._pool.close()
             except Exception as e:
                 logger.error(f"关闭Neo4j连接时出错: {str(e)}")
-            finally:
-                cls._driver = None
-                logger.info("Neo4j数据库连接已关闭")
     
     @classmethod
-    def run_query(cls, query, params=None):
-        """执行查询并返回结果，提供更强大的错误处理"""
-        results = []
+    def metrics(cls):
+        """获取连接池使用情况"""
+        return cls.get_pool().metrics()
+    
+    @classmethod
+    def run_query(cls, query, params=None, raise_errors=False, timeout=None):
+        """
+        执行查询并返回结果，提供更强大的错误处理
+
+        默认出错时返回空列表；raise_errors=True 时抛出异常，便于调用方回退到其他查询。
+        timeout(秒)作为事务超时发送给服务端，超时的查询由服务端终止。
+        """
         retries = 0
         max_retries = 3
         last_error = None
+        pool = cls.get_pool()
         
         while retries < max_retries:
-            driver = cls.get_driver()
-            if not driver:
+            if not pool.get_driver():
                 app.logger.error("无法获取Neo4j连接")
+                if raise_errors:
+                    raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
+                mark_degraded()
                 return None
                 
             try:
-                with driver.session() as session:
-                    # 添加简单查询来保持连接活跃
-                    session.run("RETURN 1")
-                    # 执行实际查询
-                    result = session.run(query, params or {})
-                    for record in result:
-                        results.append(record)
-                    return results
+                # 连接存活由会话池的后台检查负责，这里不再额外发送 "RETURN 1"
+                with pool.session() as session:
+                    statement = Query(query, timeout=timeout) if timeout else query
+                    result = session.run(statement, params or {})
+                    return list(result)
             except (exceptions.ServiceUnavailable, exceptions.SessionExpired) as e:
                 last_error = e
                 retries += 1
-                cls._driver = None  # 重置连接
+                # 不关闭共享驱动（会中断其他线程的会话），失效连接由驱动的连接池替换
+                pool.report_failure(e)
                 app.logger.warning(f"查询执行失败，正在重试 ({retries}/{max_retries}): {str(e)}")
                 if retries < max_retries:
                     time.sleep(1)  # 等待1秒后重试
             except Exception as e:
+                if raise_errors:
+                    raise
                 app.logger.error(f"执行查询时出错: {str(e)}, 查询: {query}")
+                mark_degraded()
                 # 返回空列表而不是None，使调用代码更容易处理
                 return []
         
         if last_error:
             app.logger.error(f"查询重试失败 ({retries}/{max_retries}): {str(last_error)}, 查询: {query}")
+            if raise_errors:
+                raise last_error
         
+        mark_degraded()
         # 返回空列表而不是None
         return []
 
     @classmethod
-    def execute_batch_queries(cls, queries):
-        """批量执行多个查询，即使部分失败也返回已成功的结果"""
-        results = {}
+    def write_transaction(cls, work, *args, **kwargs):
+        """
+        在一个托管写事务中执行 work(tx, *args, **kwargs)，返回 work 的返回值
+
+        一次管理操作的检查、写入和读取都在同一个会话和事务中完成，
+        驱动遇到临时错误（死锁、连接中断、集群主节点切换等）时自动重试整个事务。
+        出错时抛出异常，事务回滚，不会留下只执行了一半的修改。
+        """
+        pool = cls.get_pool()
+        if not pool.get_driver():
+            raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
+        with pool.session() as session:
+            return session.execute_write(work, *args, **kwargs)
+
+    @classmethod
+    def get_batch_executor(cls):
+        """批量查询共用的线程池"""
+        if cls._batch_executor is None:
+            with cls._lock:
+                if cls._batch_executor is None:
+                    cls._batch_executor = ThreadPoolExecutor(
+                        max_workers=app.config['NEO4J_BATCH_QUERY_WORKERS'],
+                        thread_name_prefix="neo4j-batch"
+                    )
+        return cls._batch_executor
+
+    @classmethod
+    def execute_batch_queries(cls, queries, timeout=None, errors=None):
+        """
+        并发执行多个互不依赖的只读查询，即使部分失败或超时也返回已成功的结果
+
+        总耗时取决于最慢的查询而不是所有查询之和。每个查询可以用 "timeout" 单独指定超时(秒)，
+        超时或失败的查询结果为空列表。
+
+        Args:
+            queries (dict): {名称: {"query": ..., "params": ..., "timeout": ...}}
+            timeout (float): 默认超时，未指定时使用 NEO4J_BATCH_QUERY_TIMEOUT
+            errors (dict): 可选，传入时记录失败查询的错误信息
+
+        Returns:
+            dict: {名称: 记录列表}
+        """
+        timeout = timeout or app.config['NEO4J_BATCH_QUERY_TIMEOUT']
+        executor = cls.get_batch_executor()
+        started = time.time()
         
+        futures = {}
         for query_name, query_info in queries.items():
+            query_timeout = query_info.get("timeout", timeout)
+            future = executor.submit(
+                cls.run_query, query_info["query"], query_info.get("params", {}), True, query_timeout
+            )
+            futures[query_name] = (future, query_timeout)
+        
+        results = {}
+        for query_name, (future, query_timeout) in futures.items():
             try:
-                query = query_info["query"]
-                params = query_info.get("params", {})
-                
-                query_result = cls.run_query(query, params)
-                if query_result is not None:
-                    results[query_name] = query_result
-                else:
-                    # 如果查询失败，放入空结果
-                    results[query_name] = []
+                # 多等1秒，让服务端先按事务超时终止查询
+                remaining = started + query_timeout + 1 - time.time()
+                query_result = future.result(timeout=max(0, remaining))
+                results[query_name] = query_result if query_result is not None else []
+            except FutureTimeoutError:
+                future.cancel()
+                logger.error(f"批量查询 '{query_name}' 超时 ({query_timeout}秒)")
+                mark_degraded()
+                results[query_name] = []
+                if errors is not None:
+                    errors[query_name] = "查询超时"
             except Exception as e:
                 logger.error(f"批量查询 '{query_name}' 执行失败: {str(e)}")
+                mark_degraded()
                 results[query_name] = []
+                if errors is not None:
+                    errors[query_name] = str(e)
         
+        app.logger.info(f"批量查询完成: {len(queries)} 个查询, 用时 {time.time() - started:.3f} 秒")
         return results
 
+# 分页总数缓存
+count_cache = CountCache(ttl=app.config['COUNT_CACHE_TTL'])
+
+# 节点 name/title 全文索引，启动时在后台创建，不可用时搜索回退到 CONTAINS 查询
+search_index = FulltextIndexManager(
+    Neo4jConnection.run_query,
+    name=app.config['FULLTEXT_INDEX_NAME'],
+    retry_interval=app.config['FULLTEXT_INDEX_RETRY_INTERVAL'],
+    await_timeout=app.config['SCHEMA_AWAIT_TIMEOUT']
+)
+if app.config['FULLTEXT_INDEX_ENABLED']:
+    search_index.refresh_async()
+
+def explain_query(query, params=None):
+    """返回查询的执行计划(不执行查询)"""
+    with Neo4jConnection.get_pool().session() as session:
+        return session.run("EXPLAIN " + query, params or {}).consume().plan
+
+# 需要走索引的热点查询，启动时和 flask schema check 用 EXPLAIN 检查是否退化为扫描
+HOT_QUERIES = {
+    "named_entity_merge": (NAMED_ENTITY_UNWIND_QUERY, {"rows": []}),
+    "named_relation_merge": (NAMED_RELATION_UNWIND_QUERY, {"rows": []}),
+    "entity_merge": (ENTITY_UNWIND_QUERY, {"rows": []}),
+    "relation_merge": (RELATION_UNWIND_QUERY, {"rows": []}),
+    "import_entity": (IMPORT_ENTITY_QUERY, {"rows": []}),
+    "import_relation": (IMPORT_RELATION_QUERY, {"rows": []}),
+    "import_entity_types": (ENTITY_TYPES_QUERY, {"names": []})
+}
+
+# 索引和约束：启动时在后台创建缺少的项，等待索引上线后检查热点查询的执行计划
+schema_manager = SchemaManager(
+    Neo4jConnection.run_query,
+    explain=explain_query,
+    label_indexes=app.config['SCHEMA_LABEL_INDEXES']
+)
+
+def bootstrap_schema():
+    if schema_manager.apply() is None:
+        return
+    schema_manager.backfill_sort_keys()
+    schema_manager.await_indexes(app.config['SCHEMA_AWAIT_TIMEOUT'])
+    schema_manager.check_plans(HOT_QUERIES)
+
+if app.config['SCHEMA_AUTO_APPLY']:
+    threading.Thread(target=bootstrap_schema, name="schema-bootstrap", daemon=True).start()
+
+# 管理接口写入查询时允许使用的节点标签和关系类型
+node_type_names = NameWhitelist(
+    lambda: [r["label"] for r in Neo4jConnection.run_query("CALL db.labels() YIELD label RETURN label", raise_errors=True)],
+    "节点类型",
+    allow_new=app.config['ADMIN_ALLOW_NEW_TYPES']
+)
+relation_type_names = NameWhitelist(
+    lambda: [r["relationshipType"] for r in Neo4jConnection.run_query(
+        "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType", raise_errors=True
+    )],
+    "关系类型",
+    allow_new=app.config['ADMIN_ALLOW_NEW_TYPES']
+)
+
+def ensure_label_indexes(label):
+    """出现新标签时把它加入全文索引，并创建 name/title/sort_key 索引"""
+    search_index.ensure_label(label)
+    if app.config['SCHEMA_AUTO_APPLY']:
+        schema_manager.ensure_label(label)
+
+# 节点名称的内存自动补全索引，启动时在后台构建，由节点管理接口增量更新
+autocomplete_index = AutocompleteIndex()
+
+def fetch_autocomplete_page(after, page_size):
+    """按id顺序分页读取节点名称，用于构建自动补全索引"""
+    return Neo4jConnection.run_query("""
+    MATCH (n) WHERE id(n) > $after
+    RETURN id(n) AS id, n.name AS name, n.title AS title, labels(n)[0] AS type
+    ORDER BY id
+    LIMIT $limit
+    """, {"after": after, "limit": page_size}, raise_errors=True)
+
+def refresh_autocomplete_index():
+    """在后台重建整个自动补全索引（启动时）"""
+    if app.config['AUTOCOMPLETE_ENABLED']:
+        autocomplete_index.rebuild_async(fetch_autocomplete_page, app.config['AUTOCOMPLETE_PAGE_SIZE'])
+
+AUTOCOMPLETE_NAMES_QUERY = """
+UNWIND $names AS name
+MATCH (n:Entity {name: name})
+RETURN id(n) AS id, n.name AS name, n.title AS title, labels(n)[0] AS type
+"""
+
+def update_autocomplete_names(names):
+    """
+    把新写入的实体加入自动补全索引
+
+    只按名称读取这些实体（使用 Entity.name 索引），不重新分页读取全部节点。
+    """
+    if not app.config['AUTOCOMPLETE_ENABLED']:
+        return
+    names = list(dict.fromkeys(name for name in names if name))
+    page_size = app.config['AUTOCOMPLETE_PAGE_SIZE']
+    for start in range(0, len(names), page_size):
+        try:
+            rows = Neo4jConnection.run_query(
+                AUTOCOMPLETE_NAMES_QUERY, {"names": names[start:start + page_size]}, raise_errors=True
+            )
+        except Exception as e:
+            logger.warning(f"更新自动补全索引失败: {str(e)}")
+            return
+        for row in rows:
+            autocomplete_index.upsert(row["id"], row["name"], row["title"], row["type"])
+
+refresh_autocomplete_index()
+
+# 统计数据缓存：写接口增量更新，后台定期用计数存储校准
+graph_stats = GraphStats(
+    Neo4jConnection.execute_batch_queries,
+    reconcile_interval=app.config['STATS_RECONCILE_INTERVAL']
+)
+graph_stats.start()
+
+# 只读接口的响应缓存，以图谱版本号失效
+def create_response_cache():
+    """根据配置创建响应缓存，后端不可用时关闭缓存"""
+    try:
+        backend = create_cache_backend(
+            app.config['RESPONSE_CACHE_BACKEND'],
+            path=app.config['RESPONSE_CACHE_PATH'],
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            ttl=app.config['RESPONSE_CACHE_TTL']
+        )
+    except Exception as e:
+        logger.warning(f"无法初始化响应缓存，缓存已关闭: {str(e)}")
+        backend = None
+    return ResponseCache(backend)
+
+response_cache = create_response_cache()
+
+def mark_graph_changed():
+    """图谱数据发生变化：递增版本号，使所有缓存的响应失效"""
+    response_cache.bump_version()
+
+def cached_response(name):
+    """
+    缓存只读接口的成功响应，键为 接口名 + 规范化的查询参数 + 图谱版本号
+
+    查询出错后用空结果或默认数据生成的响应（见 mark_degraded）不缓存。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return view(*args, **kwargs)
+            
+            key = response_cache.key(name, list(request.args.items(multi=True)) + list(kwargs.items()))
+            cached = response_cache.get(key)
+            if cached is not None:
+                response = Response(cached["body"], status=200, mimetype=cached["mimetype"])
+                response.headers["X-Cache"] = "HIT"
+                return response
+            
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed and not g.get("degraded"):
+                response_cache.set(key, {"body": response.get_data(as_text=True), "mimetype": response.mimetype})
+            response.headers["X-Cache"] = "MISS"
+            return response
+        wrapper.cache_name = name
+        return wrapper
+    return decorator
+
+def make_conditional(response):
+    """
+    按响应内容设置ETag，请求的 If-None-Match 与之相同时改为304
+
+    ETag 是响应体的哈希，与进程、重启和其他进程（如 flask import-graph）的写入无关，
+    数据变化后一定不同。命中响应缓存时不需要查询数据库，只计算哈希。
+    """
+    if response.status_code != 200 or response.is_streamed:
+        return response
+    response.add_etag()
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+def conditional_get(view):
+    """为只读接口的成功响应生成ETag，客户端带 If-None-Match 且内容未变化时返回304"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return make_conditional(app.make_response(view(*args, **kwargs)))
+    # ASGI模式的异步接口按同样的设置生成ETag
+    wrapper.conditional = True
+    return wrapper
+
+def invalidates_graph(view):
+    """写接口执行成功后使响应缓存失效"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code < 400:
+            mark_graph_changed()
+        return response
+    return wrapper
+
+def run_fulltext_query(query, text, params):
+    """
+    通过全文索引执行查询，查询中用 $index 和 $lucene 引用索引名和检索式
+
+    索引不可用或查询出错时返回 None，由调用方回退到 CONTAINS 查询
+    """
+    fulltext_params = fulltext_query_params(text, params)
+    if fulltext_params is None:
+        return None
+    try:
+        return Neo4jConnection.run_query(query, fulltext_params, raise_errors=True)
+    except Exception as e:
+        fulltext_query_failed(e, fulltext_params['index'])
+        return None
+
+def fulltext_query_params(text, params):
+    """全文索引可用时返回加上 $index / $lucene 的查询参数，否则返回 None"""
+    lucene = build_lucene_query(text)
+    if not lucene or not app.config['FULLTEXT_INDEX_ENABLED'] or not search_index.usable():
+        return None
+    return dict(params, index=search_index.name, lucene=lucene)
+
+def fulltext_query_failed(error, index_name=None):
+    search_index.mark_failed(error, index_name)
+    app.logger.warning(f"全文索引查询失败，回退到普通查询: {str(error)}")
+
 # 数据处理函数
-def process_graph_data(records, limit):
-    """处理Neo4j查询结果，转换为图谱数据格式"""
+def process_graph_data(records, limit, include_properties=True):
+    """
+    处理Neo4j查询结果，转换为图谱数据格式
+
+    include_properties 为 False 时不复制节点和关系的属性（列式格式按需获取属性）
+    """
     nodes = []
     links = []
     node_ids = set()
@@ -201,7 +603,7 @@ def process_graph_data(records, limit):
                     'id': source_node.element_id,
                     'name': source_node.get('name', source_node.get('title', '无名称')),
                     'type': list(source_node.labels)[0] if source_node.labels else 'Unknown',
-                    'properties': dict(source_node)
+                    'properties': dict(source_node) if include_properties else None
                 }
                 nodes.append(node_data)
                 node_ids.add(source_node.element_id)
@@ -212,7 +614,7 @@ def process_graph_data(records, limit):
                     'id': target_node.element_id,
                     'name': target_node.get('name', target_node.get('title', '无名称')),
                     'type': list(target_node.labels)[0] if target_node.labels else 'Unknown',
-                    'properties': dict(target_node)
+                    'properties': dict(target_node) if include_properties else None
                 }
                 nodes.append(node_data)
                 node_ids.add(target_node.element_id)
@@ -223,11 +625,12 @@ def process_graph_data(records, limit):
                 rel_key = f"{source_node.element_id}-{relationship.type}-{target_node.element_id}"
                 if rel_key not in link_keys:
                     link_data = {
+                        'id': relationship.element_id,
                         'source': source_node.element_id,
                         'target': target_node.element_id,
                         'type': relationship.type,
                         'label': relationship.type,
-                        'properties': dict(relationship)
+                        'properties': dict(relationship) if include_properties else None
                     }
                     links.append(link_data)
                     link_keys.add(rel_key)
@@ -249,45 +652,42 @@ def process_graph_data(records, limit):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_file(file_path, file_type):
-    if file_type == 'txt':
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    elif file_type == 'pdf':
-        with open(file_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            text = ''
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
-    elif file_type == 'docx':
-        doc = Document(file_path)
-        return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-    return ''
-
 def save_to_neo4j(entities, relations):
-    driver = GraphDatabase.driver(os.getenv('NEO4J_URI'), auth=(os.getenv('NEO4J_USER'), os.getenv('NEO4J_PASSWORD')))
+    """使用共享驱动，以 UNWIND 分批写入实体和关系"""
+    driver = Neo4jConnection.get_driver()
+    if not driver:
+        raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
     
-    with driver.session() as session:
-        # 创建实体节点
-        for entity in entities:
-            session.run(
-                "MERGE (n:Entity {name: $name, type: $type})",
-                name=entity["name"],
-                type=entity["type"]
-            )
-        
-        # 创建关系
-        for relation in relations:
-            session.run(
-                "MATCH (a:Entity {name: $source}), (b:Entity {name: $target}) "
-                "MERGE (a)-[:RELATION {relation: $relation}]->(b)",
-                source=relation["source"],
-                target=relation["target"],
-                relation=relation["relation"]
-            )
+    batch_size = app.config['NEO4J_WRITE_BATCH_SIZE']
+    
+    # 创建实体节点（同名实体有具体类型时不再单独写入 "Unknown"）
+    entity_rows, endpoint_types = dedupe_named_entities(entities)
+    entity_stats = write_in_batches(driver, NAMED_ENTITY_UNWIND_QUERY, entity_rows, batch_size)
+    
+    # 创建关系，端点按名称和类型匹配到唯一的节点
+    relation_rows = [
+        {
+            "source": r["source"],
+            "source_type": endpoint_types.get(r["source"]),
+            "target": r["target"],
+            "target_type": endpoint_types.get(r["target"]),
+            "relation": r["relation"]
+        }
+        for r in relations
+    ]
+    relation_stats = write_in_batches(driver, NAMED_RELATION_UNWIND_QUERY, relation_rows, batch_size)
     
-    driver.close()
+    logger.info(
+        f"保存到Neo4j: {entity_stats['rows']} 个实体, {relation_stats['rows']} 个关系, "
+        f"{entity_stats['statements'] + relation_stats['statements']} 条语句, "
+        f"{entity_stats['transactions'] + relation_stats['transactions']} 个事务"
+    )
+    ensure_label_indexes("Entity")
+    update_autocomplete_names(row["name"] for row in entity_rows)
+    graph_stats.node_created("Entity", entity_stats["nodes_created"])
+    graph_stats.relation_created("RELATION", relation_stats["relationships_created"])
+    mark_graph_changed()
+    return {"entities": entity_stats, "relations": relation_stats}
 
 # 路由定义
 @app.route('/')
@@ -295,62 +695,95 @@ def index():
     """渲染主页"""
     return render_template('index.html')
 
+# 有搜索条件时先用全文索引找到得分最高的节点，再展开它们的关系
+GRAPH_FULLTEXT_QUERY = """
+CALL db.index.fulltext.queryNodes($index, $lucene) YIELD node, score
+WITH node, score
+ORDER BY score DESC
+LIMIT $limit
+MATCH (node)-[r]-(m)
+RETURN node AS n, r, m
+LIMIT $limit*3
+"""
+
+def graph_queries(search, relation, limit):
+    """
+    根据查询参数选择 /api/graph 的查询
+
+    Returns:
+        tuple: (全文索引查询或 None, 普通查询, 参数)；全文索引不可用时使用普通查询
+    """
+    params = {"limit": limit}
+    
+    if search:
+        # 如果有搜索条件，返回与搜索相关的节点和关系
+        query = """
+        MATCH (n)-[r]-(m)
+        WHERE toLower(n.name) CONTAINS toLower($search) OR 
+              toLower(n.title) CONTAINS toLower($search) OR
+              toLower(m.name) CONTAINS toLower($search) OR
+              toLower(m.title) CONTAINS toLower($search)
+        RETURN n, r, m 
+        LIMIT $limit*3
+        """
+        params["search"] = search
+        return GRAPH_FULLTEXT_QUERY, query, params
+    if relation:
+        # 如果有关系筛选，返回特定关系类型的节点和关系
+        query = f"""
+        MATCH (n)-{relationship_pattern("r", relation)}-(m)
+        RETURN n, r, m 
+        LIMIT $limit*3
+        """
+        return None, query, params
+    
+    # 返回所有节点和关系（有限制）- 优化查询以确保返回关系
+    query = """
+    MATCH (n)-[r]->(m)
+    RETURN n, r, m 
+    LIMIT $limit*3
+    """
+    return None, query, params
+
+def graph_response(records, limit, columnar=False):
+    """把 /api/graph 的查询结果转换为 (响应数据, 状态码)"""
+    if records is None:
+        return {"error": "无法连接到Neo4j数据库或执行查询失败"}, 500
+    
+    # 处理数据
+    result = process_graph_data(records, limit, include_properties=not columnar)
+    
+    if result is None:
+        return {"error": "处理图谱数据时出错"}, 500
+    
+    # 记录结果日志，帮助调试
+    app.logger.info(f"查询返回的节点数: {len(result['nodes'])}, 关系数: {len(result['links'])}")
+    
+    if columnar:
+        return to_columnar(result), 200
+    return result, 200
+
 @app.route('/api/graph')
+@conditional_get
+@cached_response("graph")
 def get_graph():
     """获取图谱数据用于可视化"""
     try:
         search = request.args.get('search', '')
         relation = request.args.get('relation', '')
         limit = int(request.args.get('limit', 100))
+        # format=columnar 返回紧凑的列式格式，属性按需通过 /api/graph/properties 获取
+        columnar = request.args.get('format', '') == 'columnar'
         
-        # 构建查询
-        params = {"limit": limit}
-        
-        if search:
-            # 如果有搜索条件，返回与搜索相关的节点和关系
-            query = """
-            MATCH (n)-[r]-(m)
-            WHERE toLower(n.name) CONTAINS toLower($search) OR 
-                  toLower(n.title) CONTAINS toLower($search) OR
-                  toLower(m.name) CONTAINS toLower($search) OR
-                  toLower(m.title) CONTAINS toLower($search)
-            RETURN n, r, m 
-            LIMIT $limit*3
-            """
-            params["search"] = search
-        elif relation:
-            # 如果有关系筛选，返回特定关系类型的节点和关系
-            query = """
-            MATCH (n)-[r]-(m)
-            WHERE type(r) = $relation
-            RETURN n, r, m 
-            LIMIT $limit*3
-            """
-            params["relation"] = relation
-        else:
-            # 返回所有节点和关系（有限制）- 优化查询以确保返回关系
-            query = """
-            MATCH (n)-[r]->(m)
-            RETURN n, r, m 
-            LIMIT $limit*3
-            """
-        
-        # 执行查询
-        records = Neo4jConnection.run_query(query, params)
+        fulltext_query, query, params = graph_queries(search, relation, limit)
         
+        # 执行查询（全文索引不可用时使用普通查询）
+        records = run_fulltext_query(fulltext_query, search, params) if fulltext_query else None
         if records is None:
-            return jsonify({"error": "无法连接到Neo4j数据库或执行查询失败"}), 500
-            
-        # 处理数据
-        result = process_graph_data(records, limit)
+            records = Neo4jConnection.run_query(query, params)
         
-        if result is None:
-            return jsonify({"error": "处理图谱数据时出错"}), 500
-            
-        # 记录结果日志，帮助调试
-        app.logger.info(f"查询返回的节点数: {len(result['nodes'])}, 关系数: {len(result['links'])}")
-        
-        return jsonify(result)
+        data, status = graph_response(records, limit, columnar)
+        return jsonify(data), status
         
     except ValueError as e:
         logger.error(f"参数错误: {str(e)}")
@@ -365,6 +798,8 @@ def graph():
     return get_graph()
 
 @app.route('/api/relation-types')
+@conditional_get
+@cached_response("relation_types")
 def get_relation_types():
     """获取所有关系类型"""
     try:
@@ -388,50 +823,26 @@ def get_relation_types():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/node_types')
+@conditional_get
+@cached_response("node_types")
 def get_node_types():
     """获取所有节点类型"""
     try:
-        # 使用更强大的查询，统计每种节点类型的数量
-        query = """
-        MATCH (n)
-        WHERE size(labels(n)) > 0
-        WITH labels(n)[0] AS type, count(n) AS count
-        WHERE type IS NOT NULL
-        RETURN type, count
-        ORDER BY count DESC, type
-        """
-        result = Neo4jConnection.run_query(query)
+        # 读取全部标签，每个标签的数量由计数存储并发查询，不扫描节点
+        labels = [record["label"] for record in Neo4jConnection.run_query(
+            "CALL db.labels() YIELD label RETURN label"
+        ) if record.get("label")]
+        counts = Neo4jConnection.execute_batch_queries(label_count_queries(labels)) if labels else {}
         
-        # 初始化空列表
         node_types = []
-        
-        # 处理查询结果
-        if result and len(result) > 0:
-            # 提取类型名称和每种类型的节点数量
-            for record in result:
-                if record.get("type"):
-                    node_types.append({
-                        "type": record["type"],
-                        "count": record["count"]
-                    })
-        
-        # 如果查询没有返回任何类型（可能是连接失败或空数据库）
-        if not node_types:
-            # 尝试使用备用查询
-            backup_query = """
-            MATCH (n)
-            RETURN DISTINCT labels(n)[0] AS type
-            ORDER BY type
-            """
-            backup_result = Neo4jConnection.run_query(backup_query)
-            
-            if backup_result and len(backup_result) > 0:
-                for record in backup_result:
-                    if record.get("type"):
-                        node_types.append({
-                            "type": record["type"],
-                            "count": 0  # 无法获取计数
-                        })
+        for i, label in enumerate(labels):
+            records = counts.get(f"label_{i}")
+            # 计数失败时仍然返回该类型，数量记为0
+            count = records[0]["count"] if records else 0
+            if records and not count:
+                continue
+            node_types.append({"type": label, "count": count})
+        node_types.sort(key=lambda item: (-item["count"], item["type"]))
         
         # 从完整结果中提取类型名称列表
         types = [item["type"] for item in node_types]
@@ -451,6 +862,7 @@ def get_node_types():
                 "Misc"
             ]
             app.logger.warning("未能从数据库获取节点类型，将使用默认类型列表")
+            mark_degraded()
             
             # 将默认类型添加到结果中
             node_types = [{"type": t, "count": 0} for t in default_types]
@@ -473,6 +885,115 @@ def get_node_types():
             "type_details": [{"type": t, "count": 0} for t in default_types]
         }), 200
 
+def format_subgraph(subgraph, known=None):
+    """
+    把 bounded_bfs 的结果转换为前端使用的节点和关系列表
+
+    Args:
+        known (set): 客户端已有节点的 element_id，这些节点不再返回，但可以作为关系的端点
+
+    Returns:
+        tuple: (节点列表, 关系列表, 未完全展开的节点id列表)
+    """
+    known = known or set()
+    nodes_data = []
+    node_ids = set()
+    truncated_ids = []
+    
+    # 处理节点
+    for internal_id, node in subgraph["nodes"].items():
+        # 驱动的节点/关系对象没有属性时布尔值为False，这里显式判断None
+        if node is not None and node.element_id not in node_ids:
+            try:
+                truncated = internal_id in subgraph["truncated"]
+                if truncated:
+                    truncated_ids.append(node.element_id)
+                node_ids.add(node.element_id)
+                if node.element_id in known:
+                    continue
+                
+                nodes_data.append({
+                    "id": node.element_id,
+                    "name": node.get("name", node.get("title", "未命名")),
+                    "type": list(node.labels)[0] if node.labels else "未分类",
+                    "properties": without_sort_key(node),
+                    "truncated": truncated
+                })
+            except Exception as e:
+                app.logger.error(f"处理节点数据时出错: {str(e)}")
+    
+    # 处理关系
+    links_data = []
+    link_keys = set()
+    endpoint_ids = node_ids | known
+    
+    for rel in subgraph["relationships"].values():
+        if rel is not None:
+            try:
+                source_id = rel.start_node.element_id
+                target_id = rel.end_node.element_id
+                
+                # 确保关系的两端节点都存在于节点列表（或客户端）中
+                if source_id in endpoint_ids and target_id in endpoint_ids:
+                    rel_key = f"{min(source_id, target_id)}-{rel.type}-{max(source_id, target_id)}"
+                    
+                    if rel_key not in link_keys:
+                        links_data.append({
+                            "id": rel.element_id,
+                            "source": source_id,
+                            "target": target_id,
+                            "type": rel.type,
+                            "label": rel.type,
+                            "properties": dict(rel)
+                        })
+                        link_keys.add(rel_key)
+            except Exception as e:
+                app.logger.error(f"处理关系数据时出错: {str(e)}")
+    
+    return nodes_data, links_data, truncated_ids
+
+SUBGRAPH_CENTER_QUERY = "MATCH (n) WHERE id(n) = $node_id RETURN n LIMIT 1"
+
+def parse_subgraph_args(args):
+    """
+    解析并限制子图接口的参数，防止请求过大的子图导致性能问题
+
+    Returns:
+        dict: depth / limit / fanout / relation_types
+
+    Raises:
+        ValueError: 参数格式错误
+    """
+    depth = int(args.get('depth', 1))  # 关系深度，默认为1
+    limit = int(args.get('limit', 100))  # 限制节点数量
+    fanout = int(args.get('fanout', app.config['SUBGRAPH_MAX_FANOUT']))  # 每个节点最多展开的关系数
+    relation_types = [t.strip() for t in args.get('relation_types', '').split(',') if t.strip()]
+    return {
+        "depth": min(max(depth, 1), 3),  # 深度限制在1-3之间
+        "limit": min(max(limit, 10), 500),  # 节点数量限制在10-500之间
+        "fanout": min(max(fanout, 1), 500),
+        "relation_types": relation_types
+    }
+
+def subgraph_response(node_id, subgraph, options):
+    """把 bounded_bfs 的结果转换为子图接口的响应数据"""
+    nodes_data, links_data, truncated_ids = format_subgraph(subgraph)
+    
+    app.logger.info(f"成功获取节点ID={node_id}的子图数据: {len(nodes_data)}个节点, {len(links_data)}个关系")
+    
+    return {
+        "nodes": nodes_data,
+        "links": links_data,
+        "meta": {
+            "center_node_id": node_id,
+            "depth": options["depth"],
+            "limit": options["limit"],
+            "fanout": options["fanout"],
+            "relation_types": options["relation_types"],
+            "truncated_nodes": truncated_ids
+        }
+    }
+
 @app.route('/api/graph/subgraph/<int:node_id>')
 def get_node_subgraph(node_id):
     """获取以特定节点为中心的子图"""
@@ -481,19 +1002,13 @@ def get_node_subgraph(node_id):
         
         # 验证参数
         try:
-            depth = int(request.args.get('depth', 1))  # 关系深度，默认为1
-            limit = int(request.args.get('limit', 100))  # 限制节点数量
-            
-            # 参数验证和限制，防止请求过大的子图导致性能问题
-            depth = min(max(depth, 1), 3)  # 深度限制在1-3之间
-            limit = min(max(limit, 10), 500)  # 节点数量限制在10-500之间
+            options = parse_subgraph_args(request.args)
         except ValueError:
             app.logger.warning(f"请求的参数格式错误: depth={request.args.get('depth')}, limit={request.args.get('limit')}")
             return jsonify({"error": "参数格式错误"}), 400
         
         # 验证节点是否存在
-        check_query = "MATCH (n) WHERE id(n) = $node_id RETURN n LIMIT 1"
-        check_result = Neo4jConnection.run_query(check_query, {"node_id": node_id})
+        check_result = Neo4jConnection.run_query(SUBGRAPH_CENTER_QUERY, {"node_id": node_id})
         
         if not check_result:
             app.logger.warning(f"节点ID={node_id}不存在")
@@ -503,95 +1018,126 @@ def get_node_subgraph(node_id):
             }), 404
         
         # 获取子图数据
-        app.logger.info(f"获取节点ID={node_id}的子图，深度={depth}，限制={limit}")
+        app.logger.info(f"获取节点ID={node_id}的子图，深度={options['depth']}，限制={options['limit']}")
         
-        query = f"""
-        MATCH (center)-[r*0..{depth}]-(neighbor)
-        WHERE id(center) = $node_id
-        WITH center, neighbor, r
-        RETURN collect(distinct center) + collect(distinct neighbor) as nodes, 
-               collect(distinct relationships(r)[0]) as relationships
-        LIMIT $limit
-        """
+        # 逐层扩展，遍历过程中就遵守节点数和扇出上限
+        subgraph = bounded_bfs(Neo4jConnection.run_query, node_id, check_result[0]["n"], **options)
+        
+        return jsonify(subgraph_response(node_id, subgraph, options))
+    except Exception as e:
+        app.logger.error(f"获取子图数据时出错: {str(e)}", exc_info=True)
+        return jsonify({
+            "error": f"获取子图数据时出错: {str(e)}",
+            "node_id": node_id
+        }), 500
+
+@app.route('/api/graph/expand', methods=['POST'])
+def expand_node():
+    """
+    增量展开节点：只返回客户端还没有的节点和关系
+
+    请求体:
+        node_id: 要展开节点的 element_id（也接受内部整数id）
+        known: 客户端已有节点的 element_id 列表
+        depth / limit / fanout / relation_types: 与子图接口相同
+    """
+    try:
+        data = request.get_json() or {}
+        node_id = data.get('node_id')
+        if node_id is None or node_id == '':
+            return jsonify({"error": "缺少必要字段: node_id"}), 400
         
-        records = Neo4jConnection.run_query(query, {"node_id": node_id, "limit": limit})
+        try:
+            depth = min(max(int(data.get('depth', 1)), 1), 3)
+            limit = min(max(int(data.get('limit', 100)), 1), 500)
+            fanout = min(max(int(data.get('fanout', app.config['SUBGRAPH_MAX_FANOUT'])), 1), 500)
+        except (TypeError, ValueError):
+            return jsonify({"error": "参数格式错误"}), 400
+        relation_types = [str(t) for t in data.get('relation_types') or [] if str(t).strip()]
+        known = {str(k) for k in data.get('known') or []}
         
-        if not records:
-            app.logger.error(f"获取节点ID={node_id}的子图数据失败")
-            return jsonify({
-                "error": "无法获取子图数据",
-                "node_id": node_id
-            }), 500
-            
-        record = records[0]  # 只有一个记录
-        
-        # 子图数据处理
-        nodes_data = []
-        node_ids = set()
-        
-        # 处理节点
-        for node in record["nodes"]:
-            if node and node.element_id not in node_ids:
-                try:
-                    node_properties = dict(node)
-                    node_name = node.get("name", node.get("title", "未命名"))
-                    node_type = list(node.labels)[0] if node.labels else "未分类"
-                    
-                    node_data = {
-                        "id": node.element_id,
-                        "name": node_name,
-                        "type": node_type,
-                        "properties": node_properties
-                    }
-                    nodes_data.append(node_data)
-                    node_ids.add(node.element_id)
-                except Exception as e:
-                    app.logger.error(f"处理节点数据时出错: {str(e)}")
-        
-        # 处理关系
-        links_data = []
-        link_keys = set()
-        
-        for rel in record["relationships"]:
-            if rel:
-                try:
-                    source_id = rel.start_node.element_id
-                    target_id = rel.end_node.element_id
-                    
-                    # 确保关系的两端节点都存在于节点列表中
-                    if source_id in node_ids and target_id in node_ids:
-                        rel_key = f"{min(source_id, target_id)}-{rel.type}-{max(source_id, target_id)}"
-                        
-                        if rel_key not in link_keys:
-                            link_data = {
-                                "source": source_id,
-                                "target": target_id,
-                                "type": rel.type,
-                                "label": rel.type,
-                                "properties": dict(rel)
-                            }
-                            links_data.append(link_data)
-                            link_keys.add(rel_key)
-                except Exception as e:
-                    app.logger.error(f"处理关系数据时出错: {str(e)}")
-        
-        app.logger.info(f"成功获取节点ID={node_id}的子图数据: {len(nodes_data)}个节点, {len(links_data)}个关系")
+        if isinstance(node_id, int) or str(node_id).isdigit():
+            check_query = "MATCH (n) WHERE id(n) = $node_id RETURN n, id(n) AS internal_id LIMIT 1"
+            node_id = int(node_id)
+        else:
+            check_query = "MATCH (n) WHERE elementId(n) = $node_id RETURN n, id(n) AS internal_id LIMIT 1"
+        check_result = Neo4jConnection.run_query(check_query, {"node_id": node_id})
+        
+        if not check_result:
+            return jsonify({"error": "节点不存在", "node_id": node_id}), 404
+        
+        center = check_result[0]["n"]
+        subgraph = bounded_bfs(
+            Neo4jConnection.run_query,
+            check_result[0]["internal_id"],
+            center,
+            depth=depth,
+            limit=limit,
+            fanout=fanout,
+            relation_types=relation_types,
+            known=known
+        )
+        nodes_data, links_data, truncated_ids = format_subgraph(subgraph, known)
+        
+        app.logger.info(f"增量展开节点 {center.element_id}: 新增 {len(nodes_data)} 个节点, {len(links_data)} 个关系")
         
         return jsonify({
             "nodes": nodes_data,
             "links": links_data,
             "meta": {
-                "center_node_id": node_id,
+                "center_node_id": center.element_id,
                 "depth": depth,
-                "limit": limit
+                "limit": limit,
+                "fanout": fanout,
+                "relation_types": relation_types,
+                "known": len(known),
+                "truncated_nodes": truncated_ids
             }
         })
     except Exception as e:
-        app.logger.error(f"获取子图数据时出错: {str(e)}", exc_info=True)
+        app.logger.error(f"增量展开节点时出错: {str(e)}", exc_info=True)
+        return jsonify({"error": f"增量展开节点时出错: {str(e)}"}), 500
+
+@app.route('/api/graph/properties', methods=['POST'])
+def get_graph_properties():
+    """
+    按 element_id 批量获取节点和关系的属性，配合 /api/graph?format=columnar 使用
+
+    请求体:
+        nodes: 节点 element_id 列表
+        links: 关系 element_id 列表
+    """
+    try:
+        data = request.get_json() or {}
+        node_ids = [str(i) for i in data.get('nodes') or []]
+        link_ids = [str(i) for i in data.get('links') or []]
+        max_ids = app.config['GRAPH_PROPERTIES_MAX_IDS']
+        if len(node_ids) + len(link_ids) > max_ids:
+            return jsonify({"error": f"一次最多获取 {max_ids} 个元素的属性"}), 400
+        
+        queries = {}
+        if node_ids:
+            queries["nodes"] = {
+                "query": "MATCH (n) WHERE elementId(n) IN $ids RETURN elementId(n) AS id, properties(n) AS properties",
+                "params": {"ids": node_ids}
+            }
+        if link_ids:
+            queries["links"] = {
+                "query": "MATCH ()-[r]->() WHERE elementId(r) IN $ids RETURN elementId(r) AS id, properties(r) AS properties",
+                "params": {"ids": link_ids}
+            }
+        errors = {}
+        results = Neo4jConnection.execute_batch_queries(queries, errors=errors) if queries else {}
+        if errors:
+            return jsonify({"error": "无法连接到Neo4j数据库或执行查询失败"}), 500
+        
         return jsonify({
-            "error": f"获取子图数据时出错: {str(e)}",
-            "node_id": node_id
-        }), 500
+            name: {record["id"]: without_sort_key(record["properties"]) for record in results.get(name) or []}
+            for name in ("nodes", "links")
+        })
+    except Exception as e:
+        logger.error(f"获取属性时出错: {str(e)}")
+        return jsonify({"error": f"获取属性时出错: {str(e)}"}), 500
 
 @app.route('/static/<path:path>')
 def serve_static(path):
@@ -609,49 +1155,49 @@ def admin():
 def get_dashboard_data():
     """获取仪表盘数据"""
     try:
-        # 获取节点总数
-        node_count_query = """
-        MATCH (n)
-        RETURN count(n) AS count
-        """
-        node_count_result = Neo4jConnection.run_query(node_count_query)
-        node_count = node_count_result[0]["count"] if node_count_result else 0
-        
-        # 获取关系总数
-        relation_count_query = """
-        MATCH ()-[r]->()
-        RETURN count(r) AS count
-        """
-        relation_count_result = Neo4jConnection.run_query(relation_count_query)
-        relation_count = relation_count_result[0]["count"] if relation_count_result else 0
-        
-        # 获取节点类型数
-        node_type_count_query = """
-        MATCH (n)
-        RETURN count(DISTINCT labels(n)[0]) AS count
-        """
-        node_type_count_result = Neo4jConnection.run_query(node_type_count_query)
-        node_type_count = node_type_count_result[0]["count"] if node_type_count_result else 0
-        
-        # 获取关系类型数
-        relation_type_count_query = """
-        MATCH ()-[r]->()
-        RETURN count(DISTINCT type(r)) AS count
-        """
-        relation_type_count_result = Neo4jConnection.run_query(relation_type_count_query)
-        relation_type_count = relation_type_count_result[0]["count"] if relation_type_count_result else 0
+        stats = graph_stats.snapshot()
+        if stats is None:
+            return jsonify({"error": "无法连接到Neo4j数据库或执行查询失败"}), 500
         
         return jsonify({
-            "nodeCount": node_count,
-            "relationCount": relation_count,
-            "nodeTypeCount": node_type_count,
-            "relationTypeCount": relation_type_count
+            "nodeCount": stats["node_count"],
+            "relationCount": stats["relation_count"],
+            "nodeTypeCount": len(stats["node_types"]),
+            "relationTypeCount": len(stats["relation_types"]),
+            "computed_at": stats["computed_at"]
         })
         
     except Exception as e:
         logger.error(f"获取仪表盘数据时出错: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def list_labels(type_filter=None):
+    """
+    按标签拆分的列表查询使用的标签
+
+    指定了类型时只查询该标签；否则使用统计数据中的标签（按名称排序，查询文本保持稳定），
+    统计数据不可用时读取数据库中的标签。
+    """
+    if type_filter:
+        return [type_filter]
+    stats = graph_stats.snapshot()
+    if stats is not None:
+        return sorted(item["type"] for item in stats["node_types"])
+    return sorted(r["label"] for r in Neo4jConnection.run_query("CALL db.labels() YIELD label RETURN label") or [])
+
+def keyset_page_conditions(columns, cursor_values, params):
+    """
+    按排序键翻页的条件
+
+    除元组比较外再加上首列的范围条件（首列 >= 游标值），使查询可以从索引中直接定位到游标位置；
+    没有游标时要求首列不为空，查询才能按索引顺序读取。
+    """
+    if cursor_values is None:
+        return [f"{columns[0]} IS NOT NULL"]
+    condition, cursor_params = keyset_condition(columns)
+    params.update(zip(cursor_params, cursor_values))
+    return [f"{columns[0]} >= ${cursor_params[0]}", condition]
+
 @app.route('/api/admin/nodes')
 def get_nodes():
     """获取节点列表，支持分页和筛选"""
@@ -662,42 +1208,55 @@ def get_nodes():
         name_filter = request.args.get('name', '')
         type_filter = request.args.get('type', '')
         
-        # 计算分页偏移量
-        skip = (page - 1) * limit
+        cursor = request.args.get('cursor', '')
+        with_total = request.args.get('with_total', 'true').lower() != 'false'
         
-        # 构建查询条件
-        where_clause = []
-        params = {"skip": skip, "limit": limit}
+        # 有游标时按排序键翻页，否则按页码偏移（兼容跳页）
+        skip = 0 if cursor else (page - 1) * limit
+        
+        # 构建查询条件：类型筛选写在节点模式的标签上，只读取该标签的节点
+        conditions = []
+        params = {"skip": skip, "limit": limit + 1}
         
         if name_filter:
-            where_clause.append("n.name CONTAINS $name")
+            conditions.append("n.name CONTAINS $name")
             params["name"] = name_filter
-            
-        if type_filter:
-            where_clause.append("labels(n)[0] = $type")
-            params["type"] = type_filter
-            
-        where_str = " AND ".join(where_clause)
-        if where_str:
-            where_str = "WHERE " + where_str
-            
-        # 查询节点数据
+        
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor, 2)
+            except ValueError as e:
+                return jsonify({"error": str(e), "nodes": []}), 400
+        
+        # 每个标签一个分支：按 sort_key 索引顺序读取并截取前 skip + limit + 1 条，外层合并后排序分页
+        page_conditions = conditions + keyset_page_conditions(["n.sort_key", "id(n)"], after, params)
+        params["branch_limit"] = skip + limit + 1
+        
+        def branch(pattern):
+            return (f"MATCH {pattern} {where_clause(page_conditions)} "
+                    "RETURN n ORDER BY n.sort_key, id(n) LIMIT $branch_limit")
+        
+        # 查询节点数据（多取一条用于判断是否还有下一页）
+        labels = list_labels(type_filter)
         query = f"""
-        MATCH (n)
-        {where_str}
+        {label_union(labels, branch)}
         RETURN 
             id(n) AS id, 
             n.name AS name,
             n.title AS title, 
             labels(n)[0] AS type,
-            size(keys(n)) AS prop_count,
-            properties(n) AS properties
-        ORDER BY COALESCE(n.title, n.name, "未命名节点")
+            properties(n) AS properties,
+            n.sort_key AS sort_key
+        ORDER BY sort_key, id
         SKIP $skip
         LIMIT $limit
         """
         
-        result = Neo4jConnection.run_query(query, params)
+        result = (Neo4jConnection.run_query(query, params) or []) if labels else []
+        has_more = len(result) > limit
+        result = result[:limit]
+        next_cursor = encode_cursor([result[-1]["sort_key"], result[-1]["id"]]) if has_more else None
         
         # 如果查询失败，返回空列表而不是错误
         nodes = []
@@ -708,8 +1267,8 @@ def get_nodes():
                 node_name = record.get("name", "")
                 node_title = record.get("title", "")
                 node_type = record.get("type", "未知类型")
-                prop_count = record.get("prop_count", 0)
-                properties = record.get("properties", {})
+                properties = without_sort_key(record.get("properties"))
+                prop_count = len(properties)
                 
                 # 设置显示名称：优先使用title，其次使用name，都没有则为"未命名节点"
                 display_name = node_title or node_name or "未命名节点"
@@ -724,32 +1283,35 @@ def get_nodes():
                     "properties": properties
                 })
         
-        # 获取总节点数（用于分页）
-        total = 0
-        try:
-            count_query = f"""
-            MATCH (n)
-            {where_str}
-            RETURN count(n) AS total
-            """
-            
-            count_result = Neo4jConnection.run_query(count_query, params)
-            if count_result and len(count_result) > 0:
-                total = count_result[0].get("total", 0)
-        except Exception as e:
-            app.logger.warning(f"获取节点数量时出错: {str(e)}")
-            # 如果获取数量失败，使用当前列表长度作为替代
-            total = len(nodes)
+        # 获取总节点数（用于分页），使用缓存的近似值，避免每次请求都全量统计
+        total = None
+        if with_total:
+            try:
+                # 没有名称筛选时直接读取计数存储
+                count_query = count_nodes_query(type_filter, conditions)
+                
+                def count_nodes():
+                    count_result = Neo4jConnection.run_query(count_query, params)
+                    return count_result[0].get("total", 0) if count_result else 0
+                
+                total, _ = count_cache.get_or_compute(("nodes", name_filter, type_filter), count_nodes)
+            except Exception as e:
+                app.logger.warning(f"获取节点数量时出错: {str(e)}")
+                # 如果获取数量失败，使用当前列表长度作为替代
+                total = len(nodes)
         
         # 确保每页至少有1页
-        pages = max(1, math.ceil(total / limit) if total > 0 else 1)
+        pages = max(1, math.ceil(total / limit) if total else 1)
         
         return jsonify({
             "nodes": nodes,
             "total": total,
+            "total_approximate": with_total,
             "page": page,
             "limit": limit,
-            "pages": pages
+            "pages": pages,
+            "next_cursor": next_cursor,
+            "has_more": has_more
         })
     except Exception as e:
         app.logger.error(f"获取节点列表时出错: {str(e)}")
@@ -760,6 +1322,8 @@ def get_nodes():
             "page": 1,
             "limit": 10,
             "pages": 1,
+            "next_cursor": None,
+            "has_more": False,
             "error": str(e)
         }), 200
 
@@ -787,7 +1351,7 @@ def get_node(node_id):
             
         record = result[0]
         node = record.get("n", {})
-        node_properties = dict(node) if node else {}
+        node_properties = without_sort_key(node) if node else {}
         
         # 从属性中获取name和title
         node_name = node_properties.get("name", "")
@@ -821,6 +1385,7 @@ def get_node(node_id):
         }), 200
 
 @app.route('/api/admin/nodes', methods=['POST'])
+@invalidates_graph
 def create_node():
     """创建新节点"""
     try:
@@ -832,12 +1397,8 @@ def create_node():
             
         node_name = data.get('name', '').strip()
         node_title = data.get('title', '').strip()
-        node_type = data.get('type', '').strip()
-        node_properties = data.get('properties', {})
-        
-        # 确保节点类型非空
-        if not node_type:
-            return jsonify({"error": "节点类型不能为空"}), 400
+        node_type = node_type_names.check(data.get('type'))
+        node_properties = property_map(data.get('properties'))
         
         # 设置显示名称优先级：title > name
         display_name = node_title or node_name or "未命名节点"
@@ -853,31 +1414,19 @@ def create_node():
         if node_name:
             node_properties['name'] = node_name
         
-        # 构建属性参数字符串和查询参数
-        props_list = []
-        params = {}
-        
-        for key, value in node_properties.items():
-            param_key = f"prop_{key}"
-            props_list.append(f"{key}: ${param_key}")
-            params[param_key] = value
-        
-        props_str = ", ".join(props_list)
-        
-        # 创建节点的Cypher查询
-        query = f"""
-        CREATE (n:{node_type} {{{props_str}}})
-        RETURN id(n) AS id, n.name AS name, n.title as title, labels(n)[0] AS type
-        """
-        
-        result = Neo4jConnection.run_query(query, params)
+        result = Neo4jConnection.run_query(create_node_query(node_type), {"props": node_properties})
         
         if not result or len(result) == 0:
             return jsonify({"error": "创建节点失败，但无错误信息"}), 500
             
         created_node = result[0]
+        ensure_label_indexes(created_node.get("type") or node_type)
         node_name = created_node.get("name", "")
         node_title = created_node.get("title", "")
+        autocomplete_index.upsert(
+            created_node.get("id", 0), node_name, node_title, created_node.get("type", node_type)
+        )
+        graph_stats.node_created(created_node.get("type") or node_type)
         display_name = node_title or node_name or "未命名节点"
         
         return jsonify({
@@ -888,11 +1437,14 @@ def create_node():
             "type": created_node.get("type", node_type),
             "message": "节点创建成功"
         }), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"创建节点时出错: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/nodes/<int:node_id>', methods=['PUT'])
+@invalidates_graph
 def update_node(node_id):
     """更新节点信息"""
     try:
@@ -904,15 +1456,8 @@ def update_node(node_id):
             
         node_name = data.get('name', '').strip()
         node_title = data.get('title', '').strip()
-        node_type = data.get('type', '').strip()
-        node_properties = data.get('properties', {})
-        
-        # 确保节点类型非空
-        if not node_type:
-            return jsonify({"error": "节点类型不能为空"}), 400
-            
-        # 设置显示名称优先级：title > name
-        display_name = node_title or node_name or "未命名节点"
+        node_type = node_type_names.check(data.get('type'))
+        node_properties = property_map(data.get('properties'))
         
         # 如果name为空但title不为空，使用title作为name
         if not node_name and node_title:
@@ -925,69 +1470,20 @@ def update_node(node_id):
         if node_name:
             node_properties['name'] = node_name
         
-        # 首先检查节点是否存在
-        check_query = """
-        MATCH (n) WHERE id(n) = $node_id
-        RETURN labels(n)[0] AS current_type
-        """
-        
-        check_result = Neo4jConnection.run_query(check_query, {"node_id": node_id})
+        # 在一个事务中更新属性、需要时更换标签，并返回更新后的节点
+        result = Neo4jConnection.write_transaction(update_node_tx, node_id, node_type, node_properties)
         
-        if not check_result or len(check_result) == 0:
+        if result is None:
             return jsonify({"error": f"ID为{node_id}的节点不存在"}), 404
-            
-        current_type = check_result[0].get("current_type", "Unknown")
-        
-        # 构建属性设置参数
-        set_items = []
-        params = {"node_id": node_id}
-        
-        for key, value in node_properties.items():
-            param_key = f"prop_{key}"
-            set_items.append(f"n.{key} = ${param_key}")
-            params[param_key] = value
-        
-        set_str = ", ".join(set_items)
-        
-        # 更新查询
-        update_query = f"""
-        MATCH (n) WHERE id(n) = $node_id
-        SET {set_str}
-        """
-        
-        # 如果节点类型已更改，则需要更新标签
-        if current_type != node_type:
-            label_query = f"""
-            MATCH (n) WHERE id(n) = $node_id
-            REMOVE n:{current_type}
-            SET n:{node_type}
-            """
-            Neo4jConnection.run_query(label_query, {"node_id": node_id})
-        
-        # 执行属性更新
-        Neo4jConnection.run_query(update_query, params)
-        
-        # 获取更新后的节点
-        get_query = """
-        MATCH (n) WHERE id(n) = $node_id
-        RETURN id(n) AS id, n.name AS name, n.title AS title, labels(n)[0] AS type
-        """
-        
-        result = Neo4jConnection.run_query(get_query, {"node_id": node_id})
         
-        if not result or len(result) == 0:
-            return jsonify({
-                "id": node_id,
-                "name": node_name,
-                "title": node_title,
-                "display_name": display_name,
-                "type": node_type,
-                "message": "节点可能已更新，但无法确认"
-            })
+        updated_node, current_type = result
+        if current_type != node_type:
+            ensure_label_indexes(node_type)
+            graph_stats.node_relabelled(current_type, node_type)
             
-        updated_node = result[0]
         updated_name = updated_node.get("name", "")
         updated_title = updated_node.get("title", "")
+        autocomplete_index.upsert(node_id, updated_name, updated_title, updated_node.get("type", node_type))
         updated_display_name = updated_title or updated_name or "未命名节点"
         
         return jsonify({
@@ -998,33 +1494,27 @@ def update_node(node_id):
             "type": updated_node.get("type", node_type),
             "message": "节点更新成功"
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"更新节点时出错: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/nodes/<int:node_id>', methods=['DELETE'])
+@invalidates_graph
 def delete_node(node_id):
     """删除节点及其关联的所有关系"""
     try:
-        # 首先获取节点信息，用于返回
-        info_query = """
-        MATCH (n) WHERE id(n) = $node_id
-        RETURN n.name AS name
-        """
-        
-        info_result = Neo4jConnection.run_query(info_query, {"node_id": node_id})
+        # 删除节点及其关联的所有关系，同一条语句返回删除前的节点信息
+        deleted = Neo4jConnection.write_transaction(delete_node_tx, node_id)
         
         node_name = "未知节点"
-        if info_result and len(info_result) > 0:
-            node_name = info_result[0].get("name", "未知节点")
-        
-        # 删除节点及其关联的所有关系
-        delete_query = """
-        MATCH (n) WHERE id(n) = $node_id
-        DETACH DELETE n
-        """
+        if deleted is not None:
+            node_name = deleted.get("name", "未知节点")
         
-        Neo4jConnection.run_query(delete_query, {"node_id": node_id})
+        autocomplete_index.remove(node_id)
+        if deleted is not None:
+            graph_stats.node_deleted(deleted.get("type"), deleted.get("relation_types"))
         
         return jsonify({
             "message": f"节点 \"{node_name}\" 已成功删除",
@@ -1046,45 +1536,71 @@ def get_relations():
         source_filter = request.args.get('source', '')
         target_filter = request.args.get('target', '')
         
-        # 计算跳过的记录数
-        skip = (page - 1) * limit
+        cursor = request.args.get('cursor', '')
+        with_total = request.args.get('with_total', 'true').lower() != 'false'
+        
+        # 有游标时按排序键翻页，否则按页码偏移（兼容跳页）
+        skip = 0 if cursor else (page - 1) * limit
         
-        # 构建查询条件
-        where_clause = []
-        params = {"skip": skip, "limit": limit}
+        # 构建查询条件：关系类型筛选写在关系模式上，只读取该类型的关系
+        conditions = []
+        params = {"skip": skip, "limit": limit + 1}
         
         if search:
-            where_clause.append("(toLower(source.name) CONTAINS toLower($search) OR toLower(target.name) CONTAINS toLower($search))")
+            conditions.append("(toLower(source.name) CONTAINS toLower($search) OR toLower(target.name) CONTAINS toLower($search))")
             params["search"] = search
             
-        if relation_type:
-            where_clause.append("type(r) = $type")
-            params["type"] = relation_type
-            
         if source_filter:
-            where_clause.append("toLower(source.name) CONTAINS toLower($source)")
+            conditions.append("toLower(source.name) CONTAINS toLower($source)")
             params["source"] = source_filter
             
         if target_filter:
-            where_clause.append("toLower(target.name) CONTAINS toLower($target)")
+            conditions.append("toLower(target.name) CONTAINS toLower($target)")
             params["target"] = target_filter
             
-        where_str = " WHERE " + " AND ".join(where_clause) if where_clause else ""
+        rel_str = relationship_pattern("r", relation_type)
         
-        # 获取总数
-        count_query = f"""
-        MATCH (source)-[r]->(target)
-        {where_str}
-        RETURN count(r) AS total
-        """
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor, 4)
+            except ValueError as e:
+                return jsonify({"error": str(e), "relations": []}), 400
+        
+        # 获取总数（缓存的近似值）
+        total = None
+        if with_total:
+            # 没有名称筛选时直接读取计数存储
+            count_query = count_relationships_query(relation_type, conditions)
+            
+            def count_relations():
+                count_result = Neo4jConnection.run_query(count_query, params)
+                return count_result[0]["total"] if count_result and count_result[0].get("total") is not None else 0
+            
+            total, _ = count_cache.get_or_compute(
+                ("relations", search, relation_type, source_filter, target_filter),
+                count_relations
+            )
         
-        count_result = Neo4jConnection.run_query(count_query, params)
-        total = count_result[0]["total"] if count_result and count_result[0].get("total") is not None else 0
+        # 获取关系列表：每个源节点标签一个分支，按源节点的 sort_key 索引顺序读取，
+        # 截取前 skip + limit + 1 条后在外层合并排序
+        page_conditions = conditions + keyset_page_conditions(
+            ["source.sort_key", "type(r)", "COALESCE(target.sort_key, '')", "id(r)"], after, params
+        )
+        params["branch_limit"] = skip + limit + 1
         
-        # 获取关系列表 - 改进查询以确保返回完整的节点信息
+        def branch(pattern):
+            return (f"MATCH {pattern}-{rel_str}->(target) {where_clause(page_conditions)} "
+                    "RETURN source, r, target "
+                    "ORDER BY source.sort_key, type(r), COALESCE(target.sort_key, ''), id(r) LIMIT $branch_limit")
+        
+        labels = list_labels()
         query = f"""
-        MATCH (source)-[r]->(target)
-        {where_str}
+        {label_union(labels, branch, var="source")}
+        WITH source, r, target,
+             source.sort_key AS source_key,
+             type(r) AS rel_type,
+             COALESCE(target.sort_key, "") AS target_key
         RETURN ID(r) AS id, 
                ID(source) AS source_id, 
                ID(target) AS target_id,
@@ -1094,17 +1610,25 @@ def get_relations():
                target.title AS target_title,
                labels(source)[0] AS source_type,
                labels(target)[0] AS target_type,
-               type(r) AS type, 
-               properties(r) AS properties
-        ORDER BY source_name, type, target_name
+               rel_type AS type, 
+               properties(r) AS properties,
+               source_key,
+               target_key
+        ORDER BY source_key, type, target_key, id
         SKIP $skip
         LIMIT $limit
         """
         
-        result = Neo4jConnection.run_query(query, params)
+        result = (Neo4jConnection.run_query(query, params) or []) if labels else []
+        has_more = len(result) > limit
+        result = result[:limit]
+        next_cursor = None
+        if has_more:
+            last = result[-1]
+            next_cursor = encode_cursor([last["source_key"], last["type"], last["target_key"], last["id"]])
         
         # 计算总页数
-        total_pages = (total + limit - 1) // limit if limit > 0 else 1
+        total_pages = max(1, (total + limit - 1) // limit) if total and limit > 0 else 1
         
         # 处理返回结果
         relations = []
@@ -1152,9 +1676,12 @@ def get_relations():
         
         response_data = {
             "total": total,
+            "total_approximate": with_total,
             "page": page,
             "pages": total_pages,
-            "relations": relations
+            "relations": relations,
+            "next_cursor": next_cursor,
+            "has_more": has_more
         }
         
         return jsonify(response_data)
@@ -1230,6 +1757,7 @@ def get_relation(relation_id):
         }), 200
 
 @app.route('/api/admin/relations', methods=['POST'])
+@invalidates_graph
 def create_relation():
     """创建新关系"""
     try:
@@ -1241,61 +1769,22 @@ def create_relation():
             
         source_node_id = data.get('sourceNodeId')
         target_node_id = data.get('targetNodeId')
-        relation_type = data.get('type', '').strip()
-        properties = data.get('properties', {})
-        
-        # 确保关系类型非空
-        if not relation_type:
-            return jsonify({"error": "关系类型不能为空"}), 400
-        
-        # 检查节点是否存在，使用字符串参数
-        check_query = """
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        RETURN source.name as source_name, target.name as target_name
-        """
+        relation_type = relation_type_names.check(data.get('type'))
+        properties = property_map(data.get('properties'))
         
-        check_result = Neo4jConnection.run_query(check_query, {
-            "source_id": source_node_id,
-            "target_id": target_node_id
-        })
+        # 创建关系并返回两端节点名称，端点不存在时没有结果
+        result = Neo4jConnection.write_transaction(
+            create_relation_tx, source_node_id, target_node_id, relation_type, properties
+        )
         
-        if not check_result or len(check_result) == 0:
+        if result is None:
             return jsonify({"error": "源节点或目标节点不存在"}), 404
         
-        source_name = check_result[0].get("source_name", "未命名")
-        target_name = check_result[0].get("target_name", "未命名")
-            
-        # 创建关系，处理属性
-        props_items = []
-        params = {
-            "source_id": source_node_id,
-            "target_id": target_node_id
-        }
-        
-        for key, value in properties.items():
-            param_key = f"prop_{key}"
-            props_items.append(f"r.{key} = ${param_key}")
-            params[param_key] = value
-        
-        props_str = ', '.join(props_items) if props_items else ''
-        props_clause = f"SET {props_str}" if props_str else ''
-        
-        query = f"""
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        CREATE (source)-[r:{relation_type}]->(target)
-        {props_clause}
-        RETURN ID(r) AS id, type(r) as type
-        """
-        
-        result = Neo4jConnection.run_query(query, params)
-        
-        if not result or len(result) == 0:
-            return jsonify({"error": "创建关系失败"}), 500
-            
-        relation_id = result[0].get("id")
-        relation_type = result[0].get("type")
+        source_name = result.get("source_name", "未命名")
+        target_name = result.get("target_name", "未命名")
+        relation_id = result.get("id")
+        relation_type = result.get("type")
+        graph_stats.relation_created(relation_type)
         
         return jsonify({
             "id": relation_id,
@@ -1307,11 +1796,14 @@ def create_relation():
             "message": "关系创建成功"
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"创建关系时出错: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/relations/<relation_id>', methods=['PUT'])
+@invalidates_graph
 def update_relation(relation_id):
     """更新关系"""
     try:
@@ -1325,80 +1817,28 @@ def update_relation(relation_id):
         source_node_id = data.get('sourceNodeId')
         target_node_id = data.get('targetNodeId')
         relation_type = data.get('type')
-        properties = data.get('properties', {})
         
         if not source_node_id or not target_node_id or not relation_type:
             return jsonify({"error": "源节点、目标节点和关系类型为必填项"}), 400
-            
-        # 检查关系是否存在
-        check_query = """
-        MATCH ()-[r]->()
-        WHERE ID(r) = $relation_id
-        RETURN type(r) AS type
-        """
         
-        check_result = Neo4jConnection.run_query(check_query, {"relation_id": relation_id})
-        
-        if not check_result or len(check_result) == 0:
-            app.logger.warning(f"未找到ID为{relation_id}的关系")
-            return jsonify({"error": "关系不存在"}), 404
+        relation_type = relation_type_names.check(relation_type)
+        properties = property_map(data.get('properties'))
             
-        # 检查节点是否存在，使用字符串参数
-        nodes_query = """
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        RETURN source.name as source_name, target.name as target_name
-        """
-        
-        nodes_result = Neo4jConnection.run_query(nodes_query, {
-            "source_id": source_node_id,
-            "target_id": target_node_id
-        })
-        
-        if not nodes_result or len(nodes_result) == 0:
-            return jsonify({"error": "源节点或目标节点不存在"}), 404
-        
-        source_name = nodes_result[0].get("source_name", "未命名")
-        target_name = nodes_result[0].get("target_name", "未命名")
-        
-        # 删除旧关系
-        delete_query = """
-        MATCH ()-[r]->() WHERE ID(r) = $relation_id
-        DELETE r
-        """
-        
-        Neo4jConnection.run_query(delete_query, {"relation_id": relation_id})
-        
-        # 创建新关系，包含属性
-        props_items = []
-        params = {
-            "source_id": source_node_id,
-            "target_id": target_node_id
-        }
+        # 在一个事务中删除旧关系并创建新关系
+        result, error = Neo4jConnection.write_transaction(
+            replace_relation_tx, relation_id, source_node_id, target_node_id, relation_type, properties
+        )
         
-        for key, value in properties.items():
-            param_key = f"prop_{key}"
-            props_items.append(f"r.{key} = ${param_key}")
-            params[param_key] = value
-        
-        props_str = ', '.join(props_items) if props_items else ''
-        props_clause = f"SET {props_str}" if props_str else ''
-        
-        create_query = f"""
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        CREATE (source)-[r:{relation_type}]->(target)
-        {props_clause}
-        RETURN ID(r) AS id, type(r) as type
-        """
-        
-        result = Neo4jConnection.run_query(create_query, params)
+        if result is None:
+            app.logger.warning(f"更新ID为{relation_id}的关系失败: {error}")
+            return jsonify({"error": error}), 404
         
-        if not result or len(result) == 0:
-            return jsonify({"error": "更新关系失败"}), 500
-            
-        new_relation_id = result[0].get("id")
+        source_name = result.get("source_name", "未命名")
+        target_name = result.get("target_name", "未命名")
+        new_relation_id = result.get("id")
         app.logger.info(f"关系更新成功: {relation_id} -> {new_relation_id}")
+        graph_stats.relation_deleted(result.get("old_type"))
+        graph_stats.relation_created(result.get("type") or relation_type)
         
         return jsonify({
             "id": new_relation_id,
@@ -1410,11 +1850,14 @@ def update_relation(relation_id):
             "message": "关系更新成功"
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"更新关系时出错: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/admin/relations/<relation_id>', methods=['DELETE'])
+@invalidates_graph
 def delete_relation(relation_id):
     """删除关系"""
     try:
@@ -1531,6 +1974,7 @@ def delete_relation(relation_id):
         
         if deleted_count > 0:
             app.logger.info(f"成功删除ID为{relation_id_str}的关系")
+            graph_stats.relation_deleted(relation_type, deleted_count)
             return jsonify({
                 "message": "关系删除成功",
                 "id": relation_id_str,
@@ -1554,116 +1998,67 @@ def stats_page():
     """渲染统计页面"""
     return render_template('stats.html')
 
-@app.route('/api/stats')
-def get_stats():
-    """获取图谱统计数据"""
-    try:
-        # 准备所有需要执行的查询
-        queries = {
-            "node_count": {
-                "query": "MATCH (n) RETURN count(n) as count"
-            },
-            # 修改关系查询，使用更简单的方式
-            "relation_count": {
-                "query": "MATCH p=()-->() RETURN count(p) as count"
-            },
-            "node_types": {
-                "query": """
-                MATCH (n)
-                WITH labels(n)[0] as type, count(n) as count
-                WHERE type IS NOT NULL
-                RETURN type, count
-                ORDER BY count DESC
-                """
-            },
-            "relation_types": {
-                "query": """
-                MATCH ()-[r]->()
-                WITH type(r) as type, count(r) as count
-                RETURN type, count
-                ORDER BY count DESC
-                """
-            }
-        }
-        
-        # 批量执行所有查询
-        results = Neo4jConnection.execute_batch_queries(queries)
-        
-        # 准备返回结果
-        response = {
-            'node_count': 0,
-            'relation_count': 0,
-            'node_types': [],
-            'relation_types': []
-        }
-        
-        # 处理节点总数
-        if results.get("node_count") and results["node_count"]:
-            response['node_count'] = results["node_count"][0]['count']
-        
-        # 处理关系总数
-        if results.get("relation_count") and results["relation_count"]:
-            response['relation_count'] = results["relation_count"][0]['count']
-        
-        # 尝试备用方法获取关系数量
-        if response['relation_count'] == 0 and response['node_count'] > 0:
-            try:
-                # 另一种计算关系数的方法
-                alt_rel_query = "MATCH p=()-[]-() RETURN count(p) as count LIMIT 1"
-                alt_rel_result = Neo4jConnection.run_query(alt_rel_query)
-                if alt_rel_result and alt_rel_result[0]['count'] > 0:
-                    response['relation_count'] = alt_rel_result[0]['count']
-            except Exception as e:
-                logger.warning(f"备用关系计数方法失败: {str(e)}")
-                # 如果有节点但没有关系，可能是数据库问题，用图查询获取的关系数
-                response['relation_count'] = 99
-        
-        # 处理节点类型分布
-        if results.get("node_types") and results["node_types"]:
-            response['node_types'] = [{'type': record['type'], 'count': record['count']} for record in results["node_types"]]
-        
-        # 处理关系类型分布
-        if results.get("relation_types") and results["relation_types"]:
-            response['relation_types'] = [{'type': record['type'], 'count': record['count']} for record in results["relation_types"]]
-        
-        # 添加后备数据
-        if not response['node_types']:
-            response['node_types'] = [{'type': 'Professor', 'count': response['node_count']}]
-        
-        if not response['relation_types'] and response['relation_count'] > 0:
-            response['relation_types'] = [{'type': 'ASSOCIATED_WITH', 'count': response['relation_count']}]
-        
-        # 确保系统中有合理的数据展示
-        if response['node_count'] > 0 and response['relation_count'] == 0:
-            # 基于日志观察，始终存在关系
-            response['relation_count'] = 99
-            if not response['relation_types']:
-                response['relation_types'] = [
-                    {'type': '研究领域', 'count': 30},
-                    {'type': 'その他情報', 'count': 25},
-                    {'type': '共同研究', 'count': 20},
-                    {'type': '教育経歴', 'count': 15},
-                    {'type': '論文発表', 'count': 9}
-                ]
-        
-        logger.info(f"统计数据获取成功: {response['node_count']} 节点, {response['relation_count']} 关系")
-        
-        return jsonify(response)
-    except Exception as e:
-        logger.error(f"获取统计数据时出错: {str(e)}")
-        # 出错时返回从日志观察到的实际数据
-        return jsonify({
-            'node_count': 18451,
-            'relation_count': 99,
-            'node_types': [{'type': 'Professor', 'count': 18451}],
-            'relation_types': [
+# 出错时返回从日志观察到的实际数据
+STATS_FALLBACK = {
+    'node_count': 18451,
+    'relation_count': 99,
+    'node_types': [{'type': 'Professor', 'count': 18451}],
+    'relation_types': [
+        {'type': '研究领域', 'count': 30},
+        {'type': 'その他情報', 'count': 25},
+        {'type': '共同研究', 'count': 20},
+        {'type': '教育経歴', 'count': 15},
+        {'type': '論文発表', 'count': 9}
+    ]
+}
+
+def stats_response(stats):
+    """把 graph_stats.snapshot() 转换为统计接口的响应数据"""
+    if stats is None:
+        raise RuntimeError("无法获取统计数据")
+    
+    # 准备返回结果
+    response = {
+        'node_count': stats['node_count'],
+        'relation_count': stats['relation_count'],
+        'node_types': stats['node_types'],
+        'relation_types': stats['relation_types'],
+        'computed_at': stats['computed_at']
+    }
+    
+    # 添加后备数据
+    if not response['node_types']:
+        response['node_types'] = [{'type': 'Professor', 'count': response['node_count']}]
+    
+    if not response['relation_types'] and response['relation_count'] > 0:
+        response['relation_types'] = [{'type': 'ASSOCIATED_WITH', 'count': response['relation_count']}]
+    
+    # 确保系统中有合理的数据展示
+    if response['node_count'] > 0 and response['relation_count'] == 0:
+        # 基于日志观察，始终存在关系
+        response['relation_count'] = 99
+        if not response['relation_types']:
+            response['relation_types'] = [
                 {'type': '研究领域', 'count': 30},
                 {'type': 'その他情報', 'count': 25},
                 {'type': '共同研究', 'count': 20},
                 {'type': '教育経歴', 'count': 15},
                 {'type': '論文発表', 'count': 9}
             ]
-        })
+    
+    logger.info(f"统计数据获取成功: {response['node_count']} 节点, {response['relation_count']} 关系")
+    return response
+
+@app.route('/api/stats')
+@conditional_get
+def get_stats():
+    """获取图谱统计数据"""
+    try:
+        # 统计数据由 graph_stats 维护，不再每次请求都扫描全图
+        return jsonify(stats_response(graph_stats.snapshot()))
+    except Exception as e:
+        logger.error(f"获取统计数据时出错: {str(e)}")
+        return jsonify(STATS_FALLBACK)
 
 # 错误处理器
 @app.errorhandler(404)
@@ -1689,10 +2084,30 @@ def internal_server_error(e):
         # 网页请求返回HTML
         return render_template('error.html', error_code=500, error_message="服务器内部错误"), 500
 
-# 应用关闭时清理资源
-@app.teardown_appcontext
-def shutdown_session(exception=None):
-    Neo4jConnection.close()
+# 进程退出时清理资源（连接池在请求之间复用，不在每次请求结束时关闭）
+atexit.register(Neo4jConnection.close)
+
+@app.route('/api/_metrics')
+def get_metrics():
+    """查看连接池等运行指标"""
+    try:
+        cache = get_extraction_cache()
+        type_cache = get_type_cache()
+        return jsonify({
+            "neo4j_pool": Neo4jConnection.metrics(),
+            "jobs": job_queue.metrics(),
+            "extraction_cache": cache.metrics() if cache else None,
+            "entity_type_cache": type_cache.metrics() if type_cache else None,
+            "search_index": search_index.metrics(),
+            "schema": schema_manager.metrics(),
+            "autocomplete_index": autocomplete_index.metrics(),
+            "graph_stats": graph_stats.metrics(),
+            "response_cache": response_cache.metrics(),
+            "async_neo4j": app.extensions['async_neo4j'].metrics() if 'async_neo4j' in app.extensions else None
+        })
+    except Exception as e:
+        app.logger.error(f"获取运行指标时出错: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 # 节点管理页面
 @app.route('/nodes')
@@ -1705,6 +2120,64 @@ def node_management():
 def relation_management():
     return render_template('relation_management.html')
 
+def format_search_node(record):
+    """把节点搜索结果转换为前端使用的格式"""
+    node_name = record.get("name")
+    node_title = record.get("title")
+    node_type = record.get("type")
+    
+    # 使用title作为备选名称
+    display_name = node_title or node_name or "未命名"
+    
+    return {
+        "id": record.get("id"),
+        "name": node_name or "",
+        "title": node_title or "",
+        "display_name": display_name,
+        "type": node_type if node_type else "未知类型",
+        "display": f"{display_name} ({node_type})" if node_type else display_name
+    }
+
+# 全文索引按相关度排序，仍然保持 完全匹配 > 前缀匹配 > 包含 的顺序
+SEARCH_FULLTEXT_QUERY = """
+CALL db.index.fulltext.queryNodes($index, $lucene) YIELD node AS n, score
+WITH n, score
+ORDER BY score DESC
+LIMIT $limit * 5
+RETURN id(n) AS id, 
+       n.name AS name, 
+       n.title AS title,
+       labels(n)[0] AS type
+ORDER BY 
+    CASE 
+        WHEN toLower(n.name) = toLower($query) THEN 0
+        WHEN toLower(n.name) STARTS WITH toLower($query) THEN 1
+        ELSE 2
+    END, 
+    score DESC,
+    n.name
+LIMIT $limit
+"""
+
+# 全文索引不可用时的普通查询
+SEARCH_CONTAINS_QUERY = """
+MATCH (n) 
+WHERE toLower(n.name) CONTAINS toLower($query) OR 
+      toLower(coalesce(n.title,'')) CONTAINS toLower($query)
+RETURN id(n) AS id, 
+       n.name AS name, 
+       n.title AS title,
+       labels(n)[0] AS type
+ORDER BY 
+    CASE 
+        WHEN toLower(n.name) = toLower($query) THEN 0
+        WHEN toLower(n.name) STARTS WITH toLower($query) THEN 1
+        ELSE 2
+    END, 
+    n.name
+LIMIT $limit
+"""
+
 @app.route('/api/search/nodes')
 def search_nodes():
     """搜索节点，用于关系管理中选择节点"""
@@ -1715,61 +2188,30 @@ def search_nodes():
         if not query:
             return jsonify({"nodes": []})
         
-        # 构建Neo4j查询
-        cypher_query = """
-        MATCH (n) 
-        WHERE toLower(n.name) CONTAINS toLower($query) OR 
-              toLower(coalesce(n.title,'')) CONTAINS toLower($query)
-        RETURN id(n) AS id, 
-               n.name AS name, 
-               n.title AS title,
-               labels(n)[0] AS type
-        ORDER BY 
-            CASE 
-                WHEN toLower(n.name) = toLower($query) THEN 0
-                WHEN toLower(n.name) STARTS WITH toLower($query) THEN 1
-                ELSE 2
-            END, 
-            n.name
-        LIMIT $limit
-        """
+        # 优先使用内存自动补全索引，构建完成前使用数据库查询
+        if app.config['AUTOCOMPLETE_ENABLED'] and autocomplete_index.ready:
+            return jsonify({"nodes": [format_search_node(node) for node in autocomplete_index.search(query, limit)]})
         
         params = {
             "query": query,
             "limit": limit
         }
         
-        result = Neo4jConnection.run_query(cypher_query, params)
+        result = run_fulltext_query(SEARCH_FULLTEXT_QUERY, query, params)
+        if result is None:
+            result = Neo4jConnection.run_query(SEARCH_CONTAINS_QUERY, params)
         
         if not result:
             return jsonify({"nodes": []})
             
-        nodes = []
-        for record in result:
-            node_id = record.get("id")
-            node_name = record.get("name")
-            node_title = record.get("title")
-            node_type = record.get("type")
-            
-            # 使用title作为备选名称
-            display_name = node_title or node_name or "未命名"
-            
-            nodes.append({
-                "id": node_id,
-                "name": node_name or "",
-                "title": node_title or "",
-                "display_name": display_name,
-                "type": node_type if node_type else "未知类型",
-                "display": f"{display_name} ({node_type})" if node_type else display_name
-            })
-            
-        return jsonify({"nodes": nodes})
+        return jsonify({"nodes": [format_search_node(record) for record in result]})
         
     except Exception as e:
         app.logger.error(f"搜索节点时出错: {str(e)}")
         return jsonify({"error": str(e), "nodes": []}), 200
 
 @app.route('/api/admin/relations/delete-by-nodes', methods=['POST'])
+@invalidates_graph
 def delete_relation_by_nodes():
     """使用源节点ID、目标节点ID和关系类型删除关系，而非依赖关系ID"""
     try:
@@ -1788,31 +2230,12 @@ def delete_relation_by_nodes():
         
         app.logger.info(f"使用Cypher删除关系: 源节点ID={source_id}, 目标节点ID={target_id}, 关系类型={relation_type}")
         
-        # 构建Cypher查询
-        if relation_type:
-            # 如果指定了关系类型，使用它来进一步限制
-            query = """
-            MATCH (source)-[r:`%s`]->(target)
-            WHERE ID(source) = $source_id AND ID(target) = $target_id
-            DELETE r
-            RETURN count(r) as deleted_count
-            """ % relation_type
-            params = {
-                "source_id": int(source_id),
-                "target_id": int(target_id)
-            }
-        else:
-            # 如果未指定关系类型，删除所有关系
-            query = """
-            MATCH (source)-[r]->(target)
-            WHERE ID(source) = $source_id AND ID(target) = $target_id
-            DELETE r
-            RETURN count(r) as deleted_count
-            """
-            params = {
-                "source_id": int(source_id),
-                "target_id": int(target_id)
-            }
+        # 指定了关系类型时只删除该类型的关系，否则删除两个节点之间的所有关系
+        query = delete_relations_between_query(relation_type or None)
+        params = {
+            "source_id": int(source_id),
+            "target_id": int(target_id)
+        }
         
         # 执行删除操作
         result = Neo4jConnection.run_query(query, params)
@@ -1823,6 +2246,9 @@ def delete_relation_by_nodes():
             deleted_count = result[0].get("deleted_count", 0)
         
         app.logger.info(f"删除结果: 成功删除 {deleted_count} 个关系")
+        if deleted_count:
+            # 未指定类型时不知道删除了哪些类型的关系，交给后台校准
+            graph_stats.invalidate()
         
         # 构建响应
         response = {
@@ -1863,12 +2289,7 @@ def get_relation_properties_by_nodes():
         
         app.logger.info(f"获取关系属性: 源节点ID={source_id}, 目标节点ID={target_id}, 关系类型={relation_type}")
         
-        # 构建Cypher查询
-        query = """
-        MATCH (source)-[r:`%s`]->(target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        RETURN properties(r) as properties
-        """ % relation_type
+        query = relation_properties_query(relation_type)
         
         params = {
             "source_id": int(source_id),
@@ -1898,6 +2319,7 @@ def get_relation_properties_by_nodes():
         }), 500
 
 @app.route('/api/admin/relations/save-by-nodes', methods=['POST'])
+@invalidates_graph
 def save_relation_by_nodes():
     """保存关系（创建或更新），基于源节点和目标节点而非ID"""
     try:
@@ -1911,79 +2333,32 @@ def save_relation_by_nodes():
             
         source_id = data.get('sourceNodeId')
         target_id = data.get('targetNodeId')
-        relation_type = data.get('type')
+        relation_type = relation_type_names.check(data.get('type'))
         original_type = data.get('originalType')  # 可能为空，用于区分创建和更新
-        properties = data.get('properties', {})
+        properties = property_map(data.get('properties'))
         
         app.logger.info(f"保存关系: 源节点ID={source_id}, 目标节点ID={target_id}, 关系类型={relation_type}")
         
         # 判断是创建还是更新
         is_update = original_type is not None and original_type != relation_type
         
-        # 首先检查节点是否存在
-        check_query = """
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        RETURN source.name AS source_name, target.name AS target_name
-        """
-        
-        check_result = Neo4jConnection.run_query(check_query, {
-            "source_id": int(source_id),
-            "target_id": int(target_id)
-        })
-        
-        if not check_result or len(check_result) == 0:
-            return jsonify({"error": "源节点或目标节点不存在"}), 404
-        
-        source_name = check_result[0].get("source_name", "未命名")
-        target_name = check_result[0].get("target_name", "未命名")
-        
-        # 如果是更新操作且关系类型变化，需要先删除旧关系
+        # 关系类型变化时先删除旧类型的关系，再创建或合并关系（有属性时替换关系的全部属性），
+        # 在同一条语句中完成并返回两端节点名称
         if is_update:
             app.logger.info(f"检测到关系类型变更: {original_type} -> {relation_type}")
-            
-            delete_query = """
-            MATCH (source)-[r:`%s`]->(target)
-            WHERE ID(source) = $source_id AND ID(target) = $target_id
-            DELETE r
-            """ % original_type
-            
-            Neo4jConnection.run_query(delete_query, {
-                "source_id": int(source_id),
-                "target_id": int(target_id)
-            })
-            
-            app.logger.info(f"已删除旧关系类型: {original_type}")
-        
-        # 构建属性设置部分
-        props_str = ""
-        params = {
-            "source_id": int(source_id),
-            "target_id": int(target_id)
-        }
         
-        if properties:
-            props_items = []
-            for key, value in properties.items():
-                param_name = f"prop_{key}"
-                props_items.append(f"{key}: ${param_name}")
-                params[param_name] = value
-            
-            props_str = " {" + ", ".join(props_items) + "}"
-        
-        # 创建或合并关系
-        merge_query = f"""
-        MATCH (source), (target)
-        WHERE ID(source) = $source_id AND ID(target) = $target_id
-        MERGE (source)-[r:`{relation_type}`]->(target)
-        """
+        result = Neo4jConnection.write_transaction(
+            save_relation_tx, int(source_id), int(target_id), relation_type, properties,
+            original_type if is_update else None
+        )
         
-        # 如果有属性需要设置
-        if props_str:
-            merge_query += f"\nSET r = {props_str}"
+        if result is None:
+            return jsonify({"error": "源节点或目标节点不存在"}), 404
         
-        # 执行查询
-        Neo4jConnection.run_query(merge_query, params)
+        source_name = result.get("source_name", "未命名")
+        target_name = result.get("target_name", "未命名")
+        # MERGE 不一定新建关系，统计数据交给后台校准
+        graph_stats.invalidate()
         
         # 返回成功信息
         action = "更新" if is_update else "创建"
@@ -1994,6 +2369,8 @@ def save_relation_by_nodes():
             "relation_type": relation_type
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"保存关系时出错: {str(e)}")
         return jsonify({"error": f"保存关系时出错: {str(e)}"}), 500
@@ -2058,6 +2435,179 @@ def test_subgraph_api():
 def text2kg():
     return render_template('text2kg.html')
 
+def run_text2kg(text=None, progress=None, paragraphs=None):
+    """文本(或段落流) -> 实体和关系 -> Neo4j 的完整处理流程"""
+    if progress:
+        progress(stage="extracting")
+    
+    # 提取实体和关系
+    entities, relations = extract_entities_and_relations(text, paragraphs=paragraphs, progress=progress)
+    
+    if progress:
+        progress(stage="saving", entities=len(entities), relations=len(relations))
+    
+    # 保存到 Neo4j
+    save_to_neo4j(entities, relations)
+    
+    return {
+        'entities': entities,
+        'relations': relations
+    }
+
+def process_file_job(payload, progress):
+    """后台任务：边读取文件边分块抽取，并上报已处理的页数"""
+    progress(stage="reading", filename=payload['filename'])
+    paragraphs = iter_text_from_file(payload['file_path'], payload['file_type'], progress=progress)
+    return run_text2kg(paragraphs=paragraphs, progress=progress)
+
+def process_text_job(payload, progress):
+    """后台任务：处理文本"""
+    return run_text2kg(payload['text'], progress)
+
+def process_batch_job(payload, progress):
+    """后台任务：多进程解析一批文件，逐个抽取并保存，每个文件的结果独立记录"""
+    files = payload['files']
+    results = list(payload.get('rejected', []))
+    total = len(files)
+    done = 0
+    progress(stage="parsing", total_files=total, files_done=0)
+    
+    for item, text, error in parse_documents(files, app.config['UPLOAD_PARSE_WORKERS']):
+        result = {'filename': item['filename']}
+        if error:
+            result.update(status='failed', stage='parsing', error=error)
+        else:
+            try:
+                data = run_text2kg(text)
+                result.update(
+                    status='succeeded',
+                    entities=len(data['entities']),
+                    relations=len(data['relations'])
+                )
+            except Exception as e:
+                logger.error(f"处理文件失败 {item['filename']}: {str(e)}")
+                result.update(status='failed', stage='extracting', error=str(e))
+        results.append(result)
+        done += 1
+        progress(stage="processing", total_files=total, files_done=done,
+                 files_failed=sum(1 for r in results if r['status'] == 'failed'))
+    
+    return {
+        'files': results,
+        'succeeded': sum(1 for r in results if r['status'] == 'succeeded'),
+        'failed': sum(1 for r in results if r['status'] != 'succeeded')
+    }
+
+def run_bulk_import(file_path, fmt, progress=None):
+    """批量导入实体和三元组文件，完成后更新索引、统计和缓存"""
+    driver = Neo4jConnection.get_driver()
+    if not driver:
+        raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
+    
+    importer = BulkImporter(
+        driver,
+        partitions=app.config['IMPORT_PARTITIONS'],
+        batch_size=app.config['IMPORT_BATCH_SIZE'],
+        buffer_rows=app.config['IMPORT_BUFFER_ROWS'],
+        progress=progress,
+        on_flush=update_autocomplete_names
+    )
+    try:
+        with open_import_file(file_path) as stream:
+            return importer.run(read_rows(stream, fmt))
+    finally:
+        # 中途失败时已写入的数据同样需要反映到索引和统计中
+        if importer.stats['nodes_created'] or importer.stats['relationships_created']:
+            ensure_label_indexes("Entity")
+            graph_stats.node_created("Entity", importer.stats['nodes_created'])
+            graph_stats.relation_created("RELATION", importer.stats['relationships_created'])
+        if importer.stats['statements']:
+            mark_graph_changed()
+
+def discard_upload(file_path):
+    """删除处理完的上传文件"""
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        logger.warning(f"删除上传文件失败 {file_path}: {str(e)}")
+
+def process_import_job(payload, progress):
+    """后台任务：批量导入实体和三元组，完成或失败后删除上传的文件"""
+    progress(stage="reading", filename=payload['filename'])
+    try:
+        return run_bulk_import(payload['file_path'], payload['format'], progress)
+    finally:
+        discard_upload(payload['file_path'])
+
+def create_job_queue():
+    """根据配置创建后台任务队列"""
+    if app.config['JOB_BACKEND'] == 'memory':
+        store = MemoryJobStore()
+    else:
+        store = SQLiteJobStore(app.config['JOB_DB_PATH'])
+    
+    queue = JobQueue(
+        store,
+        max_workers=app.config['JOB_MAX_WORKERS'],
+        max_pending=app.config['JOB_MAX_PENDING'],
+        lease=app.config['JOB_LEASE_TIMEOUT']
+    )
+    queue.register('file', process_file_job)
+    queue.register('text', process_text_job)
+    queue.register('batch', process_batch_job)
+    queue.register('import', process_import_job)
+    return queue
+
+job_queue = create_job_queue()
+atexit.register(job_queue.shutdown)
+
+_job_recovery_started = False
+_job_recovery_lock = threading.Lock()
+
+def start_job_recovery():
+    """
+    在服务进程中接管未完成的任务(幂等)
+
+    导入 app_final 时不恢复任务：Werkzeug 重载器的父进程、flask CLI 命令等不处理请求的进程
+    不会重复执行任务。服务进程在启动时或收到第一个请求时调用；多个工作进程同时调用时，
+    任务按心跳租约接管，同一个任务只会被一个进程执行。
+    """
+    global _job_recovery_started
+    with _job_recovery_lock:
+        if _job_recovery_started:
+            return
+        _job_recovery_started = True
+    try:
+        job_queue.recover()
+    except Exception as e:
+        logger.warning(f"恢复未完成的任务失败: {str(e)}")
+
+@app.before_request
+def recover_jobs_on_first_request():
+    if not _job_recovery_started:
+        start_job_recovery()
+
+def wants_async():
+    """请求是否要求以后台任务方式处理"""
+    flag = request.args.get('async') or request.form.get('async')
+    if flag is None and request.is_json:
+        flag = (request.get_json(silent=True) or {}).get('async')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def job_view(job):
+    """任务信息（不返回原始输入内容）"""
+    view = {key: value for key, value in job.items() if key != 'payload'}
+    view['status_url'] = f"/api/jobs/{job['id']}"
+    return view
+
+def submit_job(kind, payload):
+    """提交后台任务并返回 202 响应"""
+    try:
+        job_id = job_queue.submit(kind, payload)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify(job_view(job_queue.get(job_id))), 202
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -2074,22 +2624,110 @@ def upload_file():
         
         # 提取文本
         file_type = filename.rsplit('.', 1)[1].lower()
-        text = extract_text_from_file(file_path, file_type)
         
-        # 提取实体和关系
-        entities, relations = extract_entities_and_relations(text)
-        
-        # 保存到 Neo4j
-        save_to_neo4j(entities, relations)
+        # 后台处理：立即返回任务ID
+        if wants_async():
+            return submit_job('file', {
+                'filename': filename,
+                'file_path': file_path,
+                'file_type': file_type
+            })
         
-        # 返回结果
-        return jsonify({
-            'entities': entities,
-            'relations': relations
-        })
+        # 逐段读取文件，提取实体和关系并保存到 Neo4j
+        paragraphs = iter_text_from_file(file_path, file_type)
+        return jsonify(run_text2kg(paragraphs=paragraphs))
     
     return jsonify({'error': '不支持的文件类型'}), 400
 
+def unique_path(directory, filename):
+    """在目录中为文件名生成不重复的路径"""
+    base, ext = os.path.splitext(filename)
+    path = os.path.join(directory, filename)
+    index = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{base}_{index}{ext}")
+        index += 1
+    return path
+
+def extract_archive(archive, directory, max_files, max_bytes):
+    """解压zip中支持的文件类型，返回 (已解压文件列表, 被拒绝的文件列表)"""
+    accepted, rejected = [], []
+    total_bytes = 0
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            # 只使用文件名部分，防止路径穿越
+            filename = secure_filename(os.path.basename(info.filename))
+            if not filename or not allowed_file(filename):
+                rejected.append({'filename': info.filename, 'status': 'skipped', 'error': '不支持的文件类型'})
+                continue
+            if len(accepted) >= max_files:
+                rejected.append({'filename': info.filename, 'status': 'skipped', 'error': '文件数量超过上限'})
+                continue
+            total_bytes += info.file_size
+            if total_bytes > max_bytes:
+                rejected.append({'filename': info.filename, 'status': 'skipped', 'error': '压缩包解压后体积超过上限'})
+                continue
+            file_path = unique_path(directory, filename)
+            with zf.open(info) as src, open(file_path, 'wb') as dst:
+                while True:
+                    block = src.read(1024 * 1024)
+                    if not block:
+                        break
+                    dst.write(block)
+            accepted.append({
+                'filename': info.filename,
+                'file_path': file_path,
+                'file_type': filename.rsplit('.', 1)[1].lower()
+            })
+    return accepted, rejected
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    """批量上传：接受多个文件或zip压缩包，由后台任务用进程池解析"""
+    uploads = request.files.getlist('files') + request.files.getlist('file')
+    uploads = [f for f in uploads if f and f.filename]
+    if not uploads:
+        return jsonify({'error': '没有文件被上传'}), 400
+    
+    max_files = app.config['UPLOAD_MAX_FILES']
+    batch_dir = os.path.join(app.config['UPLOAD_FOLDER'], f"batch_{uuid.uuid4().hex}")
+    os.makedirs(batch_dir, exist_ok=True)
+    
+    files, rejected = [], []
+    for upload in uploads:
+        filename = secure_filename(upload.filename)
+        if filename.lower().endswith('.zip'):
+            try:
+                accepted, skipped = extract_archive(
+                    upload.stream, batch_dir,
+                    max_files - len(files),
+                    app.config['UPLOAD_MAX_ARCHIVE_BYTES']
+                )
+                files.extend(accepted)
+                rejected.extend(skipped)
+            except zipfile.BadZipFile:
+                rejected.append({'filename': upload.filename, 'status': 'skipped', 'error': '无效的zip文件'})
+        elif filename and allowed_file(filename):
+            if len(files) >= max_files:
+                rejected.append({'filename': upload.filename, 'status': 'skipped', 'error': '文件数量超过上限'})
+                continue
+            file_path = unique_path(batch_dir, filename)
+            upload.save(file_path)
+            files.append({
+                'filename': upload.filename,
+                'file_path': file_path,
+                'file_type': filename.rsplit('.', 1)[1].lower()
+            })
+        else:
+            rejected.append({'filename': upload.filename, 'status': 'skipped', 'error': '不支持的文件类型'})
+    
+    if not files:
+        return jsonify({'error': '没有可处理的文件', 'files': rejected}), 400
+    
+    return submit_job('batch', {'files': files, 'rejected': rejected})
+
 @app.route('/process_text', methods=['POST'])
 def process_text():
     try:
@@ -2101,20 +2739,60 @@ def process_text():
         if not text.strip():
             return jsonify({'error': '文本内容为空'}), 400
         
-        # 提取实体和关系
-        entities, relations = extract_entities_and_relations(text)
+        # 后台处理：立即返回任务ID
+        if wants_async():
+            return submit_job('text', {'text': text})
         
-        # 保存到 Neo4j
-        save_to_neo4j(entities, relations)
-        
-        # 返回结果
-        return jsonify({
-            'entities': entities,
-            'relations': relations
-        })
+        # 提取实体和关系并保存到 Neo4j
+        return jsonify(run_text2kg(text))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs')
+def list_jobs():
+    """列出最近的后台任务"""
+    status = request.args.get('status') or None
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    jobs = job_queue.list(status=status, limit=limit)
+    return jsonify({"jobs": [job_view(job) for job in jobs]})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """查询后台任务状态"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "任务不存在", "id": job_id}), 404
+    return jsonify(job_view(job))
+
+@app.route('/api/jobs/<job_id>/events')
+def stream_job(job_id):
+    """以 Server-Sent Events 推送任务状态，直到任务结束"""
+    if not job_queue.get(job_id):
+        return jsonify({"error": "任务不存在", "id": job_id}), 404
+    
+    interval = app.config['JOB_POLL_INTERVAL']
+    
+    def generate():
+        last = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                break
+            view = job_view(job)
+            # 任务结束前只推送进度，结果在结束事件中返回
+            if job['status'] not in FINISHED_STATES:
+                view.pop('result', None)
+            data = json.dumps(view, ensure_ascii=False)
+            if data != last:
+                yield f"data: {data}\n\n"
+                last = data
+            if job['status'] in FINISHED_STATES:
+                break
+            time.sleep(interval)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 @app.route('/save_to_neo4j', methods=['POST'])
 def save_to_neo4j_endpoint():
     try:
@@ -2132,11 +2810,218 @@ def save_to_neo4j_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/import', methods=['POST'])
+def import_graph():
+    """
+    批量导入实体和三元组（NDJSON 或 CSV，可gzip压缩）
+
+    表单字段:
+        file: 导入文件，按扩展名判断格式（.csv / .csv.gz 为CSV，其余为NDJSON）
+        format: 可选，显式指定 ndjson 或 csv
+        async: 为真时以后台任务方式导入，通过 /api/jobs/<id> 查看进度
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': '没有文件被上传'}), 400
+    
+    fmt = request.form.get('format') or request.args.get('format') or detect_format(file.filename)
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': f'不支持的导入格式: {fmt}'}), 400
+    
+    filename = secure_filename(file.filename) or f"import.{fmt}"
+    import_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'imports')
+    os.makedirs(import_dir, exist_ok=True)
+    file_path = unique_path(import_dir, filename)
+    file.save(file_path)
+    
+    if wants_async():
+        return submit_job('import', {
+            'filename': filename,
+            'file_path': file_path,
+            'format': fmt
+        })
+    
+    try:
+        return jsonify(run_bulk_import(file_path, fmt))
+    except Exception as e:
+        logger.error(f"批量导入时出错: {str(e)}")
+        return jsonify({'error': f'批量导入时出错: {str(e)}'}), 500
+    finally:
+        discard_upload(file_path)
+
+@app.cli.command('import-graph')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default=None,
+              help='导入格式，默认按扩展名判断')
+@click.option('--partitions', type=int, default=None, help='并行写入的分区数')
+@click.option('--batch-size', type=int, default=None, help='每条 UNWIND 语句的行数')
+def import_graph_command(path, fmt, partitions, batch_size):
+    """批量导入实体和三元组文件（NDJSON 或 CSV，可gzip压缩）"""
+    if partitions:
+        app.config['IMPORT_PARTITIONS'] = partitions
+    if batch_size:
+        app.config['IMPORT_BATCH_SIZE'] = batch_size
+    
+    def progress(**info):
+        click.echo(
+            f"已读取 {info['rows_read']} 行 (无效 {info['invalid']}), "
+            f"新建 {info['nodes_created']} 个节点 / {info['relationships_created']} 个关系, "
+            f"{info['rows_per_second']} 行/秒",
+            err=True
+        )
+    
+    result = run_bulk_import(path, fmt or detect_format(path), progress)
+    for error in result['errors']:
+        click.echo(f"第 {error['line']} 行: {error['error']}", err=True)
+    click.echo(
+        f"导入完成: 读取 {result['rows_read']} 行, 实体 {result['entities']}, 关系 {result['relations']}, "
+        f"无效 {result['invalid']}, 用时 {result['elapsed_seconds']} 秒",
+        err=True
+    )
+
+@app.cli.command('merge-unknown-entities')
+@click.option('--dry-run', is_flag=True, help='只统计，不修改数据')
+def merge_unknown_entities_command(dry_run):
+    """一次性迁移：把与带类型节点同名的 "Unknown" 节点合并到该节点上"""
+    try:
+        result = merge_unknown_duplicates(Neo4jConnection.run_query, dry_run=dry_run)
+    except Exception as e:
+        raise click.ClickException(f"合并重复节点失败: {str(e)}")
+    click.echo(
+        f"可合并 {result['mergeable']} 个节点 (共 {result['relationships']} 个关系), "
+        f"有多个同名类型而跳过 {result['ambiguous']} 个",
+        err=True
+    )
+    if 'merged' in result:
+        click.echo(f"已合并 {result['merged']} 个节点, 移动 {result['moved']} 个关系", err=True)
+        graph_stats.reconcile()
+        mark_graph_changed()
+
+@app.route('/api/admin/schema')
+def get_schema_status():
+    """查看索引和约束的状态、索引填充进度以及热点查询的执行计划检查结果"""
+    try:
+        status = schema_manager.status()
+        status["plan_warnings"] = schema_manager.plan_warnings
+        return jsonify(status)
+    except Exception as e:
+        app.logger.error(f"获取索引状态时出错: {str(e)}")
+        return jsonify({"error": f"获取索引状态时出错: {str(e)}"}), 500
+
+@app.cli.group('schema')
+def schema_command():
+    """管理Neo4j索引和约束"""
+
+@schema_command.command('apply')
+@click.option('--wait/--no-wait', default=True, help='等待索引填充完成')
+def schema_apply_command(wait):
+    """创建缺少的索引和约束，并为已有节点补充排序键（可重复执行）"""
+    results = schema_manager.apply()
+    if results is None:
+        raise click.ClickException(f"无法创建索引和约束: {schema_manager.last_error}")
+    for item in results:
+        line = f"{item['status']:8} {item['kind']:10} {item['name']}"
+        if item.get('error'):
+            line += f"  ({item['error']})"
+        click.echo(line)
+    updated = schema_manager.backfill_sort_keys()
+    if updated is None:
+        raise click.ClickException(f"补充节点排序键失败: {schema_manager.last_error}")
+    click.echo(f"已为 {updated} 个节点补充排序键", err=True)
+    if wait:
+        schema_manager.await_indexes(app.config['SCHEMA_AWAIT_TIMEOUT'])
+    if any(item['status'] == 'failed' for item in results):
+        raise click.ClickException("部分索引或约束创建失败")
+
+@schema_command.command('status')
+def schema_status_command():
+    """显示索引状态和填充进度"""
+    status = schema_manager.status()
+    for index in status['indexes']:
+        click.echo(
+            f"{index['state']:10} {index['population_percent']:6.1f}%  {index['type']:8} "
+            f"{index['name']}  {index['entity']} {index['properties']}"
+        )
+    for constraint in status['constraints']:
+        click.echo(f"{'CONSTRAINT':10} {'':7}  {constraint['type']:8} {constraint['name']}")
+    if status['missing']:
+        click.echo(f"缺少: {', '.join(status['missing'])}", err=True)
+
+@schema_command.command('check')
+def schema_check_command():
+    """用 EXPLAIN 检查热点查询是否使用了索引"""
+    warnings = schema_manager.check_plans(HOT_QUERIES)
+    for name in HOT_QUERIES:
+        if name in warnings:
+            click.echo(f"SCAN  {name}  {', '.join(warnings[name])}")
+        else:
+            click.echo(f"OK    {name}")
+    if warnings:
+        raise click.ClickException("部分热点查询的执行计划使用了扫描")
+
+@app.route('/api/admin/export')
+def export_graph():
+    """
+    以NDJSON流式导出整个图谱：先输出全部节点，再输出全部关系，最后一行为汇总
+
+    查询参数:
+        format: ndjson（默认）或 ndjson.gz
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'ndjson.gz'):
+        return jsonify({"error": f"不支持的导出格式: {export_format}"}), 400
+    compress = export_format == 'ndjson.gz'
+    
+    filename = time.strftime('graph-%Y%m%d-%H%M%S.') + export_format
+    app.logger.info(f"开始导出图谱: {filename}")
+    chunks = iter_export(
+        Neo4jConnection.get_pool().session,
+        compress=compress,
+        fetch_size=app.config['EXPORT_FETCH_SIZE']
+    )
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-cache'
+        }
+    )
+
+@app.cli.command('export-graph')
+@click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--gzip', 'compress', is_flag=True, default=None, help='使用gzip压缩（输出文件名以 .gz 结尾时默认压缩）')
+def export_graph_command(output, compress):
+    """把整个图谱导出为NDJSON文件，OUTPUT 为 - 时写到标准输出"""
+    if compress is None:
+        compress = output.endswith('.gz')
+    counts = {}
+    started = time.time()
+    chunks = iter_export(
+        Neo4jConnection.get_pool().session,
+        compress=compress,
+        fetch_size=app.config['EXPORT_FETCH_SIZE'],
+        counts=counts
+    )
+    with click.open_file(output, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    if counts.get('error'):
+        raise click.ClickException(f"导出未完成: {counts['error']}")
+    click.echo(
+        f"导出完成: {counts.get('nodes', 0)} 个节点, {counts.get('relationships', 0)} 个关系, "
+        f"用时 {round(time.time() - started, 2)} 秒",
+        err=True
+    )
+
 
 
 if __name__ == '__main__':
     # 确保上传目录存在
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    # 开启重载器时只在实际处理请求的子进程中恢复任务
+    if not app.config['DEBUG'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_recovery()
     app.run(
         debug=app.config['DEBUG'],
         host=app.config['HOST'],
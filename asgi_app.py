@@ -0,0 +1,251 @@
+"""
+ASGI 入口，用于高并发的只读访问:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+/api/graph、/api/graph/subgraph/<id>、/api/search/nodes、/api/stats 在事件循环中
+使用 neo4j 异步驱动执行，一个进程可以同时处理数百个图谱读请求，不再受工作线程数限制；
+其他请求（页面、管理接口、上传等）交给 Flask 应用在线程池中处理。
+
+异步接口与同步视图共用 app_final 中的查询选择、参数解析、响应格式、
+ETag/响应缓存设置以及 before_request/after_request 钩子，返回的内容与同步模式一致。
+"""
+import asyncio
+import logging
+from flask import Response, g, jsonify, request
+from app_final import (
+    app as flask_app, response_cache, make_conditional, mark_degraded, graph_stats, autocomplete_index, format_search_node,
+    fulltext_query_params, fulltext_query_failed, graph_queries, graph_response,
+    parse_subgraph_args, subgraph_response, stats_response, start_job_recovery, STATS_FALLBACK,
+    SUBGRAPH_CENTER_QUERY, SEARCH_FULLTEXT_QUERY, SEARCH_CONTAINS_QUERY
+)
+from backend.utils.asgi import WsgiBridge, build_environ, read_body, response_start
+from backend.utils.async_neo4j import AsyncNeo4jClient
+from backend.utils.graph_traversal import async_bounded_bfs
+
+logger = logging.getLogger(__name__)
+
+neo4j_client = AsyncNeo4jClient(
+    flask_app.config['NEO4J_URI'],
+    flask_app.config['NEO4J_USER'],
+    flask_app.config['NEO4J_PASSWORD'],
+    max_pool_size=flask_app.config['NEO4J_ASYNC_MAX_POOL_SIZE'],
+    acquisition_timeout=flask_app.config['NEO4J_POOL_ACQUIRE_TIMEOUT'],
+    on_error=mark_degraded
+)
+# /api/_metrics 通过 app.extensions 读取异步驱动的使用情况
+flask_app.extensions['async_neo4j'] = neo4j_client
+
+wsgi_bridge = WsgiBridge(flask_app.wsgi_app, max_workers=flask_app.config['ASGI_WSGI_THREADS'])
+
+
+async def run_fulltext_query(query, text, params):
+    """app_final.run_fulltext_query 的异步版本"""
+    params = fulltext_query_params(text, params)
+    if params is None:
+        return None
+    try:
+        return await neo4j_client.run_query(query, params, raise_errors=True)
+    except Exception as e:
+        fulltext_query_failed(e, params['index'])
+        return None
+
+
+async def get_graph():
+    """获取图谱数据用于可视化"""
+    try:
+        search = request.args.get('search', '')
+        relation = request.args.get('relation', '')
+        limit = int(request.args.get('limit', 100))
+        columnar = request.args.get('format', '') == 'columnar'
+
+        fulltext_query, query, params = graph_queries(search, relation, limit)
+
+        records = await run_fulltext_query(fulltext_query, search, params) if fulltext_query else None
+        if records is None:
+            records = await neo4j_client.run_query(query, params)
+
+        data, status = graph_response(records, limit, columnar)
+        return jsonify(data), status
+
+    except ValueError as e:
+        logger.error(f"参数错误: {str(e)}")
+        return jsonify({"error": f"参数错误: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"获取图谱数据时出错: {str(e)}")
+        return jsonify({"error": f"获取图谱数据时出错: {str(e)}"}), 500
+
+
+async def get_node_subgraph(node_id):
+    """获取以特定节点为中心的子图"""
+    try:
+        try:
+            options = parse_subgraph_args(request.args)
+        except ValueError:
+            flask_app.logger.warning(f"请求的参数格式错误: depth={request.args.get('depth')}, limit={request.args.get('limit')}")
+            return jsonify({"error": "参数格式错误"}), 400
+
+        check_result = await neo4j_client.run_query(SUBGRAPH_CENTER_QUERY, {"node_id": node_id})
+        if not check_result:
+            flask_app.logger.warning(f"节点ID={node_id}不存在")
+            return jsonify({
+                "error": "节点不存在",
+                "node_id": node_id
+            }), 404
+
+        subgraph = await async_bounded_bfs(neo4j_client.run_query, node_id, check_result[0]["n"], **options)
+
+        return jsonify(subgraph_response(node_id, subgraph, options))
+    except Exception as e:
+        flask_app.logger.error(f"获取子图数据时出错: {str(e)}", exc_info=True)
+        return jsonify({
+            "error": f"获取子图数据时出错: {str(e)}",
+            "node_id": node_id
+        }), 500
+
+
+async def search_nodes():
+    """搜索节点，用于关系管理中选择节点"""
+    try:
+        query = request.args.get('query', '')
+        limit = int(request.args.get('limit', 10))
+
+        if not query:
+            return jsonify({"nodes": []})
+
+        if flask_app.config['AUTOCOMPLETE_ENABLED'] and autocomplete_index.ready:
+            return jsonify({"nodes": [format_search_node(node) for node in autocomplete_index.search(query, limit)]})
+
+        params = {
+            "query": query,
+            "limit": limit
+        }
+
+        result = await run_fulltext_query(SEARCH_FULLTEXT_QUERY, query, params)
+        if result is None:
+            result = await neo4j_client.run_query(SEARCH_CONTAINS_QUERY, params)
+
+        if not result:
+            return jsonify({"nodes": []})
+
+        return jsonify({"nodes": [format_search_node(record) for record in result]})
+
+    except Exception as e:
+        flask_app.logger.error(f"搜索节点时出错: {str(e)}")
+        return jsonify({"error": str(e), "nodes": []}), 200
+
+
+async def get_stats():
+    """获取图谱统计数据"""
+    try:
+        # 统计数据尚未计算时，首次计算的查询放到线程中执行，不阻塞事件循环
+        if graph_stats.reconciled_at is None:
+            stats = await asyncio.to_thread(graph_stats.snapshot)
+        else:
+            stats = graph_stats.snapshot()
+        return jsonify(stats_response(stats))
+    except Exception as e:
+        logger.error(f"获取统计数据时出错: {str(e)}")
+        return jsonify(STATS_FALLBACK)
+
+
+# Flask 端点名 -> 异步视图
+ASYNC_VIEWS = {
+    "get_graph": get_graph,
+    "get_node_subgraph": get_node_subgraph,
+    "search_nodes": search_nodes,
+    "get_stats": get_stats
+}
+
+
+def cache_lookup(cache_name, parts):
+    """返回 (缓存键, 缓存的响应)"""
+    key = response_cache.key(cache_name, parts)
+    return key, response_cache.get(key)
+
+
+async def dispatch(endpoint, view_args):
+    """按同步视图上 conditional_get / cached_response 的设置执行异步视图"""
+    view = flask_app.view_functions[endpoint]
+    parts = list(request.args.items(multi=True)) + list(view_args.items())
+
+    cache_name = getattr(view, "cache_name", None)
+    key = None
+    response = None
+    if cache_name is not None and response_cache.enabled:
+        # 读取版本号和缓存可能访问SQLite（加锁时会等待），放到线程中执行，不阻塞事件循环上的其他请求
+        key, cached = await asyncio.to_thread(cache_lookup, cache_name, parts)
+        if cached is not None:
+            response = Response(cached["body"], status=200, mimetype=cached["mimetype"])
+            response.headers["X-Cache"] = "HIT"
+
+    if response is None:
+        response = flask_app.make_response(await ASYNC_VIEWS[endpoint](**view_args))
+        if key is not None:
+            # 与 cached_response 相同：查询出错后返回的降级结果不写入缓存
+            if response.status_code == 200 and not g.get("degraded"):
+                await asyncio.to_thread(response_cache.set, key, {
+                    "body": response.get_data(as_text=True), "mimetype": response.mimetype
+                })
+            response.headers["X-Cache"] = "MISS"
+
+    if getattr(view, "conditional", False):
+        response = make_conditional(response)
+    return response
+
+
+async def send_response(send, response):
+    await send(response_start(response.status_code, response.headers.items()))
+    await send({"type": "http.response.body", "body": response.get_data(), "more_body": False})
+
+
+async def handle_http(scope, receive, send):
+    body = await read_body(receive)
+    environ = build_environ(scope, body)
+
+    if scope["method"] == "GET":
+        ctx = flask_app.request_context(environ)
+        ctx.push()
+        try:
+            rule = request.url_rule
+            if request.routing_exception is None and rule is not None and rule.endpoint in ASYNC_VIEWS:
+                # 与 Flask 的 full_dispatch_request 相同：执行钩子，异常交给错误处理器
+                try:
+                    rv = flask_app.preprocess_request()
+                    if rv is None:
+                        rv = await dispatch(rule.endpoint, request.view_args or {})
+                except Exception as e:
+                    rv = flask_app.handle_user_exception(e)
+                await send_response(send, flask_app.finalize_request(rv))
+                return
+        finally:
+            ctx.pop()
+
+    await wsgi_bridge(environ, send)
+
+
+async def handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await asyncio.to_thread(start_job_recovery)
+            logger.info("ASGI服务已启动")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await neo4j_client.close()
+            wsgi_bridge.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app_asgi(scope, receive, send):
+    if scope["type"] == "http":
+        await handle_http(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await handle_lifespan(receive, send)
+    else:
+        raise RuntimeError(f"不支持的ASGI连接类型: {scope['type']}")
+
+
+# uvicorn asgi_app:app
+app = app_asgi
@@ -0,0 +1,153 @@
+import sys
+import asyncio
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 请求体超过该大小时写入临时文件，避免大文件上传占用内存
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+async def read_body(receive):
+    """读取ASGI请求体，返回可供 wsgi.input 使用的文件对象"""
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body.write(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body.seek(0)
+    return body
+
+
+def build_environ(scope, body):
+    """按WSGI规范由ASGI的 scope 构造 environ"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def response_start(status, headers):
+    return {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), str(value).encode("latin-1")) for name, value in headers]
+    }
+
+
+class WsgiBridge:
+    """
+    在线程池中运行WSGI应用，把响应转发给ASGI服务器
+
+    每个请求从调用应用到迭代完响应都在同一个线程中执行（Flask 的
+    stream_with_context 依赖这一点），响应块通过有界队列交给事件循环，
+    客户端读取慢时工作线程会等待，流式响应不会在内存中堆积。
+    """
+
+    def __init__(self, wsgi_app, max_workers=32, queue_size=8):
+        self.wsgi_app = wsgi_app
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, environ, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+
+        def put(item):
+            if cancelled.is_set():
+                raise ConnectionAbortedError("客户端已断开连接")
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def run():
+            state = {}
+
+            def start_response(status, headers, exc_info=None):
+                if exc_info and state.get("sent"):
+                    raise exc_info[1].with_traceback(exc_info[2])
+                state["status"] = int(status.split(" ", 1)[0])
+                state["headers"] = headers
+                return lambda data: put(("body", data))
+
+            def ensure_started():
+                if not state.get("sent"):
+                    state["sent"] = True
+                    put(("start", response_start(state["status"], state["headers"])))
+
+            try:
+                result = self.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk:
+                            ensure_started()
+                            put(("body", chunk))
+                    ensure_started()
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+                put(("end", None))
+            except ConnectionAbortedError:
+                pass
+            except Exception as e:
+                logger.error(f"WSGI应用处理请求时出错: {str(e)}", exc_info=True)
+                if not cancelled.is_set():
+                    put(("error", state.get("sent", False)))
+
+        future = loop.run_in_executor(self.executor, run)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "start":
+                    await send(value)
+                elif kind == "body":
+                    await send({"type": "http.response.body", "body": value, "more_body": True})
+                elif kind == "end":
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                else:
+                    # 响应头还没发送时返回500，否则只能结束响应
+                    if not value:
+                        await send(response_start(500, [("Content-Type", "text/plain; charset=utf-8")]))
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+        finally:
+            cancelled.set()
+            # 取出队列中剩余的数据，让等待写入的工作线程退出
+            while not queue.empty():
+                queue.get_nowait()
+        await future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from neo4j import AsyncGraphDatabase, Query, exceptions
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNeo4jClient:
+    """
+    异步Neo4j查询客户端，供ASGI模式下的只读接口使用
+
+    查询语义与 Neo4jConnection.run_query 一致：无法连接数据库时返回 None，
+    连接错误时重试，其他错误默认返回空列表，raise_errors=True 时抛出异常；
+    返回 None 或空列表前调用 on_error()（ASGI 模式下标记响应不写入缓存）。
+    驱动在第一次查询时创建并验证连接，必须在同一个事件循环中使用。
+    """
+
+    def __init__(self, uri, user, password, max_pool_size=100, acquisition_timeout=60,
+                 max_connection_lifetime=300, max_retries=3, on_error=None):
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.max_pool_size = max_pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.max_retries = max_retries
+        self.on_error = on_error
+        self._driver = None
+        self._lock = asyncio.Lock()
+
+        # 使用统计
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._queries = 0
+        self._errors = 0
+
+    async def get_driver(self):
+        """获取驱动(懒加载，创建时验证一次连接，带重试)，无法连接时返回 None"""
+        if self._driver is not None:
+            return self._driver
+
+        async with self._lock:
+            if self._driver is not None:
+                return self._driver
+
+            retries = 0
+            while retries < self.max_retries:
+                driver = AsyncGraphDatabase.driver(
+                    self.uri,
+                    auth=(self.user, self.password),
+                    max_connection_pool_size=self.max_pool_size,
+                    connection_acquisition_timeout=self.acquisition_timeout,
+                    max_connection_lifetime=self.max_connection_lifetime
+                )
+                try:
+                    await driver.verify_connectivity()
+                except exceptions.ServiceUnavailable as e:
+                    await driver.close()
+                    retries += 1
+                    if retries >= self.max_retries:
+                        logger.error(f"异步驱动无法连接到Neo4j数据库 (尝试 {retries}/{self.max_retries}): {str(e)}")
+                    else:
+                        logger.warning(f"异步驱动连接Neo4j失败，正在重试 ({retries}/{self.max_retries})...")
+                        await asyncio.sleep(1)
+                    continue
+                except Exception as e:
+                    await driver.close()
+                    logger.error(f"异步驱动连接Neo4j数据库时出错: {str(e)}")
+                    break
+                self._driver = driver
+                logger.info(f"已创建异步Neo4j驱动 (连接池大小: {self.max_pool_size})")
+                break
+        return self._driver
+
+    async def _reset(self):
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            try:
+                await driver.close()
+            except Exception as e:
+                logger.warning(f"关闭异步Neo4j驱动时出错: {str(e)}")
+
+    def _failed(self):
+        self._errors += 1
+        if self.on_error is not None:
+            self.on_error()
+
+    async def run_query(self, query, params=None, raise_errors=False, timeout=None):
+        """执行查询并返回记录列表"""
+        self._queries += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            return await self._run(query, params, raise_errors, timeout)
+        finally:
+            self._in_flight -= 1
+
+    async def _run(self, query, params, raise_errors, timeout):
+        retries = 0
+        last_error = None
+        while retries < self.max_retries:
+            driver = await self.get_driver()
+            if driver is None:
+                if raise_errors:
+                    raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
+                self._failed()
+                return None
+
+            try:
+                async with driver.session() as session:
+                    statement = Query(query, timeout=timeout) if timeout else query
+                    result = await session.run(statement, params or {})
+                    return [record async for record in result]
+            except (exceptions.ServiceUnavailable, exceptions.SessionExpired) as e:
+                # 驱动由所有协程共享，不在这里关闭（会中断其他请求的会话），失效的连接由驱动的连接池替换
+                last_error = e
+                retries += 1
+                logger.warning(f"异步查询执行失败，正在重试 ({retries}/{self.max_retries}): {str(e)}")
+                if retries < self.max_retries:
+                    await asyncio.sleep(1)
+            except Exception as e:
+                if raise_errors:
+                    self._errors += 1
+                    raise
+                logger.error(f"执行异步查询时出错: {str(e)}, 查询: {query}")
+                self._failed()
+                return []
+
+        logger.error(f"异步查询重试失败 ({retries}/{self.max_retries}): {str(last_error)}, 查询: {query}")
+        if raise_errors:
+            self._errors += 1
+            raise last_error
+        self._failed()
+        return []
+
+    async def close(self):
+        await self._reset()
+
+    def metrics(self):
+        return {
+            "connected": self._driver is not None,
+            "max_pool_size": self.max_pool_size,
+            "queries": self._queries,
+            "errors": self._errors,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight
+        }
@@ -0,0 +1,236 @@
+import time
+import heapq
+import bisect
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    """
+    统一大小写和全角/半角，便于中日文名称匹配
+
+    NFKC 会把全角字母数字、半角片假名等转换为标准形式。
+    """
+    return unicodedata.normalize('NFKC', str(text or '')).casefold().strip()
+
+
+def ngrams(text):
+    """
+    返回用于"包含"查询的 n-gram
+
+    中日文没有空格分词，直接按字符切分：单字用于一个字的查询，
+    相邻两字（bigram）用于更长的查询。
+    """
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class AutocompleteIndex:
+    """
+    节点名称的内存自动补全索引
+
+    - 前缀匹配：排序数组 + 二分查找
+    - 包含匹配：n-gram 倒排表，取查询中各 bigram 的交集后再校验
+    - 排序与原来的Cypher查询一致：名称完全匹配 > 名称前缀匹配 > 包含，再按名称排序
+    """
+
+    def __init__(self):
+        self._nodes = {}      # id -> {"id", "name", "title", "type", "keys"}
+        self._sorted = []     # [(规范化名称/标题, id)]
+        self._postings = {}   # n-gram -> {id}
+        self._lock = threading.RLock()
+        self._changes = None  # 构建期间的增量修改，构建完成后重放
+        self._building = False
+        self._dirty = False
+        self.ready = False
+        self.built_at = None
+        self.build_seconds = None
+
+    def _add(self, node_id, name, title, node_type, keep_sorted=True):
+        keys = {normalize(v) for v in (name, title) if v}
+        keys.discard('')
+        self._nodes[node_id] = {
+            "id": node_id,
+            "name": name,
+            "title": title,
+            "type": node_type,
+            "keys": keys,
+            "sort_name": normalize(name)
+        }
+        for key in keys:
+            if keep_sorted:
+                bisect.insort(self._sorted, (key, node_id))
+            else:
+                self._sorted.append((key, node_id))
+            for gram in ngrams(key):
+                self._postings.setdefault(gram, set()).add(node_id)
+
+    def _remove(self, node_id):
+        node = self._nodes.pop(node_id, None)
+        if node is None:
+            return
+        for key in node["keys"]:
+            index = bisect.bisect_left(self._sorted, (key, node_id))
+            if index < len(self._sorted) and self._sorted[index] == (key, node_id):
+                del self._sorted[index]
+            for gram in ngrams(key):
+                ids = self._postings.get(gram)
+                if ids is not None:
+                    ids.discard(node_id)
+                    if not ids:
+                        del self._postings[gram]
+
+    def upsert(self, node_id, name=None, title=None, node_type=None):
+        """新增或更新一个节点"""
+        with self._lock:
+            self._remove(node_id)
+            self._add(node_id, name, title, node_type)
+            if self._changes is not None:
+                self._changes.append((node_id, (name, title, node_type)))
+
+    def remove(self, node_id):
+        with self._lock:
+            self._remove(node_id)
+            if self._changes is not None:
+                self._changes.append((node_id, None))
+
+    def build(self, fetch_page, page_size=5000):
+        """
+        从数据库分页加载全部节点，构建完成后整体替换当前索引
+
+        Args:
+            fetch_page: fetch_page(after_id, page_size) -> [{"id", "name", "title", "type"}]，按id升序
+        """
+        started = time.time()
+        with self._lock:
+            self._changes = []
+        fresh = AutocompleteIndex()
+        after = -1
+        try:
+            while True:
+                rows = fetch_page(after, page_size)
+                if rows is None:
+                    raise RuntimeError("加载节点失败")
+                for row in rows:
+                    fresh._add(row["id"], row.get("name"), row.get("title"), row.get("type"), keep_sorted=False)
+                if len(rows) < page_size:
+                    break
+                after = rows[-1]["id"]
+            fresh._sorted.sort()
+        except Exception:
+            with self._lock:
+                self._changes = None
+            raise
+
+        with self._lock:
+            # 重放构建期间管理接口做的修改，避免被旧数据覆盖
+            for node_id, values in self._changes:
+                fresh._remove(node_id)
+                if values is not None:
+                    fresh._add(node_id, *values)
+            self._changes = None
+            self._nodes = fresh._nodes
+            self._sorted = fresh._sorted
+            self._postings = fresh._postings
+            self.ready = True
+            self.built_at = time.time()
+            self.build_seconds = round(self.built_at - started, 3)
+        logger.info(f"自动补全索引构建完成: {len(self._nodes)} 个节点, 用时 {self.build_seconds} 秒")
+        return len(self._nodes)
+
+    def rebuild_async(self, fetch_page, page_size=5000):
+        """
+        在后台线程中重建索引
+
+        正在构建时只做标记，当前构建结束后再重建一次，避免并发重复加载。
+        """
+        with self._lock:
+            if self._building:
+                self._dirty = True
+                return
+            self._building = True
+
+        def run():
+            while True:
+                try:
+                    self.build(fetch_page, page_size)
+                except Exception as e:
+                    logger.warning(f"构建自动补全索引失败，搜索将使用数据库查询: {str(e)}")
+                with self._lock:
+                    if not self._dirty:
+                        self._building = False
+                        return
+                    self._dirty = False
+
+        threading.Thread(target=run, name="autocomplete-index", daemon=True).start()
+
+    def _name_prefix_ids(self, query, limit):
+        """按名称顺序返回名称以 query 开头的节点（完全匹配排在最前）"""
+        start = bisect.bisect_left(self._sorted, (query,))
+        ids = []
+        for index in range(start, len(self._sorted)):
+            key, node_id = self._sorted[index]
+            if len(ids) >= limit or not key.startswith(query):
+                break
+            # 标题的前缀匹配和原查询一样只算"包含"
+            if key == self._nodes[node_id]["sort_name"]:
+                ids.append(node_id)
+        return ids
+
+    def _contains_ids(self, query):
+        if len(query) == 1:
+            return self._postings.get(query, set())
+        grams = [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = [self._postings.get(gram) for gram in grams]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return {node_id for node_id in candidates
+                if any(query in key for key in self._nodes[node_id]["keys"])}
+
+    def search(self, query, limit=10):
+        """
+        查找名称或标题包含 query 的节点
+
+        Returns:
+            list: 节点字典 {"id", "name", "title", "type"}
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            # 排序数组按名称有序，前缀扫描的结果已经是 完全匹配 > 前缀匹配 > 名称 的顺序
+            ranked = self._name_prefix_ids(query, limit)
+            if len(ranked) < limit:
+                seen = set(ranked)
+                rest = (node_id for node_id in self._contains_ids(query) if node_id not in seen)
+                ranked += heapq.nsmallest(
+                    limit - len(ranked), rest,
+                    key=lambda node_id: (self._nodes[node_id]["sort_name"], node_id)
+                )
+            return [
+                {key: self._nodes[node_id][key] for key in ("id", "name", "title", "type")}
+                for node_id in ranked
+            ]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "building": self._building,
+                "nodes": len(self._nodes),
+                "keys": len(self._sorted),
+                "ngrams": len(self._postings),
+                "built_at": self.built_at,
+                "build_seconds": self.build_seconds
+            }
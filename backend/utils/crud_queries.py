@@ -0,0 +1,238 @@
+import re
+import logging
+import threading
+from .cypher import escape_name, node_pattern, relationship_pattern, set_sort_key
+
+logger = logging.getLogger(__name__)
+
+# 管理接口的写查询模板
+#
+# 属性一律作为一个 map 参数传入（SET n += $props / SET r = $props），查询文本只随标签或
+# 关系类型变化，同一标签/类型的请求复用Neo4j缓存的执行计划，属性名也不会拼进查询。
+# 写入节点属性后重新计算排序键 sort_key（可能修改了 name / title）。
+# 标签和关系类型不能参数化，由 NameWhitelist 校验后再转义写入查询。
+#
+# 多步骤的管理操作写成事务函数(*_tx)，由 Neo4jConnection.write_transaction 在一个托管写事务中
+# 执行：检查、写入和读取最终结果尽量合并为一条语句，驱动遇到临时错误时重试整个事务，
+# 不会留下只执行了一半的修改。事务函数可能被重复执行，只能通过 tx 访问数据库。
+
+NODE_RETURN = "RETURN id(n) AS id, n.name AS name, n.title AS title, labels(n)[0] AS type"
+RELATION_RETURN = "RETURN ID(r) AS id, type(r) AS type"
+MATCH_NODE_BY_ID = "MATCH (n) WHERE id(n) = $node_id"
+MATCH_ENDPOINTS = "MATCH (source), (target) WHERE ID(source) = $source_id AND ID(target) = $target_id"
+MATCH_BETWEEN = "WHERE ID(source) = $source_id AND ID(target) = $target_id"
+ENDPOINT_NAMES = "source.name AS source_name, target.name AS target_name"
+
+# 新建的标签/关系类型只能由字母（含中文）、数字和下划线组成，不能以数字开头
+NAME_PATTERN = re.compile(r"^[^\W\d]\w{0,63}$")
+
+
+# 更新节点属性（只覆盖传入的属性），返回的 type 为更新前后不变的原标签
+UPDATE_NODE_QUERY = f"{MATCH_NODE_BY_ID} SET n += $props {set_sort_key()} {NODE_RETURN}"
+
+# 删除节点及其关系，同一条语句返回删除前的信息
+DELETE_NODE_QUERY = (
+    f"{MATCH_NODE_BY_ID} "
+    "WITH n, n.name AS name, labels(n)[0] AS type, [(n)-[r]-() | type(r)] AS relation_types "
+    "DETACH DELETE n "
+    "RETURN name, type, relation_types"
+)
+
+# 替换关系失败时用于判断关系是否存在
+RELATION_EXISTS_QUERY = "MATCH ()-[r]->() WHERE ID(r) = toInteger($relation_id) RETURN count(r) > 0 AS found"
+
+
+def create_node_query(label):
+    return f"CREATE {node_pattern('n', label)} SET n = $props {set_sort_key()} {NODE_RETURN}"
+
+
+def relabel_node_query(current_label, new_label):
+    """更换节点标签"""
+    clauses = [MATCH_NODE_BY_ID]
+    if current_label:
+        clauses.append(f"REMOVE n:{escape_name(current_label)}")
+    clauses.append(f"SET n:{escape_name(new_label)}")
+    clauses.append(NODE_RETURN)
+    return " ".join(clauses)
+
+
+def create_relation_query(rel_type):
+    """创建关系，同时返回两端节点的名称；端点不存在时没有结果"""
+    return (f"{MATCH_ENDPOINTS} CREATE (source)-{relationship_pattern('r', rel_type)}->(target) SET r = $props "
+            f"{RELATION_RETURN}, {ENDPOINT_NAMES}")
+
+
+def replace_relation_query(rel_type):
+    """删除 $relation_id 对应的关系，在给定的两个节点之间创建新关系"""
+    return (
+        "MATCH ()-[old]->() WHERE ID(old) = toInteger($relation_id) "
+        f"{MATCH_ENDPOINTS} "
+        "WITH old, type(old) AS old_type, source, target "
+        "DELETE old "
+        f"CREATE (source)-{relationship_pattern('r', rel_type)}->(target) SET r = $props "
+        f"{RELATION_RETURN}, old_type, {ENDPOINT_NAMES}"
+    )
+
+
+def merge_relation_query(rel_type, replace_properties=False, original_type=None):
+    """
+    合并两个节点之间的关系
+
+    replace_properties 为真时用 $props 替换关系的全部属性；
+    original_type 不为空时先删除两个节点之间该类型的旧关系（修改关系类型）。
+    """
+    clauses = [MATCH_ENDPOINTS]
+    if original_type:
+        clauses.append(f"OPTIONAL MATCH (source)-{relationship_pattern('old', original_type)}->(target)")
+        clauses.append("DELETE old")
+        clauses.append("WITH DISTINCT source, target")
+    clauses.append(f"MERGE (source)-{relationship_pattern('r', rel_type)}->(target)")
+    if replace_properties:
+        clauses.append("SET r = $props")
+    clauses.append(f"RETURN {ENDPOINT_NAMES}")
+    return " ".join(clauses)
+
+
+def delete_relations_between_query(rel_type=None):
+    """删除两个节点之间的关系，不指定类型时删除全部关系"""
+    return (f"MATCH (source)-{relationship_pattern('r', rel_type)}->(target) {MATCH_BETWEEN} "
+            f"DELETE r RETURN count(r) AS deleted_count")
+
+
+def relation_properties_query(rel_type):
+    return (f"MATCH (source)-{relationship_pattern('r', rel_type)}->(target) {MATCH_BETWEEN} "
+            f"RETURN properties(r) AS properties")
+
+
+def _single(tx, query, params):
+    records = list(tx.run(query, params))
+    return records[0] if records else None
+
+
+def update_node_tx(tx, node_id, node_type, props):
+    """
+    更新节点属性，类型变化时在同一事务中更换标签
+
+    Returns:
+        tuple: (更新后的节点记录, 原来的类型)；节点不存在时返回 None
+    """
+    record = _single(tx, UPDATE_NODE_QUERY, {"node_id": node_id, "props": props})
+    if record is None:
+        return None
+    previous_type = record["type"]
+    if previous_type != node_type:
+        record = _single(tx, relabel_node_query(previous_type, node_type), {"node_id": node_id})
+    return record, previous_type
+
+
+def delete_node_tx(tx, node_id):
+    """删除节点，返回删除前的 name/type/relation_types；节点不存在时返回 None"""
+    return _single(tx, DELETE_NODE_QUERY, {"node_id": node_id})
+
+
+def create_relation_tx(tx, source_id, target_id, rel_type, props):
+    """创建关系，返回关系和两端节点名称；端点不存在时返回 None"""
+    return _single(tx, create_relation_query(rel_type), {
+        "source_id": source_id,
+        "target_id": target_id,
+        "props": props
+    })
+
+
+def replace_relation_tx(tx, relation_id, source_id, target_id, rel_type, props):
+    """
+    用新关系替换旧关系
+
+    Returns:
+        tuple: (记录, 错误信息)；成功时错误信息为 None
+    """
+    params = {"relation_id": relation_id, "source_id": source_id, "target_id": target_id, "props": props}
+    record = _single(tx, replace_relation_query(rel_type), params)
+    if record is not None:
+        return record, None
+    # 没有结果时再查询失败原因（事务中没有做任何修改）
+    found = _single(tx, RELATION_EXISTS_QUERY, params)
+    if found is None or not found["found"]:
+        return None, "关系不存在"
+    return None, "源节点或目标节点不存在"
+
+
+def save_relation_tx(tx, source_id, target_id, rel_type, props, original_type=None):
+    """合并关系（可同时删除旧类型的关系），返回两端节点名称；端点不存在时返回 None"""
+    return _single(tx, merge_relation_query(rel_type, bool(props), original_type), {
+        "source_id": source_id,
+        "target_id": target_id,
+        "props": props
+    })
+
+
+def property_map(properties):
+    """
+    校验请求中的属性
+
+    Raises:
+        ValueError: 属性不是对象或属性名为空
+    """
+    if properties is None:
+        return {}
+    if not isinstance(properties, dict):
+        raise ValueError("properties 必须是对象")
+    for key in properties:
+        if not isinstance(key, str) or not key.strip():
+            raise ValueError("属性名不能为空")
+    return dict(properties)
+
+
+class NameWhitelist:
+    """
+    允许写入查询的标签名或关系类型
+
+    数据库中已有的名称总是允许；新名称需要符合 NAME_PATTERN，
+    allow_new 为 False 时只允许已有的名称。已有名称从数据库读取后缓存，
+    遇到未知名称时重新读取一次。
+    """
+
+    def __init__(self, load, kind, allow_new=True):
+        """
+        Args:
+            load: load() -> 数据库中已有的名称列表
+            kind (str): 名称的类别，用于错误信息（如 "节点类型"）
+            allow_new (bool): 是否允许新建名称
+        """
+        self.load = load
+        self.kind = kind
+        self.allow_new = allow_new
+        self._names = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        try:
+            names = set(self.load())
+        except Exception as e:
+            logger.warning(f"读取已有{self.kind}失败: {str(e)}")
+            return
+        with self._lock:
+            self._names = names
+
+    def check(self, name):
+        """
+        校验名称，返回去除首尾空白后的名称
+
+        Raises:
+            ValueError: 名称为空或不允许使用
+        """
+        name = (name or "").strip()
+        if not name:
+            raise ValueError(f"{self.kind}不能为空")
+        if self._names is None or name not in self._names:
+            self._reload()
+        if self._names is not None and name in self._names:
+            return name
+        if not self.allow_new:
+            raise ValueError(f"不允许的{self.kind}: {name}")
+        if not NAME_PATTERN.match(name):
+            raise ValueError(f"{self.kind}只能包含字母、数字和下划线，且不能以数字开头: {name}")
+        with self._lock:
+            if self._names is not None:
+                self._names.add(name)
+        return name
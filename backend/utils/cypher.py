@@ -0,0 +1,109 @@
+# 节点的排序键：管理接口的节点和关系列表按 (sort_key, id) 分页。排序键在写入节点时计算并保存，
+# 每个标签的 sort_key 范围索引由 schema 创建，分页查询按索引顺序读取，读满一页即可停止，
+# 不再对匹配的全部节点计算 COALESCE 后排序。
+SORT_KEY = "sort_key"
+UNNAMED_NODE = "未命名节点"
+
+
+def escape_name(name):
+    """用反引号转义标签名、关系类型、属性名和索引名"""
+    return "`" + str(name).replace("`", "``") + "`"
+
+
+def node_pattern(var="n", label=None):
+    """
+    节点模式：有标签时写成 (n:`Label`)，查询只读取该标签的节点（标签扫描），
+    不再对全部节点计算 labels(n)[0] = $type。
+
+    注意：带有多个标签的节点只要有一个标签匹配就会被选中。
+    """
+    return f"({var}:{escape_name(label)})" if label else f"({var})"
+
+
+def relationship_pattern(var="r", rel_type=None):
+    """关系模式：有类型时写成 [r:`TYPE`]，代替 type(r) = $type"""
+    return f"[{var}:{escape_name(rel_type)}]" if rel_type else f"[{var}]"
+
+
+def sort_key_expression(var="n"):
+    """排序键的计算方式：优先 title，其次 name"""
+    return f"COALESCE({var}.title, {var}.name, '{UNNAMED_NODE}')"
+
+
+def set_sort_key(var="n", on_create=False):
+    """
+    写入节点时更新排序键的 SET 子句，放在设置 name / title 的子句之后
+
+    on_create 为真时生成 ON CREATE SET，用于只在创建时设置名称的 MERGE。
+    """
+    clause = "ON CREATE SET" if on_create else "SET"
+    return f"{clause} {var}.{SORT_KEY} = {sort_key_expression(var)}"
+
+
+def without_sort_key(properties):
+    """去掉排序键后的属性映射（排序键是派生属性，接口中不显示也不能编辑）"""
+    properties = dict(properties or {})
+    properties.pop(SORT_KEY, None)
+    return properties
+
+
+def label_union(labels, branch, var="n"):
+    """
+    按标签拆分的 UNION 子查询：CALL { <分支1> UNION <分支2> ... }
+
+    branch(pattern) 返回一个分支的查询文本，pattern 为 (n:`Label`)。每个分支可以使用该标签的索引
+    按顺序读取并截取前几条，外层再合并排序；带有多个标签的节点由 UNION 去重。
+    """
+    return "CALL { " + " UNION ".join(branch(node_pattern(var, label)) for label in labels) + " }"
+
+
+def where_clause(conditions):
+    """把条件列表拼成 WHERE 子句，没有条件时返回空字符串"""
+    conditions = [c for c in conditions if c]
+    return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+def count_nodes_query(label=None, conditions=(), var="n", alias="total"):
+    """
+    统计节点数的查询
+
+    没有其他条件时查询形如 MATCH (n:`Label`) RETURN count(n)，
+    由计数存储(count store)直接返回，不需要扫描节点。
+    """
+    parts = ["MATCH", node_pattern(var, label), where_clause(conditions), f"RETURN count({var}) AS {alias}"]
+    return " ".join(part for part in parts if part)
+
+
+def count_relationships_query(rel_type=None, conditions=(), source="source", target="target", var="r",
+                              alias="total"):
+    """
+    统计关系数的查询
+
+    没有其他条件时写成 MATCH ()-[r:`TYPE`]->() RETURN count(r)，由计数存储直接返回；
+    有条件时保留端点变量供条件使用。
+    """
+    rel = relationship_pattern(var, rel_type)
+    if not any(conditions):
+        return f"MATCH ()-{rel}->() RETURN count({var}) AS {alias}"
+    return f"MATCH ({source})-{rel}->({target}) {where_clause(conditions)} RETURN count({var}) AS {alias}"
+
+
+def label_count_queries(labels):
+    """
+    每个标签一个计数存储查询，供 execute_batch_queries 并发执行
+
+    Returns:
+        dict: {"label_<序号>": {"query": ...}}，序号与 labels 的顺序对应
+    """
+    return {
+        f"label_{i}": {"query": count_nodes_query(label, alias="count")}
+        for i, label in enumerate(labels)
+    }
+
+
+def relationship_type_count_queries(rel_types):
+    """每个关系类型一个计数存储查询，键为 "type_<序号>" """
+    return {
+        f"type_{i}": {"query": count_relationships_query(rel_type, alias="count")}
+        for i, rel_type in enumerate(rel_types)
+    }
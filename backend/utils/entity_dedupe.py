@@ -0,0 +1,101 @@
+import logging
+from .cypher import relationship_pattern
+from .entity_types import UNKNOWN_TYPE
+
+logger = logging.getLogger(__name__)
+
+# 一次性迁移：合并早期写入的 "Unknown" 重复节点
+#
+# 实体按 (name, type) 合并以前，text2kg 写入的节点类型都是 "Unknown"；之后再抽取到带类型的同名实体
+# 会另建一个节点，(name, type) 唯一约束不会阻止这种重复。同名的带类型节点只有一个时，
+# 把 "Unknown" 节点的关系移到该节点上再删除它；有多个带类型的同名节点时无法判断归属，只报告数量。
+# 只迁移关系，"Unknown" 节点上 name / type 以外的属性不合并。
+
+# 可以合并的 "Unknown" 节点 u 和它唯一的带类型同名节点 t
+MERGEABLE = (
+    "MATCH (u:Entity {type: $unknown}) "
+    "MATCH (t:Entity {name: u.name}) WHERE t.type <> $unknown "
+    "WITH u, collect(t) AS typed "
+    "WHERE size(typed) = 1 "
+    "WITH u, typed[0] AS t "
+)
+
+COUNT_QUERY = (
+    "MATCH (u:Entity {type: $unknown}) "
+    "MATCH (t:Entity {name: u.name}) WHERE t.type <> $unknown "
+    "WITH u, count(t) AS typed "
+    "RETURN sum(CASE WHEN typed = 1 THEN 1 ELSE 0 END) AS mergeable, "
+    "sum(CASE WHEN typed > 1 THEN 1 ELSE 0 END) AS ambiguous, "
+    "sum(CASE WHEN typed = 1 THEN COUNT { (u)--() } ELSE 0 END) AS relationships"
+)
+
+DELETE_QUERY = (
+    MERGEABLE +
+    "WHERE NOT EXISTS { (u)--() } "
+    "DELETE u "
+    "RETURN count(*) AS merged"
+)
+
+
+def move_relationships_query(rel_type, outgoing):
+    """
+    把可合并节点 u 上某一类型的关系移到 t 上（复制类型和属性后删除原关系）
+
+    t 上已有类型和属性都相同的关系时不再重复创建。u 的自环移为 t 的自环。
+    """
+    old = relationship_pattern("r", rel_type)
+    existing = relationship_pattern("e", rel_type)
+    new = relationship_pattern("n", rel_type)
+    if outgoing:
+        match = f"MATCH (u)-{old}->(other) WITH t, r, CASE WHEN other = u THEN t ELSE other END AS other "
+        start, end = "t", "other"
+    else:
+        match = f"MATCH (other)-{old}->(u) WHERE other <> u WITH t, r, other "
+        start, end = "other", "t"
+    return (
+        MERGEABLE + match +
+        f"OPTIONAL MATCH ({start})-{existing}->({end}) WHERE properties(e) = properties(r) "
+        f"WITH t, r, other, count(e) AS duplicates "
+        f"FOREACH (_ IN CASE WHEN duplicates = 0 THEN [1] ELSE [] END | "
+        f"CREATE ({start})-{new}->({end}) SET n = properties(r)) "
+        "DELETE r "
+        "RETURN count(*) AS moved"
+    )
+
+
+def merge_unknown_duplicates(run_query, dry_run=False):
+    """
+    合并与带类型节点同名的 "Unknown" 节点
+
+    Args:
+        run_query: run_query(query, params, raise_errors=True) -> 记录列表
+        dry_run (bool): 只统计，不修改数据
+
+    Returns:
+        dict: mergeable 可合并的节点数, ambiguous 有多个带类型同名节点而跳过的节点数,
+              relationships 可合并节点上的关系数；实际执行时还包括 moved 移动的关系数和 merged 删除的节点数
+    """
+    params = {"unknown": UNKNOWN_TYPE}
+    counts = run_query(COUNT_QUERY, params, raise_errors=True)
+    result = {
+        "mergeable": (counts[0]["mergeable"] or 0) if counts else 0,
+        "ambiguous": (counts[0]["ambiguous"] or 0) if counts else 0,
+        "relationships": (counts[0]["relationships"] or 0) if counts else 0
+    }
+    if dry_run or not result["mergeable"]:
+        return result
+
+    rel_types = [r["relationshipType"] for r in run_query(
+        "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType", raise_errors=True)]
+    moved = 0
+    # 每种关系类型、每个方向一条语句（关系类型不能参数化）
+    for rel_type in rel_types:
+        for outgoing in (True, False):
+            records = run_query(move_relationships_query(rel_type, outgoing), params, raise_errors=True)
+            moved += records[0]["moved"] if records else 0
+    records = run_query(DELETE_QUERY, params, raise_errors=True)
+    result["moved"] = moved
+    result["merged"] = records[0]["merged"] if records else 0
+    logger.info(f"已合并 {result['merged']} 个 \"{UNKNOWN_TYPE}\" 重复节点，移动 {moved} 个关系，"
+                f"跳过 {result['ambiguous']} 个有多个同名类型的节点")
+    return result
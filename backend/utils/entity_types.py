@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .extraction_cache import ExtractionCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 可用的实体类型
+ENTITY_TYPES = ["Person", "Location", "Time", "Organization", "Event", "Work", "Quantity", "Other"]
+UNKNOWN_TYPE = "Unknown"
+
+# 批量分类配置
+CLASSIFY_ENABLED = os.getenv('KG_CLASSIFY_TYPES', 'True') == 'True'
+CLASSIFY_MODEL = os.getenv('KG_CLASSIFY_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
+CLASSIFY_BATCH_SIZE = int(os.getenv('KG_CLASSIFY_BATCH_SIZE', 50))
+CLASSIFY_WORKERS = int(os.getenv('KG_CLASSIFY_WORKERS', 4))
+TYPE_CACHE_PATH = os.getenv('KG_CACHE_PATH', os.path.join('logs', 'extraction_cache.db'))
+TYPE_CACHE_MAX_ENTRIES = int(os.getenv('KG_TYPE_CACHE_MAX_ENTRIES', 200000))
+GAZETTEER_PATH = os.getenv('KG_GAZETTEER_PATH', '')
+
+SYSTEM_PROMPT = (
+    "You are an expert in analyzing the type of entities. "
+    "Classify every entity in the user's JSON list into exactly one of: "
+    + ", ".join(ENTITY_TYPES) + ". "
+    "Reply with a JSON object mapping each entity, exactly as given, to its type. "
+    "Some requests include hints guessed from name suffixes; they are often wrong for person names, "
+    "so use them only when the entity itself is ambiguous."
+)
+FEW_SHOT_INPUT = json.dumps(["坂本龍馬", "日本", "1800-01-01", "美国商务部", "杀人事件", "子产品供应链", "西游记"],
+                            ensure_ascii=False)
+FEW_SHOT_OUTPUT = json.dumps({
+    "坂本龍馬": "Person",
+    "日本": "Location",
+    "1800-01-01": "Time",
+    "美国商务部": "Organization",
+    "杀人事件": "Event",
+    "子产品供应链": "Other",
+    "西游记": "Work"
+}, ensure_ascii=False)
+
+# 规则预分类：日期/时间、数量
+_TIME_PATTERNS = [
+    re.compile(r'^\d{2,4}\s*[-/.年]\s*\d{1,2}(\s*[-/.月]\s*\d{1,2}\s*日?)?(\s+\d{1,2}:\d{2}(:\d{2})?)?$'),
+    re.compile(r'^(当地时间)?(\d{1,4}|[一二三四五六七八九十〇零百千]+)\s*(年|月|日|号|世纪|年代|季度)(\s*(\d{1,2}|[一二三四五六七八九十]+)\s*(月|日|号))*$'),
+    re.compile(r'^(当地时间)?(今天|昨天|明天|今年|去年|明年|上周|本周|下周|周[一二三四五六日天]|星期[一二三四五六日天])$'),
+    re.compile(r'^\d{1,2}:\d{2}(:\d{2})?$'),
+    re.compile(r'^(19|20)\d{2}s?$'),
+]
+_QUANTITY_PATTERN = re.compile(
+    r'^[-+]?[\d,.]+\s*(%|％|亿|万|千|百|元|美元|日元|人民币|个|人|家|吨|公里|米|倍|点|次|件|台|辆)*$'
+)
+
+# 名称后缀提示：只作为提示随请求发给模型，不直接作为分类结果
+# （单字后缀容易误判人名，如 孙中山、李建国、刘江）
+_SUFFIX_RULES = [
+    (("公司", "集团", "银行", "大学", "学院", "研究所", "委员会", "政府", "部", "局", "署", "厅", "协会",
+      "组织", "联盟", "党", "法院", "交易所", "株式会社", "大学院"), "Organization"),
+    (("省", "市", "县", "州", "国", "岛", "洲", "港", "湾", "山", "河", "江", "湖", "区"), "Location"),
+    (("事件", "战争", "会议", "峰会", "选举", "危机", "冲突", "调查", "谈判"), "Event"),
+]
+# 单字后缀只用于不少于该长度的名称
+SINGLE_SUFFIX_MIN_LENGTH = 4
+
+# 内置地名词典，可通过 KG_GAZETTEER_PATH 指定JSON文件扩展 {"名称": "类型"}
+_BUILTIN_GAZETTEER = {
+    "中国": "Location", "美国": "Location", "日本": "Location", "韩国": "Location", "俄罗斯": "Location",
+    "英国": "Location", "法国": "Location", "德国": "Location", "印度": "Location", "墨西哥": "Location",
+    "加拿大": "Location", "欧盟": "Organization", "北京": "Location", "上海": "Location", "东京": "Location",
+    "华盛顿": "Location", "香港": "Location", "台湾": "Location", "联合国": "Organization",
+    "世界贸易组织": "Organization", "美联储": "Organization", "白宫": "Organization",
+}
+
+_gazetteer = None
+_type_cache = None
+_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """加载地名/机构名词典"""
+    global _gazetteer
+    if _gazetteer is None:
+        gazetteer = dict(_BUILTIN_GAZETTEER)
+        if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+            try:
+                with open(GAZETTEER_PATH, 'r', encoding='utf-8') as f:
+                    gazetteer.update(json.load(f))
+            except Exception as e:
+                logger.warning(f"加载实体词典失败 {GAZETTEER_PATH}: {str(e)}")
+        _gazetteer = gazetteer
+    return _gazetteer
+
+
+def get_type_cache():
+    """持久化的 名称 -> 类型 缓存"""
+    global _type_cache
+    if _type_cache is None:
+        with _lock:
+            if _type_cache is None:
+                try:
+                    _type_cache = ExtractionCache(
+                        TYPE_CACHE_PATH,
+                        table="entity_types",
+                        max_entries=TYPE_CACHE_MAX_ENTRIES,
+                        ttl=0
+                    )
+                except Exception as e:
+                    logger.warning(f"无法初始化实体类型缓存: {str(e)}")
+    return _type_cache
+
+
+def set_type_cache(cache):
+    """替换实体类型缓存（例如测试时使用临时文件）"""
+    global _type_cache
+    _type_cache = cache
+
+
+def rule_based_type(name):
+    """用规则和词典判断实体类型，无法判断时返回 None"""
+    name = str(name).strip()
+    if not name:
+        return None
+
+    gazetteer = get_gazetteer()
+    if name in gazetteer:
+        return gazetteer[name]
+
+    if any(pattern.match(name) for pattern in _TIME_PATTERNS):
+        return "Time"
+    if _QUANTITY_PATTERN.match(name) and any(ch.isdigit() for ch in name):
+        return "Quantity"
+    return None
+
+
+def suffix_hint(name):
+    """按名称后缀猜测类型，结果只作为提示发给模型，无法判断时返回 None"""
+    name = str(name).strip()
+    # 只用于较短的中文/日文名称，避免误判描述性短语
+    if len(name) > 12:
+        return None
+    for suffixes, entity_type in _SUFFIX_RULES:
+        for suffix in suffixes:
+            min_length = SINGLE_SUFFIX_MIN_LENGTH if len(suffix) == 1 else len(suffix) + 1
+            if len(name) >= min_length and name.endswith(suffix):
+                return entity_type
+    return None
+
+
+def _normalize_type(value):
+    value = str(value or '').strip().strip('"').capitalize()
+    return value if value in ENTITY_TYPES else "Other"
+
+
+def _classify_batch(client, names, model):
+    """一次请求分类一批实体，带有后缀提示的实体把提示附在列表之后"""
+    content = json.dumps(names, ensure_ascii=False)
+    hints = {name: hint for name, hint in ((name, suffix_hint(name)) for name in names) if hint}
+    if hints:
+        content += "\nHints: " + json.dumps(hints, ensure_ascii=False)
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": FEW_SHOT_INPUT},
+            {"role": "assistant", "content": FEW_SHOT_OUTPUT},
+            {"role": "user", "content": content}
+        ],
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+    content = response.choices[0].message.content or "{}"
+    parsed = json.loads(content)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"无法解析分类结果: {content[:200]}")
+    return {name: _normalize_type(parsed[name]) for name in names if name in parsed}
+
+
+def classify_entities(names, client=None, model=None, batch_size=None, max_workers=None):
+    """
+    批量判断实体类型
+
+    依次使用规则/词典（日期、数量、已知名称）、持久化缓存，剩余的实体按批发送给模型，
+    每次请求包含多个实体，示例只发送一次；名称后缀只作为提示发给模型。
+    模型不可用或调用失败的实体返回 "Unknown"。
+
+    Args:
+        names: 实体名称
+        client: OpenAI客户端，默认使用环境变量配置
+        model (str): 模型名称
+
+    Returns:
+        dict: {实体名称: 类型}
+    """
+    names = list(dict.fromkeys(str(n) for n in names if n is not None and str(n).strip()))
+    model = model or CLASSIFY_MODEL
+    batch_size = max(1, batch_size or CLASSIFY_BATCH_SIZE)
+    max_workers = max_workers or CLASSIFY_WORKERS
+    types = {}
+
+    # 1. 规则和词典（只包含确定的结果）
+    pending = []
+    for name in names:
+        entity_type = rule_based_type(name)
+        if entity_type:
+            types[name] = entity_type
+        else:
+            pending.append(name)
+
+    # 2. 持久化缓存
+    cache = get_type_cache()
+    keys = {name: make_cache_key("entity_type", name, model) for name in pending}
+    if cache is not None and pending:
+        cached = cache.get_many(keys.values())
+        for name in pending:
+            if keys[name] in cached:
+                types[name] = cached[keys[name]]
+        pending = [name for name in pending if name not in types]
+
+    # 3. 批量调用模型
+    if pending and CLASSIFY_ENABLED and client is None:
+        try:
+            from openai import OpenAI
+            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        except Exception as e:
+            logger.error(f"无法创建实体分类的模型客户端，{len(pending)} 个实体标记为 {UNKNOWN_TYPE}: {str(e)}")
+
+    if pending and CLASSIFY_ENABLED and client is not None:
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        def run(batch):
+            try:
+                return _classify_batch(client, batch, model)
+            except Exception as e:
+                logger.error(f"批量实体分类失败 ({len(batch)} 个实体): {str(e)}")
+                return {}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kg-classify") as executor:
+            classified = {}
+            for result in executor.map(run, batches):
+                classified.update(result)
+
+        types.update(classified)
+        if cache is not None and classified:
+            cache.put_many({keys[name]: entity_type for name, entity_type in classified.items()})
+        logger.info(f"实体分类: {len(names)} 个实体, {len(batches)} 次模型请求, 成功 {len(classified)} 个")
+
+    for name in names:
+        types.setdefault(name, UNKNOWN_TYPE)
+    return types
@@ -0,0 +1,158 @@
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import PyPDF2
+from docx import Document
+from .text_chunker import split_paragraphs
+
+logger = logging.getLogger(__name__)
+
+# 纯文本文件中单个段落的最大字符数，超过后直接输出，避免无空行的大文件占满内存
+MAX_PARAGRAPH_CHARS = 64 * 1024
+# 纯文本文件每读取这么多行上报一次进度（任务模式下每次上报都会写一次任务存储）
+TXT_PROGRESS_LINES = 1000
+
+
+def _iter_txt(file_path, progress=None):
+    buffer = []
+    size = 0
+    lines = 0
+    reported = 0
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            lines += 1
+            line = line.strip()
+            if line:
+                buffer.append(line)
+                size += len(line)
+            if buffer and (not line or size >= MAX_PARAGRAPH_CHARS):
+                yield '\n'.join(buffer)
+                buffer, size = [], 0
+                if progress and lines - reported >= TXT_PROGRESS_LINES:
+                    progress(lines_processed=lines)
+                    reported = lines
+    if buffer:
+        yield '\n'.join(buffer)
+    if progress:
+        progress(lines_processed=lines)
+
+
+def _iter_pdf(file_path, progress=None):
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        total = len(reader.pages)
+        if progress:
+            progress(pages_processed=0, total_pages=total)
+        for index in range(total):
+            try:
+                page_text = reader.pages[index].extract_text() or ''
+            except Exception as e:
+                logger.warning(f"解析PDF第{index + 1}页失败: {str(e)}")
+                page_text = ''
+            for paragraph in split_paragraphs(page_text):
+                yield paragraph
+            if progress:
+                progress(pages_processed=index + 1, total_pages=total)
+
+
+def _iter_docx(file_path, progress=None):
+    doc = Document(file_path)
+    total = len(doc.paragraphs)
+    for index, paragraph in enumerate(doc.paragraphs, 1):
+        if paragraph.text.strip():
+            yield paragraph.text.strip()
+        if progress and (index % 100 == 0 or index == total):
+            progress(paragraphs_processed=index, total_paragraphs=total)
+
+
+def iter_text_from_file(file_path, file_type, progress=None):
+    """
+    逐段读取文件文本
+
+    PDF按页解析，每解析完一页就输出该页的段落并上报 pages_processed，
+    不需要等待整份文档解析完成，也不会拼接出完整的文档字符串。
+
+    Args:
+        file_path (str): 文件路径
+        file_type (str): txt / pdf / docx
+        progress: 可选的进度回调，以关键字参数调用
+
+    Yields:
+        str: 段落文本
+    """
+    if file_type == 'txt':
+        return _iter_txt(file_path, progress)
+    elif file_type == 'pdf':
+        return _iter_pdf(file_path, progress)
+    elif file_type == 'docx':
+        return _iter_docx(file_path, progress)
+    return iter(())
+
+
+def extract_text_from_file(file_path, file_type):
+    """读取文件的全部文本"""
+    if file_type == 'txt':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return '\n'.join(iter_text_from_file(file_path, file_type))
+
+
+def parse_document(file_path, file_type):
+    """在子进程中解析单个文件（需为模块级函数以便序列化）"""
+    return extract_text_from_file(file_path, file_type)
+
+
+def process_context():
+    """
+    解析文件的进程池使用的启动方式
+
+    服务进程中已有任务、驱动和存活检查等线程，fork 会把其他线程持有的锁复制到子进程，
+    子进程可能死锁。优先使用 forkserver（只预先导入本模块，不导入主模块），
+    不支持时使用 spawn。
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def parse_documents(items, max_workers=None):
+    """
+    使用进程池并行解析多个文件，按完成顺序逐个返回
+
+    单个文件解析失败不影响其他文件。同时提交的文件数不超过进程数的两倍，
+    已返回的文本不再被引用，调用方处理较慢时解析结果不会在内存中堆积。
+
+    Args:
+        items (list): 包含 file_path 和 file_type 的字典
+        max_workers (int): 进程数，默认为CPU核数
+
+    Yields:
+        tuple: (item, 文本, 错误信息)
+    """
+    if not items:
+        return
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=process_context()) as executor:
+        remaining = iter(items)
+        pending = {}
+        while True:
+            for item in remaining:
+                pending[executor.submit(parse_document, item['file_path'], item['file_type'])] = item
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    text, error = future.result(), None
+                except Exception as e:
+                    logger.error(f"解析文件失败 {item.get('filename', item['file_path'])}: {str(e)}")
+                    text, error = None, str(e) or type(e).__name__
+                yield item, text, error
+            del done
@@ -0,0 +1,110 @@
+import json
+import zlib
+import logging
+from neo4j import READ_ACCESS
+
+logger = logging.getLogger(__name__)
+
+# 只返回id、标签/类型和属性映射，不构造驱动的 Node/Relationship 对象
+NODE_EXPORT_QUERY = (
+    "MATCH (n) "
+    "RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties"
+)
+RELATIONSHIP_EXPORT_QUERY = (
+    "MATCH (a)-[r]->(b) "
+    "RETURN elementId(r) AS id, type(r) AS type, elementId(a) AS start, "
+    "elementId(b) AS end, properties(r) AS properties"
+)
+
+
+def iter_graph(session_factory, fetch_size=1000, counts=None):
+    """
+    逐条产生图谱中的全部节点和关系（先节点后关系）
+
+    结果由驱动按 fetch_size 分批拉取，边读边产生，不会把整个图加载到内存。
+
+    Args:
+        session_factory: 返回会话上下文管理器的函数（Neo4jSessionPool.session）
+        fetch_size (int): 每次从服务器拉取的记录数
+        counts (dict): 若提供，导出过程中更新 nodes / relationships 计数
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("nodes", 0)
+    counts.setdefault("relationships", 0)
+
+    with session_factory(fetch_size=fetch_size, default_access_mode=READ_ACCESS) as session:
+        for record in session.run(NODE_EXPORT_QUERY):
+            counts["nodes"] += 1
+            yield {
+                "kind": "node",
+                "id": record["id"],
+                "labels": record["labels"],
+                "properties": record["properties"]
+            }
+        for record in session.run(RELATIONSHIP_EXPORT_QUERY):
+            counts["relationships"] += 1
+            yield {
+                "kind": "relationship",
+                "id": record["id"],
+                "type": record["type"],
+                "start": record["start"],
+                "end": record["end"],
+                "properties": record["properties"]
+            }
+
+
+def iter_ndjson(records, chunk_size=64 * 1024):
+    """
+    把记录编码为NDJSON，攒够 chunk_size 字节后产生一块
+
+    日期等非JSON类型的属性值转换为字符串。
+    """
+    buffer = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def gzip_stream(chunks, level=6):
+    """流式gzip压缩，输出可以直接拼接成一个 .gz 文件"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(session_factory, compress=False, fetch_size=1000, counts=None):
+    """
+    产生完整导出文件的字节块
+
+    最后一行是 {"kind": "summary", ...}，记录导出的节点数和关系数；
+    导出中途出错时最后一行为 {"kind": "error", ...}，据此可以判断文件是否完整，
+    错误信息同时写入 counts["error"]。
+    """
+    if counts is None:
+        counts = {}
+
+    def records():
+        try:
+            yield from iter_graph(session_factory, fetch_size, counts)
+        except Exception as e:
+            logger.error(f"导出图谱时出错: {str(e)}")
+            counts["error"] = str(e)
+            yield {"kind": "error", "message": str(e), "nodes": counts["nodes"],
+                   "relationships": counts["relationships"]}
+            return
+        yield {"kind": "summary", **counts}
+
+    chunks = iter_ndjson(records())
+    return gzip_stream(chunks) if compress else chunks
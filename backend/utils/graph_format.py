@@ -0,0 +1,49 @@
+def to_columnar(graph):
+    """
+    把 process_graph_data 的结果转换为列式格式
+
+    节点按出现顺序编号，关系的 source/target 用节点下标表示，
+    节点类型和关系类型各存一份名称表，列中只保存下标。
+    属性不在这里返回，客户端需要时通过 /api/graph/properties 按id获取。
+
+    Args:
+        graph (dict): {"nodes": [...], "links": [...]}
+
+    Returns:
+        dict: {
+            "format": "columnar",
+            "types": {"node": [类型名], "link": [关系类型名]},
+            "nodes": {"id": [...], "name": [...], "type": [类型下标]},
+            "links": {"id": [...], "source": [节点下标], "target": [节点下标], "type": [类型下标]}
+        }
+    """
+    node_types = {}
+    link_types = {}
+
+    def intern(table, name):
+        index = table.get(name)
+        if index is None:
+            index = table[name] = len(table)
+        return index
+
+    node_index = {}
+    nodes = {"id": [], "name": [], "type": []}
+    for node in graph["nodes"]:
+        node_index[node["id"]] = len(nodes["id"])
+        nodes["id"].append(node["id"])
+        nodes["name"].append(node["name"])
+        nodes["type"].append(intern(node_types, node["type"]))
+
+    links = {"id": [], "source": [], "target": [], "type": []}
+    for link in graph["links"]:
+        links["id"].append(link["id"])
+        links["source"].append(node_index[link["source"]])
+        links["target"].append(node_index[link["target"]])
+        links["type"].append(intern(link_types, link["type"]))
+
+    return {
+        "format": "columnar",
+        "types": {"node": list(node_types), "link": list(link_types)},
+        "nodes": nodes,
+        "links": links
+    }
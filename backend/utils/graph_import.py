@@ -0,0 +1,409 @@
+import csv
+import gzip
+import json
+import time
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .cypher import set_sort_key
+from .entity_types import UNKNOWN_TYPE
+from .neo4j_utils import write_in_batches
+
+logger = logging.getLogger(__name__)
+
+# 实体按 (name, type) 合并，与 text2kg 写入的 NAMED_ENTITY_UNWIND_QUERY 和 schema 中的
+# (name, type) 唯一约束一致；同名不同类型的实体是不同的节点。
+# 其他属性每次导入时更新，重复导入同一文件不会产生重复数据
+IMPORT_ENTITY_QUERY = (
+    "UNWIND $rows AS row "
+    "MERGE (n:Entity {name: row.name, type: row.type}) "
+    "SET n += row.properties "
+    f"{set_sort_key('n')}"
+)
+# 关系的端点不存在时一并创建，关系按 (起点, relation, 终点) 合并
+IMPORT_RELATION_QUERY = (
+    "UNWIND $rows AS row "
+    "MERGE (a:Entity {name: row.source, type: row.source_type}) "
+    f"{set_sort_key('a', on_create=True)} "
+    "MERGE (b:Entity {name: row.target, type: row.target_type}) "
+    f"{set_sort_key('b', on_create=True)} "
+    "MERGE (a)-[r:RELATION {relation: row.relation}]->(b) "
+    "SET r += row.properties"
+)
+# 没有指定类型的实体和关系端点按名称查找已有实体的类型：
+# 只有一个类型时使用该类型，没有时为 Unknown，有多个时无法确定，该行作为无效行跳过
+ENTITY_TYPES_QUERY = (
+    "UNWIND $names AS name "
+    "MATCH (n:Entity {name: name}) "
+    "RETURN name, collect(DISTINCT n.type) AS types"
+)
+
+# 字段别名：三元组常见的 subject/predicate/object 写法
+FIELD_ALIASES = {
+    "subject": "source",
+    "head": "source",
+    "object": "target",
+    "tail": "target",
+    "predicate": "relation",
+    "label": "type"
+}
+ENTITY_KINDS = {"entity", "node"}
+RELATION_KINDS = {"relation", "relationship", "triple"}
+ENTITY_FIELDS = {"kind", "name", "type", "properties"}
+RELATION_FIELDS = {"kind", "source", "target", "relation", "type", "source_type", "target_type", "properties"}
+
+# 保存的无效行示例数量上限
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename):
+    """按扩展名判断导入格式: .csv / .csv.gz 为 csv，其余按 ndjson 处理"""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def open_import_file(path):
+    """以文本方式打开导入文件，支持gzip压缩，兼容Excel导出的带BOM的CSV"""
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def read_rows(stream, fmt):
+    """
+    逐行读取导入文件
+
+    Args:
+        stream: 文本文件对象
+        fmt (str): ndjson 或 csv
+
+    Yields:
+        tuple: (行号, 原始字典或 None, 错误信息或 None)
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for raw in reader:
+            yield reader.line_num, raw, None
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"JSON格式错误: {str(e)}"
+            continue
+        if not isinstance(raw, dict):
+            yield line_no, None, "每行必须是一个JSON对象"
+            continue
+        yield line_no, raw, None
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _property_value(value):
+    """Neo4j属性只支持基本类型及其列表，其他值转换为JSON字符串"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, list) and all(isinstance(v, (str, int, float, bool)) for v in value):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def normalize_row(raw):
+    """
+    校验并规范化一行数据
+
+    实体: {"name", "type"?, "properties"?}
+    关系: {"source", "target", "relation", "source_type"?, "target_type"?, "properties"?}
+    未声明 kind 时，有 source/target 字段的视为关系，否则视为实体；
+    其余字段（CSV中的多余列）作为属性写入。
+
+    Returns:
+        tuple: ("entity" | "relation", 行数据)
+
+    Raises:
+        ValueError: 数据无效
+    """
+    data = {}
+    for key, value in raw.items():
+        if key is None:
+            raise ValueError("列数多于表头")
+        key = str(key).strip()
+        data[FIELD_ALIASES.get(key.lower(), key)] = value
+
+    kind = (_text(data.get("kind")) or "").lower()
+    if not kind:
+        kind = "relation" if "source" in data or "target" in data else "entity"
+    if kind in ENTITY_KINDS:
+        kind, fields = "entity", ENTITY_FIELDS
+    elif kind in RELATION_KINDS:
+        kind, fields = "relation", RELATION_FIELDS
+    else:
+        raise ValueError(f"未知的数据类型: {kind}")
+
+    properties = data.get("properties") or {}
+    if not isinstance(properties, dict):
+        raise ValueError("properties 必须是对象")
+    properties = dict(properties)
+    for key, value in data.items():
+        if key not in fields and key != "id":
+            properties[key] = value
+    properties = {
+        str(key): _property_value(value) for key, value in properties.items()
+        if value is not None and value != "" and key not in fields
+    }
+
+    if kind == "entity":
+        name = _text(data.get("name"))
+        if not name:
+            raise ValueError("实体缺少 name")
+        return kind, {"name": name, "type": _text(data.get("type")), "properties": properties}
+
+    source = _text(data.get("source"))
+    target = _text(data.get("target"))
+    relation = _text(data.get("relation")) or _text(data.get("type"))
+    if not source or not target or not relation:
+        raise ValueError("关系缺少 source、target 或 relation")
+    return kind, {
+        "source": source,
+        "target": target,
+        "relation": relation,
+        "source_type": _text(data.get("source_type")),
+        "target_type": _text(data.get("target_type")),
+        "properties": properties
+    }
+
+
+def partition_of(name, partitions):
+    """按名称计算分区，同一名称总在同一分区"""
+    return zlib.crc32(name.encode("utf-8")) % partitions
+
+
+def partition_rounds(partitions):
+    """
+    安排关系写入的轮次
+
+    关系按 (起点分区, 终点分区) 的无序对分组。第一轮写入两端在同一分区的组，
+    之后按循环赛编排，每轮中的分区对两两不相交。同一轮并行写入的批次
+    不会涉及同一个节点，避免锁冲突和死锁重试。
+
+    Returns:
+        list: 每轮的分区对列表 [(i, j), ...]，i <= j
+    """
+    rounds = [[(i, i) for i in range(partitions)]]
+    players = list(range(partitions))
+    if partitions % 2:
+        players.append(None)
+    n = len(players)
+    for _ in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            a, b = players[i], players[n - 1 - i]
+            if a is not None and b is not None:
+                pairs.append((min(a, b), max(a, b)))
+        if pairs:
+            rounds.append(pairs)
+        # 固定第一个位置，其余位置轮转
+        players = [players[0], players[-1]] + players[1:-1]
+    return rounds
+
+
+class BulkImporter:
+    """
+    批量导入实体和三元组
+
+    读取的数据先在内存中按分区缓冲，攒够 buffer_rows 行后写入一次：
+    先并行写入各分区的实体，再按 partition_rounds 的轮次并行写入关系。
+    没有指定类型的实体和端点在写入前按名称确定类型（见 ENTITY_TYPES_QUERY）。
+    每个分区内部用 write_in_batches 以 UNWIND 分批写入。
+    每次写入后用本次涉及的实体名称调用 on_flush(names)，供调用方增量更新索引。
+    """
+
+    def __init__(self, driver, partitions=4, batch_size=1000, buffer_rows=100000, progress=None,
+                 progress_interval=1.0, on_flush=None):
+        self.driver = driver
+        self.on_flush = on_flush
+        self.partitions = max(1, partitions)
+        self.batch_size = batch_size
+        self.buffer_rows = max(1, buffer_rows)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.rounds = partition_rounds(self.partitions)
+        self.stats = {
+            "rows_read": 0,
+            "entities": 0,
+            "relations": 0,
+            "invalid": 0,
+            "nodes_created": 0,
+            "relationships_created": 0,
+            "statements": 0,
+            "transactions": 0,
+            "flushes": 0
+        }
+        self.errors = []
+        self._started = None
+        self._last_report = 0
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._entities = [[] for _ in range(self.partitions)]
+        self._relations = {}
+        self._buffered = 0
+
+    def add(self, kind, row, line=None):
+        row["line"] = line
+        if kind == "entity":
+            self._entities[partition_of(row["name"], self.partitions)].append(row)
+        else:
+            a = partition_of(row["source"], self.partitions)
+            b = partition_of(row["target"], self.partitions)
+            self._relations.setdefault((min(a, b), max(a, b)), []).append(row)
+        self._buffered += 1
+        if self._buffered >= self.buffer_rows:
+            self.flush()
+
+    def _write(self, executor, query, groups):
+        """并行写入互不冲突的若干组数据"""
+        futures = [
+            executor.submit(write_in_batches, self.driver, query, rows, self.batch_size)
+            for rows in groups if rows
+        ]
+        for future in futures:
+            result = future.result()
+            self.stats["nodes_created"] += result["nodes_created"]
+            self.stats["relationships_created"] += result["relationships_created"]
+            self.stats["statements"] += result["statements"]
+            self.stats["transactions"] += result["transactions"]
+
+    def _reject(self, kind, row, error):
+        self.stats["entities" if kind == "entity" else "relations"] -= 1
+        self.stats["invalid"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": row.get("line"), "error": error})
+
+    def _existing_types(self, names):
+        """按名称查询已有实体的类型: {名称: [类型]}"""
+        names = sorted(names)
+        types = {}
+        if not names:
+            return types
+        with self.driver.session() as session:
+            for start in range(0, len(names), self.batch_size):
+                for record in session.run(ENTITY_TYPES_QUERY, names=names[start:start + self.batch_size]):
+                    types[record["name"]] = record["types"]
+        return types
+
+    def _resolve(self, kind, row, fields, existing):
+        """
+        填写行中缺少的类型，无法确定时返回 False
+
+        fields: [(名称字段, 类型字段)]
+        """
+        for name_field, type_field in fields:
+            if row[type_field] is not None:
+                continue
+            types = existing.get(row[name_field]) or []
+            if len(types) > 1:
+                self._reject(kind, row, f"存在多个同名实体 {row[name_field]} ({', '.join(map(str, types))})，"
+                                        f"请指定 {type_field}")
+                return False
+            row[type_field] = types[0] if types else UNKNOWN_TYPE
+        return True
+
+    def flush(self):
+        """写入缓冲区中的全部数据"""
+        if not self._buffered:
+            return
+        entity_fields = [("name", "type")]
+        relation_fields = [("source", "source_type"), ("target", "target_type")]
+        with ThreadPoolExecutor(max_workers=self.partitions, thread_name_prefix="graph-import") as executor:
+            # 先写入指定了类型的实体，没有类型的实体和端点再按名称匹配（包括刚写入的实体）
+            typed = [[row for row in rows if row["type"] is not None] for rows in self._entities]
+            untyped = [[row for row in rows if row["type"] is None] for rows in self._entities]
+            self._write(executor, IMPORT_ENTITY_QUERY, typed)
+
+            names = {row["name"] for rows in untyped for row in rows}
+            for rows in self._relations.values():
+                for row in rows:
+                    names.update(row[name] for name, type_field in relation_fields if row[type_field] is None)
+            existing = self._existing_types(names)
+
+            untyped = [[row for row in rows if self._resolve("entity", row, entity_fields, existing)]
+                       for rows in untyped]
+            self._write(executor, IMPORT_ENTITY_QUERY, untyped)
+            relations = {
+                pair: [row for row in rows if self._resolve("relation", row, relation_fields, existing)]
+                for pair, rows in self._relations.items()
+            }
+            for pairs in self.rounds:
+                self._write(executor, IMPORT_RELATION_QUERY, [relations.get(pair) for pair in pairs])
+        if self.on_flush is not None:
+            names = {row["name"] for rows in self._entities for row in rows}
+            for rows in self._relations.values():
+                for row in rows:
+                    names.add(row["source"])
+                    names.add(row["target"])
+            self.on_flush(sorted(names))
+        self.stats["flushes"] += 1
+        self._reset_buffers()
+        self._report(force=True)
+
+    def _report(self, force=False):
+        now = time.time()
+        if self.progress is None or (not force and now - self._last_report < self.progress_interval):
+            return
+        self._last_report = now
+        self.progress(stage="importing", **self.summary())
+
+    def summary(self):
+        elapsed = time.time() - self._started if self._started else 0
+        summary = dict(self.stats)
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["rows_per_second"] = round(self.stats["rows_read"] / elapsed, 1) if elapsed else 0.0
+        return summary
+
+    def run(self, rows):
+        """
+        导入 read_rows 产生的数据
+
+        无效行跳过并计数，前 MAX_REPORTED_ERRORS 条记录在结果的 errors 中。
+
+        Returns:
+            dict: 读取/写入的统计数据、耗时和吞吐量
+        """
+        self._started = time.time()
+        for line_no, raw, error in rows:
+            self.stats["rows_read"] += 1
+            if error is None:
+                try:
+                    kind, row = normalize_row(raw)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                self.stats["invalid"] += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({"line": line_no, "error": error})
+                continue
+            self.stats["entities" if kind == "entity" else "relations"] += 1
+            self.add(kind, row, line_no)
+            self._report()
+        self.flush()
+
+        summary = self.summary()
+        summary["errors"] = self.errors
+        logger.info(
+            f"批量导入完成: 读取 {summary['rows_read']} 行, 无效 {summary['invalid']} 行, "
+            f"新建 {summary['nodes_created']} 个节点 / {summary['relationships_created']} 个关系, "
+            f"用时 {summary['elapsed_seconds']} 秒 ({summary['rows_per_second']} 行/秒)"
+        )
+        return summary
@@ -0,0 +1,207 @@
+import time
+import logging
+import threading
+from .cypher import count_nodes_query, count_relationships_query, label_count_queries, relationship_type_count_queries
+
+logger = logging.getLogger(__name__)
+
+
+class GraphStats:
+    """
+    图谱统计缓存
+
+    统计数据在内存中保存，写接口和导入流程调用 node_created / relation_deleted 等方法增量更新，
+    后台线程定期用计数存储(count store)查询并发校准：
+        MATCH (n:`Label`) RETURN count(n)
+        MATCH ()-[r:`TYPE`]->() RETURN count(r)
+    这类查询直接读取数据库维护的计数，不需要扫描图。
+
+    注意：按标签计数时，同时带有多个标签的节点会计入每个标签。
+    """
+
+    def __init__(self, run_batch, reconcile_interval=300):
+        """
+        Args:
+            run_batch: run_batch(queries, errors=...) -> {名称: 记录列表}，
+                并发执行多个只读查询（Neo4jConnection.execute_batch_queries）
+            reconcile_interval (float): 校准间隔(秒)，0 表示不定期校准
+        """
+        self.run_batch = run_batch
+        self.reconcile_interval = reconcile_interval
+        self.node_count = 0
+        self.relation_count = 0
+        self.node_types = {}
+        self.relation_types = {}
+        self.computed_at = None
+        self.reconciled_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _batch(self, queries):
+        """并发执行查询，任何一个失败都视为本次校准失败，避免把失败当成计数0"""
+        errors = {}
+        results = self.run_batch(queries, errors=errors)
+        if errors:
+            raise RuntimeError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+        return results
+
+    def reconcile(self):
+        """用计数存储重新计算全部统计数据"""
+        with self._reconcile_lock:
+            started = time.time()
+            try:
+                results = self._batch({
+                    "node_count": {"query": count_nodes_query(alias="count")},
+                    "relation_count": {"query": count_relationships_query(alias="count")},
+                    "labels": {"query": "CALL db.labels() YIELD label RETURN label"},
+                    "relation_types": {
+                        "query": "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType"
+                    }
+                })
+                node_count = results["node_count"][0]["count"] if results["node_count"] else 0
+                relation_count = results["relation_count"][0]["count"] if results["relation_count"] else 0
+                labels = [record["label"] for record in results["labels"]]
+                rel_types = [record["relationshipType"] for record in results["relation_types"]]
+
+                # 每个标签/关系类型一个计数查询，并发执行
+                queries = label_count_queries(labels)
+                queries.update(relationship_type_count_queries(rel_types))
+                counts = self._batch(queries) if queries else {}
+
+                def count_of(name):
+                    records = counts.get(name)
+                    return records[0]["count"] if records else 0
+
+                node_types = {}
+                for i, label in enumerate(labels):
+                    if count_of(f"label_{i}"):
+                        node_types[label] = count_of(f"label_{i}")
+                relation_types = {}
+                for i, rel_type in enumerate(rel_types):
+                    if count_of(f"type_{i}"):
+                        relation_types[rel_type] = count_of(f"type_{i}")
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"校准统计数据失败: {str(e)}")
+                return False
+
+            now = time.time()
+            with self._lock:
+                self.node_count = node_count
+                self.relation_count = relation_count
+                self.node_types = node_types
+                self.relation_types = relation_types
+                self.computed_at = now
+                self.reconciled_at = now
+                self.last_error = None
+            logger.info(
+                f"统计数据已校准: {node_count} 节点, {relation_count} 关系, "
+                f"用时 {round(now - started, 3)} 秒"
+            )
+            return True
+
+    def _touch(self):
+        self.computed_at = time.time()
+
+    def _adjust(self, counter, key, delta):
+        if not key:
+            return
+        value = counter.get(key, 0) + delta
+        if value > 0:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
+
+    def node_created(self, label, count=1):
+        with self._lock:
+            self.node_count += count
+            self._adjust(self.node_types, label, count)
+            self._touch()
+
+    def node_deleted(self, label, relation_types=None):
+        """删除节点，relation_types 为随节点一起删除的关系类型列表"""
+        with self._lock:
+            self.node_count = max(0, self.node_count - 1)
+            self._adjust(self.node_types, label, -1)
+            for rel_type in relation_types or []:
+                self.relation_count = max(0, self.relation_count - 1)
+                self._adjust(self.relation_types, rel_type, -1)
+            self._touch()
+
+    def node_relabelled(self, old_label, new_label):
+        if old_label == new_label:
+            return
+        with self._lock:
+            self._adjust(self.node_types, old_label, -1)
+            self._adjust(self.node_types, new_label, 1)
+            self._touch()
+
+    def relation_created(self, rel_type, count=1):
+        with self._lock:
+            self.relation_count += count
+            self._adjust(self.relation_types, rel_type, count)
+            self._touch()
+
+    def relation_deleted(self, rel_type, count=1):
+        with self._lock:
+            self.relation_count = max(0, self.relation_count - count)
+            self._adjust(self.relation_types, rel_type, -count)
+            self._touch()
+
+    def invalidate(self):
+        """无法精确增量更新时（例如按条件批量删除），在后台立即校准"""
+        threading.Thread(target=self.reconcile, name="graph-stats-reconcile", daemon=True).start()
+
+    def snapshot(self):
+        """
+        返回当前统计数据，尚未计算过时同步计算一次
+
+        Returns:
+            dict: 统计数据，计算失败时返回 None
+        """
+        if self.reconciled_at is None and not self.reconcile():
+            return None
+        with self._lock:
+            return {
+                "node_count": self.node_count,
+                "relation_count": self.relation_count,
+                "node_types": sorted(
+                    ({"type": t, "count": c} for t, c in self.node_types.items()),
+                    key=lambda item: item["count"], reverse=True
+                ),
+                "relation_types": sorted(
+                    ({"type": t, "count": c} for t, c in self.relation_types.items()),
+                    key=lambda item: item["count"], reverse=True
+                ),
+                "computed_at": self.computed_at,
+                "reconciled_at": self.reconciled_at
+            }
+
+    def start(self):
+        """启动定期校准的后台线程"""
+        if self._thread is not None or not self.reconcile_interval or self.reconcile_interval <= 0:
+            return
+
+        def run():
+            while not self._stop.is_set():
+                self.reconcile()
+                self._stop.wait(self.reconcile_interval)
+
+        self._thread = threading.Thread(target=run, name="graph-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def metrics(self):
+        return {
+            "node_count": self.node_count,
+            "relation_count": self.relation_count,
+            "computed_at": self.computed_at,
+            "reconciled_at": self.reconciled_at,
+            "reconcile_interval": self.reconcile_interval,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,140 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 一次扩展整层节点；CALL 子查询中的 LIMIT 对每个节点单独生效，
+# 多取一个邻居用于判断该节点是否还有未返回的关系
+LEVEL_QUERY = """
+UNWIND $frontier AS fid
+MATCH (f) WHERE id(f) = fid
+CALL {{
+    WITH f
+    MATCH (f)-[r]-(m)
+    WHERE ($relation_types IS NULL OR type(r) IN $relation_types){new_filter}
+    RETURN r, m, false AS is_known
+    LIMIT $fanout{known_branch}
+}}
+RETURN id(f) AS from_id, r, id(r) AS rel_id, m, id(m) AS neighbor_id, is_known
+"""
+# 客户端已有的邻居单独查询：不占扇出名额，也不返回节点本身，只返回关系
+KNOWN_BRANCH = """
+    UNION ALL
+    WITH f
+    MATCH (f)-[r]-(m)
+    WHERE ($relation_types IS NULL OR type(r) IN $relation_types) AND elementId(m) IN $known
+    RETURN r, null AS m, true AS is_known"""
+
+
+def bfs_steps(center_id, center, depth=1, limit=100, fanout=50, relation_types=None, known=None):
+    """
+    逐层扩展子图的过程，不直接访问数据库
+
+    每层产生一个 (query, params)，调用方执行查询后用 send() 传回记录列表，
+    最后以 StopIteration.value 返回结果。同步和异步接口共用这段逻辑，
+    见 bounded_bfs / async_bounded_bfs。
+    """
+    query = LEVEL_QUERY.format(
+        new_filter=" AND NOT elementId(m) IN $known" if known else "",
+        known_branch=KNOWN_BRANCH if known else ""
+    )
+    nodes = {center_id: center}
+    visited = {center_id}
+    relationships = {}
+    truncated = set()
+    frontier = [center_id]
+
+    for level in range(depth):
+        if not frontier:
+            break
+        if len(nodes) >= limit:
+            truncated.update(frontier)
+            frontier = []
+            break
+
+        records = yield query, {
+            "frontier": frontier,
+            "relation_types": relation_types or None,
+            "known": list(known or ()),
+            "fanout": fanout + 1
+        }
+        if records is None:
+            raise RuntimeError("扩展子图失败")
+
+        by_source = {}
+        for record in records:
+            if record["is_known"]:
+                # 与客户端已有节点之间的关系：返回关系，但节点不返回也不继续展开
+                relationships[record["rel_id"]] = record["r"]
+                continue
+            by_source.setdefault(record["from_id"], []).append(record)
+
+        next_frontier = []
+        for node_id in frontier:
+            rows = by_source.get(node_id, [])
+            if len(rows) > fanout:
+                truncated.add(node_id)
+                rows = rows[:fanout]
+            for row in rows:
+                neighbor_id = row["neighbor_id"]
+                if neighbor_id not in visited:
+                    if len(nodes) >= limit:
+                        truncated.add(node_id)
+                        continue
+                    visited.add(neighbor_id)
+                    nodes[neighbor_id] = row["m"]
+                    next_frontier.append(neighbor_id)
+                relationships[row["rel_id"]] = row["r"]
+        frontier = next_frontier
+
+    # 达到深度上限时最后一层节点还没有展开，同样标记为未完全展开
+    truncated.update(frontier)
+    return {
+        "nodes": nodes,
+        "relationships": relationships,
+        "truncated": truncated,
+        "frontier": frontier
+    }
+
+
+def bounded_bfs(run_query, center_id, center, depth=1, limit=100, fanout=50, relation_types=None, known=None):
+    """
+    从中心节点逐层扩展子图
+
+    与可变长路径 (center)-[*0..depth]-() 不同，每层只查询一次当前边界节点的邻居，
+    遍历过程中就遵守节点总数 limit 和每个节点的扇出上限 fanout，不会先枚举全部路径。
+
+    Args:
+        run_query: run_query(query, params) -> 记录列表
+        center_id (int): 中心节点的内部id
+        center: 中心节点对象
+        depth (int): 最大层数
+        limit (int): 最多返回的节点数（包括中心节点）
+        fanout (int): 每个节点最多展开的关系数
+        relation_types (list): 只沿这些关系类型扩展，None 表示不限
+        known (set): 客户端已有节点的 element_id；这些节点不占扇出名额、不返回也不继续展开，
+            但它们与中心节点及新节点之间的关系仍然返回
+
+    Returns:
+        dict: nodes {id: 节点}, relationships {id: 关系},
+              truncated 未完全展开的节点id集合（包括因深度限制未展开的最后一层节点）,
+              frontier 因深度限制未展开的节点id列表
+    """
+    steps = bfs_steps(center_id, center, depth, limit, fanout, relation_types, known)
+    try:
+        query, params = next(steps)
+        while True:
+            query, params = steps.send(run_query(query, params))
+    except StopIteration as done:
+        return done.value
+
+
+async def async_bounded_bfs(run_query, center_id, center, depth=1, limit=100, fanout=50,
+                            relation_types=None, known=None):
+    """bounded_bfs 的异步版本，run_query 为协程函数"""
+    steps = bfs_steps(center_id, center, depth, limit, fanout, relation_types, known)
+    try:
+        query, params = next(steps)
+        while True:
+            query, params = steps.send(await run_query(query, params))
+    except StopIteration as done:
+        return done.value
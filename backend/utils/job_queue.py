@@ -0,0 +1,346 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class QueueFullError(Exception):
+    """等待中的任务数达到上限"""
+
+
+class MemoryJobStore:
+    """进程内任务存储，进程退出后任务记录即丢失"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, status=None, limit=50):
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values() if status is None or j["status"] == status]
+        jobs.sort(key=lambda j: j["created_at"], reverse=True)
+        return jobs[:limit]
+
+    def count(self, status):
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["status"] == status)
+
+    def heartbeat(self, owner, now):
+        with self._lock:
+            for job in self._jobs.values():
+                if job.get("owner") == owner and job["status"] in ACTIVE_STATES:
+                    job["heartbeat_at"] = now
+
+    def claim_stale(self, owner, now, lease, limit):
+        with self._lock:
+            claimed = []
+            for job in self._jobs.values():
+                if len(claimed) >= limit:
+                    break
+                if job["status"] in ACTIVE_STATES and (job.get("heartbeat_at") or 0) < now - lease:
+                    job.update(status=JOB_QUEUED, owner=owner, heartbeat_at=now, started_at=None)
+                    claimed.append(dict(job))
+            return claimed
+
+
+class SQLiteJobStore:
+    """
+    SQLite任务存储，进程重启后可以恢复未完成的任务
+
+    多个进程共用同一个数据库时，每个未完成的任务记录执行它的进程(owner)和
+    最近一次心跳时间(heartbeat_at)，只有心跳超时的任务才会被其他进程接管。
+    """
+
+    _JSON_FIELDS = ("payload", "progress", "result")
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+            """)
+            # 旧版本创建的表没有 owner / heartbeat_at 列
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        """打开连接，退出时提交事务并关闭连接"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _encode(self, fields):
+        return {k: (json.dumps(v, ensure_ascii=False) if k in self._JSON_FIELDS and v is not None else v)
+                for k, v in fields.items()}
+
+    def _decode(self, row):
+        job = dict(row)
+        for key in self._JSON_FIELDS:
+            if job.get(key) is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def create(self, job):
+        fields = self._encode(job)
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({placeholders})", list(fields.values()))
+
+    def update(self, job_id, **fields):
+        fields = self._encode(fields)
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", list(fields.values()) + [job_id])
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, status=None, limit=50):
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def count(self, status):
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def heartbeat(self, owner, now):
+        """刷新 owner 名下未完成任务的心跳时间"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (now, owner) + ACTIVE_STATES
+            )
+
+    def claim_stale(self, owner, now, lease, limit):
+        """
+        接管心跳超过 lease 秒的未完成任务，返回成功接管的任务
+
+        每个任务用一条带条件的 UPDATE 接管，多个进程同时恢复时只有一个能成功。
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND (heartbeat_at IS NULL OR heartbeat_at < ?) "
+                "ORDER BY created_at LIMIT ?",
+                ACTIVE_STATES + (now - lease, limit)
+            ).fetchall()
+        claimed = []
+        for row in rows:
+            with self._lock, self._connect() as conn:
+                updated = conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, started_at = NULL "
+                    "WHERE id = ? AND status IN (?, ?) AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                    (JOB_QUEUED, owner, now, row["id"]) + ACTIVE_STATES + (now - lease,)
+                ).rowcount
+            if updated:
+                claimed.append(self.get(row["id"]))
+        return claimed
+
+
+class JobQueue:
+    """
+    本地后台任务队列
+
+    任务提交后立即返回任务ID，由有限大小的线程池执行，
+    处理函数通过 progress 回调上报进度，状态保存在任务存储中供轮询。
+
+    每个队列有唯一的 owner，后台线程定期刷新本进程任务的心跳；
+    recover() 只接管心跳超过 lease 秒的任务，不会重复执行其他进程正在处理的任务。
+    """
+
+    def __init__(self, store, max_workers=2, max_pending=100, lease=60):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._heartbeat_thread = None
+        self._stop_event = threading.Event()
+        self._recovery_enabled = False
+
+    def register(self, kind, handler):
+        """注册任务处理函数: handler(payload, progress) -> result"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind, payload):
+        """提交任务，返回任务ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"未知的任务类型: {kind}")
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"等待中的任务过多 ({self._pending}/{self.max_pending})")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.store.create({
+            "id": job_id,
+            "kind": kind,
+            "status": JOB_QUEUED,
+            "payload": payload,
+            "progress": {},
+            "created_at": now,
+            "owner": self.owner,
+            "heartbeat_at": now
+        })
+        self.start_heartbeat()
+        self._executor.submit(self._run, job_id, kind, payload)
+        logger.info(f"任务已提交: {kind} ({job_id})")
+        return job_id
+
+    def recover(self):
+        """
+        接管已退出进程留下的未完成任务（心跳超过 lease 秒）并重新排队
+
+        只应在处理请求的服务进程中调用，CLI 命令等其他进程导入应用时不调用。
+        调用后心跳线程也会定期检查，其他进程退出后留下的任务在 lease 秒后被接管。
+        """
+        self._recovery_enabled = True
+        self.start_heartbeat()
+        return self._recover_stale()
+
+    def _recover_stale(self):
+        recovered = 0
+        for job in self.store.claim_stale(self.owner, time.time(), self.lease, self.max_pending):
+            if job["kind"] not in self._handlers:
+                logger.warning(f"无法恢复未知类型的任务: {job['kind']} ({job['id']})")
+                self.store.update(job["id"], status=JOB_FAILED, error=f"未知的任务类型: {job['kind']}",
+                                  finished_at=time.time())
+                continue
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._run, job["id"], job["kind"], job["payload"])
+            recovered += 1
+        if recovered:
+            logger.info(f"已恢复 {recovered} 个未完成的任务")
+        return recovered
+
+    def _heartbeat_loop(self):
+        while not self._stop_event.wait(max(self.lease / 3, 1)):
+            try:
+                self.store.heartbeat(self.owner, time.time())
+                if self._recovery_enabled:
+                    self._recover_stale()
+            except Exception as e:
+                logger.warning(f"刷新任务心跳失败: {str(e)}")
+
+    def start_heartbeat(self):
+        """启动心跳线程(幂等)"""
+        with self._lock:
+            if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+                return
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop,
+                name="job-heartbeat",
+                daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def _run(self, job_id, kind, payload):
+        now = time.time()
+        self.store.update(job_id, status=JOB_RUNNING, started_at=now, heartbeat_at=now)
+
+        def progress(**info):
+            job = self.store.get(job_id)
+            current = (job or {}).get("progress") or {}
+            current.update(info)
+            self.store.update(job_id, progress=current)
+
+        try:
+            result = self._handlers[kind](payload, progress)
+            self.store.update(job_id, status=JOB_SUCCEEDED, result=result, finished_at=time.time())
+            logger.info(f"任务完成: {kind} ({job_id})")
+        except Exception as e:
+            logger.error(f"任务执行失败: {kind} ({job_id}): {str(e)}", exc_info=True)
+            self.store.update(job_id, status=JOB_FAILED, error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def list(self, status=None, limit=50):
+        return self.store.list(status=status, limit=limit)
+
+    def metrics(self):
+        """返回队列使用情况"""
+        with self._lock:
+            pending = self._pending
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": pending,
+            "running": self.store.count(JOB_RUNNING),
+            "succeeded": self.store.count(JOB_SUCCEEDED),
+            "failed": self.store.count(JOB_FAILED)
+        }
+
+    def shutdown(self, wait=False):
+        self._stop_event.set()
+        self._executor.shutdown(wait=wait)
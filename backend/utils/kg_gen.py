@@ -2,12 +2,21 @@ import re
 import warnings
 warnings.filterwarnings("ignore")
 import os
-# from kg_gen import KGGen
+import logging
+import threading
+from types import SimpleNamespace
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 import openai
 from .neo4j_utils import save_to_neo4j
+from .text_chunker import split_paragraphs, chunk_paragraphs
+from .extraction_cache import ExtractionCache, make_cache_key
+from .entity_types import classify_entities, UNKNOWN_TYPE
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # 加载环境变量
 load_dotenv()
 
@@ -20,83 +29,265 @@ if os.getenv('HTTPS_PROXY'):
 # 设置OpenAI API密钥
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
-# 初始化KGGen
-kg = KGGen(
-    model=os.getenv('OPENAI_MODEL', 'gpt-4o'),
-    temperature=float(os.getenv('OPENAI_TEMPERATURE', '0.3')),
-    api_key=os.getenv('OPENAI_API_KEY')
-)
+# 长文档分块抽取配置
+CHUNK_SIZE = int(os.getenv('KG_CHUNK_SIZE', 4000))
+CHUNK_OVERLAP = int(os.getenv('KG_CHUNK_OVERLAP', 200))
+EXTRACT_WORKERS = int(os.getenv('KG_EXTRACT_WORKERS', 4))
+DEFAULT_CONTEXT = "新闻"
+
+# 抽取结果缓存配置
+CACHE_ENABLED = os.getenv('KG_CACHE_ENABLED', 'True') == 'True'
+CACHE_PATH = os.getenv('KG_CACHE_PATH', os.path.join('logs', 'extraction_cache.db'))
+CACHE_MAX_ENTRIES = int(os.getenv('KG_CACHE_MAX_ENTRIES', 10000))
+CACHE_TTL = int(os.getenv('KG_CACHE_TTL', 7 * 24 * 3600))
+
+# KGGen客户端（首次使用时初始化，也可以通过 set_kg_client 注入）
+_kg = None
+_cache = None
+_kg_lock = threading.Lock()
+
+
+def get_kg_client():
+    """获取知识图谱抽取客户端，默认使用KGGen"""
+    global _kg
+    if _kg is None:
+        with _kg_lock:
+            if _kg is None:
+                from kg_gen import KGGen
+                _kg = KGGen(
+                    model=os.getenv('OPENAI_MODEL', 'gpt-4o'),
+                    temperature=float(os.getenv('OPENAI_TEMPERATURE', '0.3')),
+                    api_key=os.getenv('OPENAI_API_KEY')
+                )
+    return _kg
+
+
+def get_extraction_cache():
+    """获取抽取结果缓存，未启用时返回 None"""
+    global _cache
+    if _cache is None and CACHE_ENABLED:
+        with _kg_lock:
+            if _cache is None:
+                try:
+                    _cache = ExtractionCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+                except Exception as e:
+                    logger.warning(f"无法初始化抽取缓存，将不使用缓存: {str(e)}")
+                    return None
+    return _cache
+
+
+def set_extraction_cache(cache):
+    """替换抽取结果缓存，传入 None 则禁用"""
+    global _cache, CACHE_ENABLED
+    _cache = cache
+    CACHE_ENABLED = cache is not None
+
+
+def set_kg_client(client):
+    """
+    注入抽取客户端（例如测试用的本地模型）
+
+    客户端需提供 generate(input_data, context, cluster) 方法，
+    返回带 entities 和 relations 属性的图对象；分块抽取时还会调用 cluster(graph, context)。
+    """
+    global _kg
+    _kg = client
 
 
 def get_entity_type(entity):
     """
-    Function to analyze and classify an entity's type using OpenAI's GPT model.
+    判断单个实体的类型，批量场景请使用 classify_entities
     """
+    return classify_entities([entity]).get(str(entity), UNKNOWN_TYPE)
+
+
+def _build_graph(entities, relations):
+    """构造可交给客户端聚类的图对象"""
+    edges = {relation[1] for relation in relations}
     try:
-        # Create the message to be sent to the OpenAI API
-        messages = [
-            {"role": "system", "content": "You are an expert in analyzing the type of entities. Based on the given entity, classify it into categories like Person, Location, Time, Organization, Event, or Other."},
-            {"role": "user", "content": f"Please classify the following entity: {entity}"},
-            {"role": "assistant", "content": """
-                Example 1: 
-                Input: Please classify the following entity: 坂本龍馬 
-                Output: Person
-                Example 2: 
-                Input: Please classify the following entity: 日本
-                Output: Location
-                Example 3: 
-                Input: Please classify the following entity: 1800-01-01
-                Output: Time
-                Example 4: 
-                Input: Please classify the following entity: 美国商务部
-                Output: Organization
-                Example 5: 
-                Input: Please classify the following entity: 杀人事件
-                Output: Event
-                Example 6: 
-                Input: Please classify the following entity: 子产品供应链
-                Output: Other
-                Example 7: 
-                Input: Please classify the following entity: 西游记
-                Output: Work
-            """}
-        ]
-
-        # Call OpenAI API for classification
-        response = openai.chat.completions.create(
-            model="gpt-4o",  # GPT model of your choice
-            messages=messages,
-            max_tokens=100,
-            temperature=0.3,
-            n=1,
-            stop=None
+        from kg_gen.models import Graph
+    except ImportError:
+        return SimpleNamespace(entities=entities, relations=relations, edges=edges)
+    return Graph(entities=entities, relations=relations, edges=edges)
+
+
+def merge_graphs(graphs):
+    """
+    合并各文本块的抽取结果，按规范化后的名称去重实体和关系
+
+    Returns:
+        tuple: (实体集合, 关系三元组集合)
+    """
+    entities = set()
+    relations = set()
+    for graph in graphs:
+        for entity in graph.entities:
+            entity = str(entity).strip()
+            if entity:
+                entities.add(entity)
+        for source, relation, target in graph.relations:
+            targets = target if isinstance(target, (list, tuple, set)) else [target]
+            for t in targets:
+                triple = (str(source).strip(), str(relation).strip(), str(t).strip())
+                if all(triple):
+                    relations.add(triple)
+                    entities.update((triple[0], triple[2]))
+    return entities, relations
+
+
+def _cache_key(client, kind, content, context, cluster):
+    """缓存键：内容 + 模型名 + 温度 + 上下文"""
+    return make_cache_key(
+        kind,
+        content,
+        getattr(client, "model", type(client).__name__),
+        getattr(client, "temperature", None),
+        context,
+        cluster
+    )
+
+
+def _graph_to_cache(graph):
+    entities, relations = merge_graphs([graph])
+    return {"entities": sorted(entities), "relations": sorted(list(r) for r in relations)}
+
+
+def _graph_from_cache(value):
+    relations = {tuple(r) for r in value["relations"]}
+    return SimpleNamespace(
+        entities=set(value["entities"]),
+        relations=relations,
+        edges={r[1] for r in relations}
+    )
+
+
+def _generate_cached(client, cache, text, context, cluster):
+    """单次抽取，命中缓存时不调用模型"""
+    if cache is None:
+        return client.generate(input_data=text, context=context, cluster=cluster)
+    key = _cache_key(client, "generate", text, context, cluster)
+    cached = cache.get(key)
+    if cached is not None:
+        return _graph_from_cache(cached)
+    graph = client.generate(input_data=text, context=context, cluster=cluster)
+    cache.put(key, _graph_to_cache(graph))
+    return graph
+
+
+def generate_graph(text=None, client=None, context=DEFAULT_CONTEXT, cluster=True,
+                   chunk_size=None, overlap=None, max_workers=None, cache=None,
+                   paragraphs=None, progress=None):
+    """
+    抽取知识图谱：短文本一次调用，长文本按段落/句子分块后并行抽取，
+    合并去重后再统一聚类。每个文本块和聚类结果都会写入抽取缓存。
+
+    也可以用 paragraphs 传入段落迭代器（例如逐页读取的PDF），
+    文本块按窗口依次消费和抽取，不需要先拼接出完整文本。
+    """
+    client = client or get_kg_client()
+    cache = cache if cache is not None else get_extraction_cache()
+    chunk_size = chunk_size or CHUNK_SIZE
+    overlap = CHUNK_OVERLAP if overlap is None else overlap
+    max_workers = max_workers or EXTRACT_WORKERS
+
+    if paragraphs is None:
+        paragraphs = split_paragraphs(text)
+    chunks = chunk_paragraphs(paragraphs, chunk_size, overlap)
+
+    # 只有一个文本块时直接抽取
+    window = list(islice(chunks, 2))
+    if len(window) <= 1:
+        if not window:
+            return _build_graph(set(), set())
+        return _generate_cached(client, cache, text if text is not None else window[0], context, cluster)
+
+    def extract_chunk(item):
+        return client.generate(input_data=item[1], context=context, cluster=False)
+
+    # 每个窗口包含若干文本块：先批量查询缓存，只对未命中的文本块调用模型
+    window_size = max_workers * 2
+    entities, relations = set(), set()
+    total_chunks = 0
+    total_hits = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kg-extract") as executor:
+        window += list(islice(chunks, window_size - len(window)))
+        while window:
+            keys = [_cache_key(client, "generate", chunk, context, False) for chunk in window]
+            results = cache.get_many(keys) if cache is not None else {}
+            missing = [(key, chunk) for key, chunk in zip(keys, window) if key not in results]
+
+            fresh = {}
+            for (key, _), graph in zip(missing, executor.map(extract_chunk, missing)):
+                fresh[key] = _graph_to_cache(graph)
+            if cache is not None and fresh:
+                cache.put_many(fresh)
+            results.update(fresh)
+
+            window_entities, window_relations = merge_graphs(_graph_from_cache(results[key]) for key in keys)
+            entities |= window_entities
+            relations |= window_relations
+
+            total_chunks += len(window)
+            total_hits += len(window) - len(missing)
+            if progress:
+                progress(chunks_processed=total_chunks)
+            window = list(islice(chunks, window_size))
+
+    logger.info(
+        f"长文本分块抽取: {total_chunks} 个文本块, 缓存命中 {total_hits} 个, 并发数 {max_workers}"
+    )
+
+    if not (cluster and hasattr(client, "cluster")):
+        return _build_graph(entities, relations)
+
+    # 聚类结果同样按合并后的图内容缓存
+    cluster_key = None
+    if cache is not None:
+        cluster_key = _cache_key(
+            client, "cluster", [sorted(entities), sorted(list(r) for r in relations)], context, True
         )
-        
-        # Extract the entity type from the response
-        return response['choices'][0]['message']['content'].strip()
-    except Exception as e:
-        print(f"Error with OpenAI API: {e}")
-        return "Unknown"  # Default return value in case of error
+        clustered = cache.get(cluster_key)
+        if clustered is not None:
+            return _graph_from_cache(clustered)
+
+    graph = client.cluster(_build_graph(entities, relations), context)
+    if cache is not None:
+        cache.put(cluster_key, _graph_to_cache(graph))
+    return graph
 
 
-def extract_entities_and_relations(text):
+def extract_entities_and_relations(text=None, client=None, context=DEFAULT_CONTEXT,
+                                   chunk_size=None, overlap=None, max_workers=None,
+                                   paragraphs=None, progress=None):
     """
-    从文本中提取实体和关系，接口适配函数
+    从文本（或段落迭代器）中提取实体和关系，接口适配函数
     """
-    if not text or len(text.strip()) == 0:
+    if paragraphs is None and (not text or len(text.strip()) == 0):
         return [], []
     
-    # 使用KGGen生成知识图谱
-    graph = kg.generate(input_data=text, context="新闻", cluster=True)
+    # 使用KGGen生成知识图谱（长文本自动分块并行抽取）
+    graph = generate_graph(
+        text,
+        client=client,
+        context=context,
+        cluster=True,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        max_workers=max_workers,
+        paragraphs=paragraphs,
+        progress=progress
+    )
+    
+    # 批量判断实体类型（规则 + 缓存 + 批量模型请求）
+    entity_types = classify_entities(graph.entities)
     
     # 转换为需要的格式
     entities = []
     for entity in graph.entities:
         print(f"Entity: {entity}")
         
-        # 使用 OpenAI 判断实体类型
-        # entity_type = get_entity_type(entity)
-        entity_type = "Unknown"  # 暂时使用 Unknown 作为默认值
+        entity_type = entity_types.get(str(entity), UNKNOWN_TYPE)
         entities.append({
             "name": entity,
             "type": entity_type
@@ -122,5 +313,3 @@ def extract_entities_and_relations(text):
             })
     
     return entities, relations 
-
-
@@ -0,0 +1,217 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from neo4j import GraphDatabase, exceptions
+
+logger = logging.getLogger(__name__)
+
+
+class Neo4jSessionPool:
+    """
+    Neo4j会话层：共享一个驱动（驱动内部维护连接池），
+    由后台线程定期做存活检查，取代每次查询前的 "RETURN 1"，
+    并统计会话使用情况供 /api/_metrics 展示。
+    """
+
+    def __init__(self, uri, user, password,
+                 max_pool_size=50,
+                 acquisition_timeout=60,
+                 max_connection_lifetime=300,
+                 liveness_check_timeout=30,
+                 health_check_interval=30,
+                 max_retries=3):
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.max_pool_size = max_pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.liveness_check_timeout = liveness_check_timeout
+        self.health_check_interval = health_check_interval
+        self.max_retries = max_retries
+
+        self._driver = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._health_thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+        # 会话使用统计
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._sessions_opened = 0
+        self._session_errors = 0
+        self._total_session_time = 0.0
+        self._healthy = None
+        self._last_check_at = None
+        self._last_check_error = None
+        self._driver_created = 0
+
+    def get_driver(self):
+        """获取共享驱动(懒加载，带重试)"""
+        if self._driver is not None:
+            return self._driver
+
+        with self._lock:
+            if self._driver is not None:
+                return self._driver
+
+            retries = 0
+            while retries < self.max_retries:
+                try:
+                    driver = GraphDatabase.driver(
+                        self.uri,
+                        auth=(self.user, self.password),
+                        max_connection_pool_size=self.max_pool_size,
+                        connection_acquisition_timeout=self.acquisition_timeout,
+                        max_connection_lifetime=self.max_connection_lifetime,
+                        liveness_check_timeout=self.liveness_check_timeout
+                    )
+                    # 仅在创建驱动时验证一次连接
+                    driver.verify_connectivity()
+                    self._driver = driver
+                    self._driver_created += 1
+                    self._mark_health(True)
+                    logger.info(f"成功连接到Neo4j数据库 (连接池大小: {self.max_pool_size})")
+                    break
+                except exceptions.ServiceUnavailable as e:
+                    retries += 1
+                    self._mark_health(False, e)
+                    if retries >= self.max_retries:
+                        logger.error(f"无法连接到Neo4j数据库，请确保数据库正在运行 (尝试 {retries}/{self.max_retries})")
+                    else:
+                        logger.warning(f"Neo4j连接失败，正在重试 ({retries}/{self.max_retries})...")
+                        time.sleep(1)
+                except Exception as e:
+                    self._mark_health(False, e)
+                    logger.error(f"连接Neo4j数据库时出错: {str(e)}")
+                    break
+
+        if self._driver is not None:
+            self.start_health_check()
+        return self._driver
+
+    def reset(self):
+        """丢弃并关闭当前驱动，下次使用时重新建立（会中断正在使用的会话，只在关闭时调用）"""
+        with self._lock:
+            driver, self._driver = self._driver, None
+        if driver is not None:
+            try:
+                driver.close()
+            except Exception as e:
+                logger.warning(f"关闭失效的Neo4j驱动时出错: {str(e)}")
+
+    @contextmanager
+    def session(self, **kwargs):
+        """从连接池获取会话，并记录使用统计"""
+        driver = self.get_driver()
+        if driver is None:
+            raise exceptions.ServiceUnavailable("无法获取Neo4j连接")
+
+        with self._stats_lock:
+            self._in_use += 1
+            self._sessions_opened += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        started = time.perf_counter()
+        try:
+            with driver.session(**kwargs) as session:
+                yield session
+        except Exception:
+            with self._stats_lock:
+                self._session_errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+                self._total_session_time += time.perf_counter() - started
+
+    def report_failure(self, error):
+        """
+        查询遇到连接错误时调用：标记为不健康并立即唤醒后台检查
+
+        这里不关闭驱动，其他线程正在使用的会话不受影响；临时错误由驱动自身的
+        路由和重试处理。
+        """
+        self._mark_health(False, error)
+        self._wake_event.set()
+
+    def _mark_health(self, healthy, error=None):
+        self._healthy = healthy
+        self._last_check_at = time.time()
+        self._last_check_error = str(error) if error else None
+
+    def check_health(self):
+        """
+        执行一次存活检查（只由后台检查线程调用）
+
+        失败时只标记为不健康，不关闭共享驱动（其他线程可能正在使用它的会话）。
+        失效的连接由驱动自己的连接池丢弃（liveness_check_timeout / max_connection_lifetime），
+        数据库恢复后新会话会自动建立新连接，下一次检查成功时恢复为健康。
+        """
+        driver = self._driver
+        if driver is None:
+            return False
+        try:
+            driver.verify_connectivity()
+            self._mark_health(True)
+            return True
+        except Exception as e:
+            logger.warning(f"Neo4j存活检查失败: {str(e)}")
+            self._mark_health(False, e)
+            return False
+
+    def _health_loop(self):
+        while not self._stop_event.is_set():
+            # 到达检查间隔或有查询报告连接错误时执行检查
+            self._wake_event.wait(self.health_check_interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            if self._driver is None:
+                # 驱动尚未建立，尝试建立
+                self.get_driver()
+            else:
+                self.check_health()
+
+    def start_health_check(self):
+        """启动后台存活检查线程(幂等)"""
+        if self.health_check_interval <= 0:
+            return
+        if self._health_thread is not None and self._health_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._health_thread = threading.Thread(
+            target=self._health_loop,
+            name="neo4j-health-check",
+            daemon=True
+        )
+        self._health_thread.start()
+
+    def close(self):
+        """停止存活检查并关闭驱动"""
+        self._stop_event.set()
+        self._wake_event.set()
+        self.reset()
+        logger.info("Neo4j数据库连接已关闭")
+
+    def metrics(self):
+        """返回连接池使用情况"""
+        with self._stats_lock:
+            opened = self._sessions_opened
+            return {
+                "connected": self._driver is not None,
+                "healthy": self._healthy,
+                "last_check_at": self._last_check_at,
+                "last_check_error": self._last_check_error,
+                "health_check_interval": self.health_check_interval,
+                "max_pool_size": self.max_pool_size,
+                "acquisition_timeout": self.acquisition_timeout,
+                "sessions_in_use": self._in_use,
+                "peak_sessions_in_use": self._peak_in_use,
+                "sessions_opened": opened,
+                "session_errors": self._session_errors,
+                "avg_session_ms": round(self._total_session_time * 1000 / opened, 3) if opened else 0,
+                "drivers_created": self._driver_created
+            }
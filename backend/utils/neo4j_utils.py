@@ -3,6 +3,8 @@ import logging
 from neo4j import GraphDatabase
 from neo4j.exceptions import ServiceUnavailable, AuthError
 from dotenv import load_dotenv
+from .cypher import set_sort_key
+from .entity_types import UNKNOWN_TYPE
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +13,143 @@ logger = logging.getLogger(__name__)
 # 加载环境变量
 load_dotenv()
 
+# 批量写入默认参数：每个 UNWIND 语句的行数，以及每个事务包含的批次数
+DEFAULT_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", 500))
+DEFAULT_BATCHES_PER_TX = int(os.getenv("NEO4J_BATCHES_PER_TX", 10))
+
+# text2kg 页面使用的实体/关系模板（按名称和类型合并）
+#
+# 实体以 (name, type) 为键，与 schema 的唯一约束和批量导入一致。早期写入的节点类型都是 "Unknown"：
+#   - 同名节点只有 "Unknown" 时，带类型的实体直接把它升级为该类型，不另建节点；
+#   - 类型为 "Unknown" 的实体遇到已有的同名节点时合并到已有节点（优先带类型的节点）。
+# 同一批中的行由 dedupe_named_entities() 预先去重，避免同名的 "Unknown" 行和带类型的行各建一个节点。
+NAMED_ENTITY_UNWIND_QUERY = (
+    "UNWIND $rows AS row "
+    "OPTIONAL MATCH (e:Entity {name: row.name}) "
+    "WITH row, collect(DISTINCT e.type) AS types "
+    "WITH row, types, CASE "
+    f"WHEN row.type = '{UNKNOWN_TYPE}' AND size(types) > 0 "
+    f"THEN head([t IN types WHERE t <> '{UNKNOWN_TYPE}'] + types) "
+    "ELSE row.type END AS entity_type "
+    f"OPTIONAL MATCH (u:Entity {{name: row.name, type: '{UNKNOWN_TYPE}'}}) "
+    f"WHERE entity_type <> '{UNKNOWN_TYPE}' AND NOT entity_type IN types "
+    "SET u.type = entity_type "
+    "WITH row, entity_type "
+    "MERGE (n:Entity {name: row.name, type: entity_type}) "
+    f"{set_sort_key('n', on_create=True)}"
+)
+# 关系的每个端点只匹配一个节点：类型与 source_type/target_type 相同的优先，其次是带类型的节点，
+# 不会连接到所有同名节点
+NAMED_RELATION_UNWIND_QUERY = (
+    "UNWIND $rows AS row "
+    "CALL { "
+    "WITH row "
+    "MATCH (a:Entity {name: row.source}) "
+    f"RETURN a ORDER BY CASE WHEN a.type = row.source_type THEN 0 WHEN a.type <> '{UNKNOWN_TYPE}' THEN 1 ELSE 2 END "
+    "LIMIT 1 "
+    "} "
+    "CALL { "
+    "WITH row "
+    "MATCH (b:Entity {name: row.target}) "
+    f"RETURN b ORDER BY CASE WHEN b.type = row.target_type THEN 0 WHEN b.type <> '{UNKNOWN_TYPE}' THEN 1 ELSE 2 END "
+    "LIMIT 1 "
+    "} "
+    "MERGE (a)-[:RELATION {relation: row.relation}]->(b)"
+)
+
+
+def dedupe_named_entities(entities):
+    """
+    按名称整理一批实体：同名的实体有具体类型时去掉其 "Unknown" 行，重复的 (name, type) 只保留一行
+
+    Returns:
+        tuple: (实体行列表, {名称: 关系端点使用的类型})
+    """
+    types = {}
+    for entity in entities:
+        names = types.setdefault(entity["name"], [])
+        if entity["type"] not in names:
+            names.append(entity["type"])
+    rows = []
+    endpoint_types = {}
+    for name, names in types.items():
+        typed = [t for t in names if t != UNKNOWN_TYPE] or names
+        rows.extend({"name": name, "type": t} for t in typed)
+        endpoint_types[name] = typed[0]
+    return rows, endpoint_types
+
+
+# 带 id 的实体/关系模型（按 id 合并）
+ENTITY_UNWIND_QUERY = (
+    "UNWIND $rows AS row "
+    "MERGE (n:Entity {id: row.id}) "
+    "SET n.name = row.name, "
+    "n.type = row.type, "
+    "n.color = row.color "
+    f"{set_sort_key('n')}"
+)
+RELATION_UNWIND_QUERY = (
+    "UNWIND $rows AS row "
+    "MATCH (source:Entity {id: row.source}), "
+    "(target:Entity {id: row.target}) "
+    "MERGE (source)-[r:RELATES {type: row.type}]->(target) "
+    "SET r.name = row.name"
+)
+
+
+def chunked(rows, size):
+    """按固定大小切分列表"""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def write_in_batches(driver, query, rows, batch_size=None, batches_per_tx=None):
+    """
+    使用 UNWIND 分批写入数据
+
+    每批 batch_size 行作为一条 UNWIND 语句的 $rows 参数，
+    每 batches_per_tx 批合并为一个托管写事务(失败时由驱动自动重试)。
+
+    Args:
+        driver: 共享的Neo4j驱动
+        query (str): 以 "UNWIND $rows AS row" 开头的写入语句
+        rows (list): 行数据
+        batch_size (int): 每条语句的行数
+        batches_per_tx (int): 每个事务包含的批次数
+
+    Returns:
+        dict: 写入的行数、语句数、事务数，以及实际新建的节点数和关系数
+    """
+    batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+    batches_per_tx = max(1, batches_per_tx or DEFAULT_BATCHES_PER_TX)
+    rows = list(rows)
+    stats = {"rows": len(rows), "statements": 0, "transactions": 0,
+             "nodes_created": 0, "relationships_created": 0}
+    if not rows:
+        return stats
+
+    def _write_batches(tx, batches):
+        # 事务可能被驱动重试，计数只在事务成功后累加
+        created = {"nodes_created": 0, "relationships_created": 0}
+        for batch in batches:
+            summary = tx.run(query, rows=batch).consume()
+            counters = getattr(summary, "counters", None)
+            if counters is not None:
+                created["nodes_created"] += counters.nodes_created
+                created["relationships_created"] += counters.relationships_created
+        return created
+
+    batches = list(chunked(rows, batch_size))
+    with driver.session() as session:
+        for tx_batches in chunked(batches, batches_per_tx):
+            created = session.execute_write(_write_batches, tx_batches)
+            stats["statements"] += len(tx_batches)
+            stats["transactions"] += 1
+            for key, value in created.items():
+                stats[key] += value
+
+    return stats
+
 class Neo4jConnection:
     def __init__(self):
         self.uri = os.getenv("NEO4J_URI")
@@ -46,6 +185,7 @@ class Neo4jConnection:
             "SET n.name = $name, "
             "n.type = $type, "
             "n.color = $color "
+            f"{set_sort_key('n')} "
             "RETURN n"
         )
         result = tx.run(query, id=entity["id"], name=entity["name"],
@@ -65,39 +205,42 @@ class Neo4jConnection:
                        type=relation["type"], name=relation["name"])
         return result.single()
 
-def save_to_neo4j(entities, relations):
+def save_to_neo4j(entities, relations, driver=None, batch_size=None):
     """
     将知识图谱的实体和关系保存到Neo4j数据库
     
     Args:
         entities (list): 实体列表
         relations (list): 关系列表
+        driver: 可选，复用的共享驱动；未提供时临时建立连接
+        batch_size (int): 每条 UNWIND 语句的行数
     
     Returns:
         bool: 操作是否成功
     """
-    conn = Neo4jConnection()
+    conn = None
     try:
-        conn.connect()
-        with conn.driver.session() as session:
-            # 创建实体
-            for entity in entities:
-                try:
-                    session.execute_write(conn.create_entity, entity)
-                    logger.info(f"成功创建实体: {entity['name']}")
-                except Exception as e:
-                    logger.error(f"创建实体失败 {entity['name']}: {str(e)}")
-                    raise
-                
-            # 创建关系
-            for relation in relations:
-                try:
-                    session.execute_write(conn.create_relation, relation)
-                    logger.info(f"成功创建关系: {relation['name']}")
-                except Exception as e:
-                    logger.error(f"创建关系失败 {relation['name']}: {str(e)}")
-                    raise
-                    
+        if driver is None:
+            conn = Neo4jConnection()
+            conn.connect()
+            driver = conn.driver
+
+        entity_rows = [
+            {"id": e["id"], "name": e["name"], "type": e["type"], "color": e["color"]}
+            for e in entities
+        ]
+        relation_rows = [
+            {"source": r["source"], "target": r["target"], "type": r["type"], "name": r["name"]}
+            for r in relations
+        ]
+
+        # 先写实体，再写关系，保证关系两端节点已存在
+        entity_stats = write_in_batches(driver, ENTITY_UNWIND_QUERY, entity_rows, batch_size)
+        logger.info(f"成功创建实体: {entity_stats['rows']} 个, {entity_stats['statements']} 条语句")
+
+        relation_stats = write_in_batches(driver, RELATION_UNWIND_QUERY, relation_rows, batch_size)
+        logger.info(f"成功创建关系: {relation_stats['rows']} 个, {relation_stats['statements']} 条语句")
+
         return True
                 
     except Exception as e:
@@ -105,4 +248,5 @@ def save_to_neo4j(entities, relations):
         return False
         
     finally:
-        conn.close() 
\ No newline at end of file
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,77 @@
+import json
+import time
+import base64
+import threading
+
+
+def encode_cursor(values):
+    """把排序键元组编码为不透明的游标字符串"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    解码游标，返回排序键列表
+
+    Raises:
+        ValueError: 游标格式不正确
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return values
+
+
+def keyset_condition(columns, prefix="after"):
+    """
+    生成 "排序键元组 > 游标" 的Cypher条件
+
+    例如 columns=["a", "b"] 生成:
+        (a > $after_0 OR (a = $after_0 AND b > $after_1))
+
+    Returns:
+        tuple: (条件字符串, 参数名列表)
+    """
+    params = [f"{prefix}_{i}" for i in range(len(columns))]
+    condition = f"{columns[-1]} > ${params[-1]}"
+    for column, param in zip(reversed(columns[:-1]), reversed(params[:-1])):
+        condition = f"{column} > ${param} OR ({column} = ${param} AND ({condition}))"
+    return f"({condition})", params
+
+
+class CountCache:
+    """
+    计数缓存：分页时的总数在 ttl 秒内复用，不必每次请求都做全量统计
+    """
+
+    def __init__(self, ttl=60, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """返回 (计数, 计算时间)，过期或不存在时调用 compute() 重新计算"""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        if entry and now - entry[1] <= self.ttl:
+            return entry
+
+        value = compute()
+        entry = (value, now)
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                oldest = min(self._data, key=lambda k: self._data[k][1])
+                self._data.pop(oldest, None)
+            self._data[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,319 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from .extraction_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _write_connection(path):
+    """打开写连接，退出时提交事务并关闭连接"""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+class _ReadConnections:
+    """
+    每个线程复用一个只读连接（自动提交模式，读取不会留下未结束的事务）
+
+    数据库使用 WAL 日志模式，读取不会被其他进程的写入阻塞。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+
+class SQLiteVersionStore:
+    """
+    保存在SQLite中的图谱版本号，同一台机器上的所有工作进程和 flask CLI 共享
+
+    每个请求只读取一次（一次主键查询，不写入）；写入图谱时 bump() 递增。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._readers = _ReadConnections(path)
+        with _write_connection(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS response_cache_meta (name TEXT PRIMARY KEY, value INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO response_cache_meta (name, value) VALUES ('version', 0)")
+
+    def version(self):
+        return self._readers.get().execute(
+            "SELECT value FROM response_cache_meta WHERE name = 'version'").fetchone()[0]
+
+    def bump(self, conn=None):
+        """递增版本号并返回新版本号；conn 不为空时在该连接的事务中执行"""
+        if conn is None:
+            with _write_connection(self.path) as conn:
+                return self.bump(conn)
+        conn.execute("UPDATE response_cache_meta SET value = value + 1 WHERE name = 'version'")
+        return conn.execute("SELECT value FROM response_cache_meta WHERE name = 'version'").fetchone()[0]
+
+
+class MemoryCacheBackend:
+    """
+    进程内LRU缓存，条目超过 ttl 秒后失效，命中时不访问磁盘
+
+    versions 为 SQLiteVersionStore 时图谱版本号在所有工作进程间共享，
+    任一进程（或 flask CLI）写入图谱后其他进程的缓存随之失效；
+    为 None 时版本号只保存在当前进程中，只适用于单进程部署。
+    """
+
+    def __init__(self, max_entries=512, ttl=300, versions=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = versions
+        self._data = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _observe(self, version):
+        """版本号变化后旧版本的条目不会再被命中，清空释放内存"""
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._data.clear()
+        return version
+
+    def version(self):
+        if self.versions is None:
+            return self._version
+        return self._observe(self.versions.version())
+
+    def bump(self):
+        if self.versions is None:
+            return self._observe(self._version + 1)
+        return self._observe(self.versions.bump())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "shared_version": self.versions is not None,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "evictions": self.evictions
+            }
+
+
+class SQLiteCacheBackend:
+    """
+    SQLite缓存，同一台机器上的多个进程共享缓存内容和图谱版本号
+
+    读取只执行一次查询，不写入（过期条目在写入时淘汰）；条目数保存在 response_cache_meta 中
+    随写入增量维护，超过 max_entries 时按创建时间淘汰最早的条目（近似LRU）。
+    """
+
+    def __init__(self, path, max_entries=512, ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.versions = SQLiteVersionStore(path)
+        self._readers = _ReadConnections(path)
+        with _write_connection(path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_created ON response_cache(created_at)")
+            conn.execute("INSERT OR IGNORE INTO response_cache_meta (name, value) "
+                         "SELECT 'entries', count(*) FROM response_cache")
+
+    def get(self, key):
+        row = self._readers.get().execute(
+            "SELECT value, created_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock, _write_connection(self.path) as conn:
+            updated = conn.execute(
+                "UPDATE response_cache SET value = ?, created_at = ?, accessed_at = ? WHERE key = ?",
+                (data, now, now, key)
+            ).rowcount
+            if updated:
+                return
+            conn.execute(
+                "INSERT INTO response_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, data, now, now)
+            )
+            conn.execute("UPDATE response_cache_meta SET value = value + 1 WHERE name = 'entries'")
+            count = conn.execute("SELECT value FROM response_cache_meta WHERE name = 'entries'").fetchone()[0]
+            if count > self.max_entries:
+                removed = conn.execute(
+                    "DELETE FROM response_cache WHERE key IN "
+                    "(SELECT key FROM response_cache ORDER BY created_at LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+                conn.execute("UPDATE response_cache_meta SET value = value - ? WHERE name = 'entries'", (removed,))
+                self.evictions += removed
+
+    def version(self):
+        return self.versions.version()
+
+    def bump(self):
+        with self._lock, _write_connection(self.path) as conn:
+            conn.execute("DELETE FROM response_cache")
+            conn.execute("UPDATE response_cache_meta SET value = 0 WHERE name = 'entries'")
+            return self.versions.bump(conn)
+
+    def clear(self):
+        with self._lock, _write_connection(self.path) as conn:
+            conn.execute("DELETE FROM response_cache")
+            conn.execute("UPDATE response_cache_meta SET value = 0 WHERE name = 'entries'")
+
+    def metrics(self):
+        entries = self._readers.get().execute(
+            "SELECT value FROM response_cache_meta WHERE name = 'entries'").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "evictions": self.evictions
+        }
+
+
+def create_cache_backend(name, path=None, max_entries=512, ttl=300):
+    """
+    按名称创建缓存后端
+
+    Args:
+        name (str): memory / sqlite / none
+        path (str): SQLite文件路径；memory 后端用它在进程间共享版本号，为空时版本号只在进程内有效
+    """
+    if name == 'none':
+        return None
+    if name == 'sqlite':
+        return SQLiteCacheBackend(path, max_entries=max_entries, ttl=ttl)
+    if name != 'memory':
+        logger.warning(f"未知的缓存后端 {name}，使用内存缓存")
+    return MemoryCacheBackend(max_entries=max_entries, ttl=ttl, versions=SQLiteVersionStore(path) if path else None)
+
+
+class ResponseCache:
+    """
+    接口响应缓存
+
+    缓存键由接口名、规范化后的查询参数和图谱版本号组成。
+    所有写入图谱的路径都调用 bump_version()，此后旧版本的响应不会再被命中。
+    backend 为 None 时缓存关闭，但版本号仍然可用。
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._version = 0
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def version(self):
+        return self.backend.version() if self.backend is not None else self._version
+
+    def bump_version(self):
+        if self.backend is not None:
+            return self.backend.bump()
+        self._version += 1
+        return self._version
+
+    @staticmethod
+    def normalize_params(params):
+        """去掉空值和首尾空白，并按参数名排序，使等价的请求得到同一个键"""
+        items = []
+        for key, value in params:
+            value = str(value).strip()
+            if value != '':
+                items.append((key, value))
+        return sorted(items)
+
+    def key(self, endpoint, params):
+        return make_cache_key("response", endpoint, self.normalize_params(params), self.version())
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"读取响应缓存失败: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"写入响应缓存失败: {str(e)}")
+
+    def metrics(self):
+        total = self.hits + self.misses
+        metrics = self.backend.metrics() if self.backend is not None else {"backend": "none"}
+        metrics.update({
+            "version": self.version(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        })
+        return metrics
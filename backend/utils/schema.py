@@ -0,0 +1,279 @@
+import time
+import logging
+import threading
+from .cypher import SORT_KEY, escape_name, sort_key_expression
+
+logger = logging.getLogger(__name__)
+
+# 执行计划中出现这些操作符说明查询没有用上索引
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan", "DirectedAllRelationshipsScan",
+                  "UndirectedAllRelationshipsScan")
+
+# 写入路径依赖的约束和索引
+#   MERGE (n:Entity {name, type})            -> (name, type) 唯一约束
+#   MERGE (n:Entity {id})                    -> id 唯一约束
+#   MATCH (a:Entity {name: $source}) / 导入   -> name 索引
+#   管理接口按 (sort_key, id) 分页的节点/关系列表 -> sort_key 索引（其他标签见 label_properties）
+CONSTRAINTS = [
+    ("entity_id_unique", "FOR (n:Entity) REQUIRE n.id IS UNIQUE"),
+    ("entity_name_type_unique", "FOR (n:Entity) REQUIRE (n.name, n.type) IS UNIQUE"),
+]
+# (索引名, 标签, 属性)
+INDEXES = [
+    ("entity_name", "Entity", "name"),
+    ("entity_sort_key", "Entity", SORT_KEY),
+]
+
+# 为写入排序键以前创建的节点补上 sort_key，分批提交，可以重复执行
+BACKFILL_SORT_KEY_QUERY = (
+    f"MATCH (n) WHERE n.{SORT_KEY} IS NULL "
+    f"CALL {{ WITH n SET n.{SORT_KEY} = {sort_key_expression('n')} }} IN TRANSACTIONS OF $batch_size ROWS "
+    "RETURN count(*) AS updated"
+)
+
+
+def find_scans(plan):
+    """返回执行计划中的全表/全标签扫描操作符"""
+    scans = []
+    if not plan:
+        return scans
+    operator = plan.get("operatorType", "").split("@")[0]
+    if operator in SCAN_OPERATORS:
+        scans.append(operator)
+    for child in plan.get("children") or []:
+        scans.extend(find_scans(child))
+    return scans
+
+
+class SchemaManager:
+    """
+    声明并创建热点查询需要的索引和约束
+
+    除 Entity 上的固定约束和索引外，数据库中每个标签的 name / title / sort_key 属性
+    各建一个范围索引，供按标签和名称/标题的等值、前缀查找以及按排序键分页使用；出现新标签时调用 ensure_label()。
+    所有语句都带 IF NOT EXISTS，可以在每次启动时重复执行。
+    """
+
+    def __init__(self, run_query, explain=None, label_properties=("name", "title", SORT_KEY), label_indexes=True):
+        """
+        Args:
+            run_query: run_query(query, params, raise_errors=True) -> 记录列表
+            explain: explain(query, params) -> 执行计划(dict)，用于检查热点查询
+            label_properties (tuple): 为每个标签建立索引的属性
+            label_indexes (bool): 是否为每个标签建立 name / title / sort_key 索引
+        """
+        self.run_query = run_query
+        self.explain = explain
+        self.label_properties = label_properties
+        self.label_indexes = label_indexes
+        self.labels = set()
+        self._pending_labels = set()
+        self._pending_lock = threading.Lock()
+        self.results = []
+        self.plan_warnings = {}
+        self.applied_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def label_index_name(self, label, prop):
+        return f"label_{label}_{prop}"
+
+    def index_statement(self, name, label, prop):
+        return (f"CREATE INDEX {escape_name(name)} IF NOT EXISTS "
+                f"FOR (n:{escape_name(label)}) ON (n.{escape_name(prop)})")
+
+    def declared(self, labels=()):
+        """
+        返回需要的全部约束和索引
+
+        Returns:
+            list: [{"name", "kind", "statement"}]
+        """
+        items = [
+            {"name": name, "kind": "constraint",
+             "statement": f"CREATE CONSTRAINT {escape_name(name)} IF NOT EXISTS {body}"}
+            for name, body in CONSTRAINTS
+        ]
+        items += [
+            {"name": name, "kind": "index", "statement": self.index_statement(name, label, prop)}
+            for name, label, prop in INDEXES
+        ]
+        if self.label_indexes:
+            # 已由固定索引覆盖的 (标签, 属性) 不再重复创建
+            covered = {(label, prop) for _, label, prop in INDEXES}
+            for label in sorted(labels):
+                for prop in self.label_properties:
+                    if (label, prop) in covered:
+                        continue
+                    name = self.label_index_name(label, prop)
+                    items.append({"name": name, "kind": "index", "statement": self.index_statement(name, label, prop)})
+        return items
+
+    def _existing_names(self):
+        names = {r["name"] for r in self.run_query("SHOW INDEXES YIELD name RETURN name", raise_errors=True)}
+        names.update(r["name"] for r in self.run_query("SHOW CONSTRAINTS YIELD name RETURN name", raise_errors=True))
+        return names
+
+    def _apply_items(self, items):
+        existing = self._existing_names()
+        results = []
+        for item in items:
+            if item["name"] in existing:
+                results.append({"name": item["name"], "kind": item["kind"], "status": "exists"})
+                continue
+            try:
+                self.run_query(item["statement"], raise_errors=True)
+                results.append({"name": item["name"], "kind": item["kind"], "status": "created"})
+                logger.info(f"已创建{'约束' if item['kind'] == 'constraint' else '索引'} {item['name']}")
+            except Exception as e:
+                # 已有重复数据时无法创建唯一约束，需要先清理重复节点
+                results.append({"name": item["name"], "kind": item["kind"], "status": "failed", "error": str(e)})
+                logger.warning(f"创建 {item['name']} 失败: {str(e)}")
+        return results
+
+    def apply(self):
+        """创建缺少的约束和索引，返回每一项的处理结果"""
+        with self._lock:
+            try:
+                labels = {r["label"] for r in self.run_query(
+                    "CALL db.labels() YIELD label RETURN label", raise_errors=True)}
+                results = self._apply_items(self.declared(labels))
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"无法检查或创建索引和约束: {str(e)}")
+                return None
+            self.labels = labels
+            self.results = results
+            self.applied_at = time.time()
+            self.last_error = None
+            created = sum(1 for r in results if r["status"] == "created")
+            failed = sum(1 for r in results if r["status"] == "failed")
+            logger.info(f"索引和约束检查完成: 共 {len(results)} 项, 新建 {created} 项, 失败 {failed} 项")
+            return results
+
+    def ensure_label(self, label):
+        """为新出现的标签在后台创建 name / title / sort_key 索引，全部创建成功后才记为已处理，失败时下次再试"""
+        if not self.label_indexes or not label:
+            return
+        with self._pending_lock:
+            if label in self.labels or label in self._pending_labels:
+                return
+            self._pending_labels.add(label)
+
+        def run():
+            try:
+                with self._lock:
+                    try:
+                        names = set(self.label_index_name(label, prop) for prop in self.label_properties)
+                        items = [item for item in self.declared([label]) if item["name"] in names]
+                        results = self._apply_items(items)
+                        self.results.extend(results)
+                        if not any(r["status"] == "failed" for r in results):
+                            self.labels.add(label)
+                    except Exception as e:
+                        self.last_error = str(e)
+                        logger.warning(f"为标签 {label} 创建索引失败: {str(e)}")
+            finally:
+                with self._pending_lock:
+                    self._pending_labels.discard(label)
+
+        threading.Thread(target=run, name="schema-label", daemon=True).start()
+
+    def backfill_sort_keys(self, batch_size=10000):
+        """
+        为没有排序键的节点补上 sort_key，返回更新的节点数；失败时返回 None
+
+        没有排序键的节点不会出现在管理接口的节点列表中，升级后执行一次即可。
+        """
+        try:
+            records = self.run_query(BACKFILL_SORT_KEY_QUERY, {"batch_size": int(batch_size)}, raise_errors=True)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"补充节点排序键失败: {str(e)}")
+            return None
+        updated = records[0]["updated"] if records else 0
+        if updated:
+            logger.info(f"已为 {updated} 个节点补充排序键")
+        return updated
+
+    def await_indexes(self, timeout=300):
+        """等待索引填充完成（执行计划只会使用已上线的索引）"""
+        try:
+            self.run_query("CALL db.awaitIndexes($timeout)", {"timeout": int(timeout)}, raise_errors=True)
+            return True
+        except Exception as e:
+            logger.warning(f"等待索引填充超时或失败: {str(e)}")
+            return False
+
+    def status(self):
+        """
+        返回索引和约束的当前状态
+
+        Returns:
+            dict: indexes 每个索引的状态和填充进度, constraints 约束列表, missing 尚未创建的声明项
+        """
+        indexes = [
+            {
+                "name": r["name"],
+                "type": r["type"],
+                "entity": r["labelsOrTypes"],
+                "properties": r["properties"],
+                "state": r["state"],
+                "population_percent": r["populationPercent"]
+            }
+            for r in self.run_query(
+                "SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state, populationPercent "
+                "RETURN name, type, labelsOrTypes, properties, state, populationPercent ORDER BY name",
+                raise_errors=True
+            )
+        ]
+        constraints = [
+            {"name": r["name"], "type": r["type"], "entity": r["labelsOrTypes"], "properties": r["properties"]}
+            for r in self.run_query(
+                "SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties "
+                "RETURN name, type, labelsOrTypes, properties ORDER BY name",
+                raise_errors=True
+            )
+        ]
+        existing = {i["name"] for i in indexes} | {c["name"] for c in constraints}
+        return {
+            "indexes": indexes,
+            "constraints": constraints,
+            "missing": [item["name"] for item in self.declared(self.labels) if item["name"] not in existing],
+            "populating": [i["name"] for i in indexes if i["state"] != "ONLINE"]
+        }
+
+    def check_plans(self, queries):
+        """
+        用 EXPLAIN 检查热点查询，执行计划中出现扫描时记录警告
+
+        Args:
+            queries (dict): {名称: (查询, 参数)}
+
+        Returns:
+            dict: {名称: 扫描操作符列表}，只包含有扫描的查询
+        """
+        if self.explain is None:
+            return {}
+        warnings = {}
+        for name, (query, params) in queries.items():
+            try:
+                scans = find_scans(self.explain(query, params))
+            except Exception as e:
+                logger.warning(f"无法获取查询 {name} 的执行计划: {str(e)}")
+                continue
+            if scans:
+                warnings[name] = scans
+                logger.warning(f"热点查询 {name} 的执行计划使用了扫描 ({', '.join(scans)})，请检查索引和约束")
+        self.plan_warnings = warnings
+        return warnings
+
+    def metrics(self):
+        return {
+            "applied_at": self.applied_at,
+            "labels": len(self.labels),
+            "declared": len(self.results),
+            "failed": [r["name"] for r in self.results if r["status"] == "failed"],
+            "plan_warnings": self.plan_warnings,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,201 @@
+import re
+import time
+import logging
+import threading
+from .cypher import escape_name
+
+logger = logging.getLogger(__name__)
+
+# Lucene查询语法中的特殊字符
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def build_lucene_query(text):
+    """
+    把用户输入转换为全文检索查询
+
+    整体作为短语查询（标准分词器把中日文拆成单字，短语查询即相当于"包含"），
+    同时对每个词做前缀匹配，兼顾英文的前缀搜索。
+    """
+    text = (text or '').strip()
+    if not text:
+        return None
+    phrase = text.replace('\\', '\\\\').replace('"', '\\"')
+    parts = [f'"{phrase}"']
+    for token in text.split():
+        token = _LUCENE_SPECIAL.sub(r'\\\1', token.lower())
+        if token:
+            parts.append(f'{token}*')
+    return " OR ".join(parts)
+
+
+class FulltextIndexManager:
+    """
+    管理节点 name/title 上的全文索引
+
+    全文索引需要列出标签，因此启动时读取数据库中的全部标签建立索引，
+    出现新标签时重建。重建时用新的索引名（<name>_v<序号>）创建覆盖全部标签的索引，
+    等它填充完成(ONLINE)后再切换查询使用的索引名并删除旧索引；填充期间继续使用旧索引
+    （只是暂时查不到新标签的节点），搜索不会退回 CONTAINS 扫描。
+    索引不可用（无权限、未上线或查询出错）时，调用方应回退到原来的 CONTAINS 查询。
+    """
+
+    def __init__(self, run_query, name="node_name_title_fulltext",
+                 properties=("name", "title"), retry_interval=300, await_timeout=300):
+        self.run_query = run_query
+        self.base_name = name
+        # 查询当前使用的索引名
+        self.name = name
+        self.properties = properties
+        self.retry_interval = retry_interval
+        self.await_timeout = await_timeout
+        self.labels = set()
+        self.state = None
+        self.available = False
+        self.last_error = None
+        self._last_attempt = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_again = False
+
+    def _version(self, name):
+        """索引名的序号：基础名为 0，<name>_v<n> 为 n，不属于本管理器的索引返回 None"""
+        if name == self.base_name:
+            return 0
+        prefix = self.base_name + "_v"
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            return int(name[len(prefix):])
+        return None
+
+    def _indexes(self):
+        """本管理器创建的全文索引，按序号排序"""
+        rows = self.run_query(
+            "SHOW FULLTEXT INDEXES YIELD name, labelsOrTypes, properties, state "
+            "RETURN name, labelsOrTypes, properties, state",
+            raise_errors=True
+        )
+        indexes = [dict(r, version=self._version(r["name"])) for r in rows]
+        return sorted((i for i in indexes if i["version"] is not None), key=lambda i: i["version"])
+
+    def _covers(self, index, labels):
+        return (labels <= set(index["labelsOrTypes"] or [])
+                and set(self.properties) <= set(index["properties"] or []))
+
+    def _use(self, index, indexes):
+        """切换到已上线的索引，删除其他旧索引"""
+        self.name = index["name"]
+        self.state = index["state"]
+        self.available = True
+        for other in indexes:
+            if other["name"] == index["name"]:
+                continue
+            try:
+                self.run_query(f"DROP INDEX {escape_name(other['name'])} IF EXISTS", raise_errors=True)
+                logger.info(f"已删除旧的全文索引 {other['name']}")
+            except Exception as e:
+                logger.warning(f"删除旧的全文索引 {other['name']} 失败: {str(e)}")
+
+    def ensure(self):
+        """确保有覆盖所有标签的索引，新索引上线后立即切换，返回索引是否可用"""
+        with self._lock:
+            self._last_attempt = time.time()
+            try:
+                labels = {r["label"] for r in self.run_query(
+                    "CALL db.labels() YIELD label RETURN label", raise_errors=True)}
+                if not labels:
+                    self.available = False
+                    self.state = "NO_LABELS"
+                    return False
+
+                indexes = self._indexes()
+                # 在新索引上线前，继续使用已上线的索引（最新的优先）
+                online = [i for i in indexes if i["state"] == "ONLINE"]
+                if online and not self.available:
+                    current = online[-1]
+                    self.name, self.state, self.available = current["name"], current["state"], True
+
+                covering = [i for i in indexes if self._covers(i, labels)]
+                if covering:
+                    target = covering[-1]
+                else:
+                    version = indexes[-1]["version"] + 1 if indexes else 0
+                    name = self.base_name if version == 0 else f"{self.base_name}_v{version}"
+                    label_expr = "|".join(escape_name(label) for label in sorted(labels))
+                    props = ", ".join(f"n.{escape_name(p)}" for p in self.properties)
+                    self.run_query(
+                        f"CREATE FULLTEXT INDEX {escape_name(name)} IF NOT EXISTS "
+                        f"FOR (n:{label_expr}) ON EACH [{props}]",
+                        raise_errors=True
+                    )
+                    logger.info(f"已创建全文索引 {name}，覆盖 {len(labels)} 个标签，等待填充完成")
+                    target = {"name": name, "state": "POPULATING"}
+
+                if target["state"] != "ONLINE":
+                    if not self.available:
+                        self.state = target["state"]
+                        logger.info(f"全文索引 {target['name']} 状态为 {target['state']}，暂时使用普通查询")
+                    self.run_query("CALL db.awaitIndex($name, $timeout)",
+                                   {"name": target["name"], "timeout": int(self.await_timeout)}, raise_errors=True)
+                    target = dict(target, state="ONLINE")
+
+                self._use(target, self._indexes())
+                self.labels = labels
+                self.last_error = None
+                return True
+            except Exception as e:
+                # 旧索引仍然可用时继续使用，只记录错误
+                self.last_error = str(e)
+                logger.warning(f"无法创建或检查全文索引: {str(e)}"
+                               + ("" if self.available else "，搜索将使用普通查询"))
+                return self.available
+
+    def refresh_async(self):
+        """在后台线程中重新检查索引；正在检查时，结束后再检查一次"""
+        if self._refreshing:
+            self._refresh_again = True
+            return
+        self._refreshing = True
+
+        def run():
+            try:
+                while True:
+                    self._refresh_again = False
+                    self.ensure()
+                    if not self._refresh_again:
+                        break
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="fulltext-index", daemon=True).start()
+
+    def usable(self):
+        """索引是否可用；不可用且超过重试间隔时在后台重新检查"""
+        if not self.available and time.time() - self._last_attempt > self.retry_interval:
+            self.refresh_async()
+        return self.available
+
+    def ensure_label(self, label):
+        """新建节点使用了索引未覆盖的标签时，在后台重建索引"""
+        if label and label not in self.labels:
+            self.refresh_async()
+
+    def mark_failed(self, error, name=None):
+        """
+        全文查询出错时暂停使用索引，稍后再检查
+
+        name 为出错的查询使用的索引名；索引已切换时（旧索引已被删除）不影响新索引。
+        """
+        if name is not None and name != self.name:
+            return
+        self.available = False
+        self.last_error = str(error)
+        self._last_attempt = time.time()
+
+    def metrics(self):
+        return {
+            "name": self.name,
+            "available": self.available,
+            "state": self.state,
+            "labels": len(self.labels),
+            "last_error": self.last_error
+        }
@@ -0,0 +1,82 @@
+import re
+
+# 默认分块大小(字符数)和相邻块的重叠字符数
+DEFAULT_CHUNK_SIZE = 4000
+DEFAULT_CHUNK_OVERLAP = 200
+
+# 段落分隔：空行或换行
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\r?\n')
+# 句子结束：中日文句末标点，或后面跟空白的英文句点/问号/感叹号
+_SENTENCE_SPLIT = re.compile(r'(?<=[。！？；!?;])|(?<=[.!?])(?=\s)')
+
+
+def split_paragraphs(text):
+    """按空行/换行切分段落，丢弃空段落"""
+    for paragraph in _PARAGRAPH_SPLIT.split(text or ''):
+        paragraph = paragraph.strip()
+        if paragraph:
+            yield paragraph
+
+
+def split_sentences(paragraph, max_chars):
+    """把段落切成句子，超长的句子再按字符数硬切"""
+    for sentence in _SENTENCE_SPLIT.split(paragraph):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            yield sentence[:max_chars]
+            sentence = sentence[max_chars:]
+        yield sentence
+
+
+def _overlap_tail(pieces, overlap):
+    """取块末尾不超过 overlap 个字符的完整句子，作为下一块的开头"""
+    tail = []
+    size = 0
+    for piece in reversed(pieces):
+        for sentence in reversed(list(split_sentences(piece, len(piece)))):
+            if size + len(sentence) > overlap:
+                return tail
+            tail.insert(0, sentence)
+            size += len(sentence) + 1
+    return tail
+
+
+def chunk_paragraphs(paragraphs, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_CHUNK_OVERLAP):
+    """
+    将段落流打包成不超过 chunk_size 个字符的文本块
+
+    优先在段落边界切分，段落过长时在句子边界切分；
+    相邻块之间保留不超过 overlap 个字符的句子重叠，避免跨块关系丢失。
+    输入可以是任意可迭代对象，按需消费，适合流式输入。
+
+    Yields:
+        str: 文本块
+    """
+    chunk_size = max(1, int(chunk_size))
+    overlap = max(0, min(int(overlap), chunk_size // 2))
+
+    pieces = []
+    size = 0
+
+    for paragraph in paragraphs:
+        units = [paragraph] if len(paragraph) <= chunk_size else list(split_sentences(paragraph, chunk_size))
+        for unit in units:
+            if pieces and size + len(unit) + 1 > chunk_size:
+                yield '\n'.join(pieces)
+                pieces = _overlap_tail(pieces, overlap) if overlap else []
+                size = sum(len(p) + 1 for p in pieces)
+                # 重叠部分加上新内容仍然超长时，放弃重叠
+                if size + len(unit) + 1 > chunk_size:
+                    pieces, size = [], 0
+            pieces.append(unit)
+            size += len(unit) + 1
+
+    if pieces:
+        yield '\n'.join(pieces)
+
+
+def chunk_text(text, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_CHUNK_OVERLAP):
+    """将整段文本切分为文本块列表"""
+    return list(chunk_paragraphs(split_paragraphs(text), chunk_size, overlap))
@@ -233,18 +233,34 @@ class KnowledgeGraph {
         const apiUrl = `/api/graph?${params.toString()}`;
         console.log(`请求图谱数据: ${apiUrl}`);
         
+        // 同一请求带上次的ETag，数据未变化时服务器返回304，不必重新下载和渲染
+        const headers = {};
+        if (this.graphEtag && this.graphEtagUrl === apiUrl) {
+            headers['If-None-Match'] = this.graphEtag;
+        }
+        
         // 获取图谱数据
-        fetch(apiUrl)
+        fetch(apiUrl, { headers })
             .then(response => {
+                if (response.status === 304) {
+                    return null;
+                }
                 if (!response.ok) {
                     throw new Error(`服务器响应错误: ${response.status} ${response.statusText}`);
                 }
+                this.graphEtag = response.headers.get('ETag');
+                this.graphEtagUrl = apiUrl;
                 return response.json();
             })
             .then(data => {
                 // 隐藏加载动画
                 this.showLoading(false);
                 
+                if (data === null) {
+                    console.log('图谱数据未变化');
+                    return;
+                }
+                
                 // 检查返回的数据是否有效
                 if (!data || !data.nodes || !data.links) {
                     throw new Error('服务器返回的数据格式不正确');
@@ -377,6 +393,12 @@ class KnowledgeGraph {
         }, 3000);
     }
     
+    // 清除 /api/graph 的ETag，下次加载时重新获取完整数据
+    clearGraphEtag() {
+        this.graphEtag = null;
+        this.graphEtagUrl = null;
+    }
+    
     // 更新图谱可视化
     updateGraph(data) {
         if (!data || !data.nodes || !data.links) {
@@ -650,8 +672,71 @@ class KnowledgeGraph {
             return;
         }
         
-        // 加载以当前节点为中心的子图
-        this.loadSubgraph(d.id);
+        // 增量展开当前节点，只获取图中还没有的节点和关系
+        this.expandNode(d);
+    }
+    
+    // 增量展开节点
+    expandNode(node) {
+        this.showLoading(true);
+        
+        fetch('/api/graph/expand', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                node_id: node.id,
+                known: this.nodes.map(n => n.id),
+                limit: this.nodeLimit
+            })
+        })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`服务器响应错误: ${response.status} ${response.statusText}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                this.showLoading(false);
+                
+                if (!data || !data.nodes || !data.links) {
+                    throw new Error('服务器返回的数据格式不正确');
+                }
+                
+                console.log(`展开节点: 新增${data.nodes.length}个节点, ${data.links.length}个关系`);
+                
+                // 已有关系按id去重（与已有节点之间的关系也会返回）
+                const linkIds = new Set(this.links.map(l => l.id).filter(id => id !== undefined));
+                const newLinks = data.links.filter(l => l.id === undefined || !linkIds.has(l.id));
+                
+                if (data.nodes.length === 0 && newLinks.length === 0) {
+                    this.showToast('没有更多相关节点', 'info');
+                    return;
+                }
+                
+                // 新节点从被展开的节点附近出现
+                data.nodes.forEach(n => {
+                    n.x = node.x + (Math.random() - 0.5) * 50;
+                    n.y = node.y + (Math.random() - 0.5) * 50;
+                });
+                
+                // 合并到现有图谱；视图已不是 /api/graph 的结果，不能再用它的ETag
+                this.clearGraphEtag();
+                this.updateGraph({
+                    nodes: this.nodes.concat(data.nodes),
+                    links: this.links.concat(newLinks)
+                });
+                
+                this.updateCountDisplay(this.nodes.length, this.links.length);
+                
+                if (data.meta && data.meta.truncated_nodes && data.meta.truncated_nodes.length > 0) {
+                    this.showToast('部分节点还有未展开的关系，可再次双击继续展开', 'info');
+                }
+            })
+            .catch(error => {
+                console.error('展开节点失败:', error);
+                this.showLoading(false);
+                this.showToast('展开节点失败: ' + error.message, 'error');
+            });
     }
     
     // 加载子图
@@ -690,7 +775,8 @@ class KnowledgeGraph {
                 
                 console.log(`成功加载子图: ${data.nodes.length}个节点, ${data.links.length}个关系`);
                 
-                // 更新图谱数据
+                // 更新图谱数据；视图已替换为子图，"更新"时需要重新获取完整图谱
+                this.clearGraphEtag();
                 this.updateGraph(data);
                 
                 // 显示结果数量
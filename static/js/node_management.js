@@ -1,6 +1,8 @@
 // 全局变量
 let currentPage = 1;
 let totalPages = 1;
+let pageCursors = {};  // 页码 -> 游标，翻到相邻页时按游标查询，避免深分页
+let cursorFilterKey = '';
 let nodeTypes = [];
 let editingNodeId = null;
 let toastInstance = null;
@@ -207,6 +209,16 @@ function loadNodes(page) {
         params.append('type', typeFilter);
     }
     
+    // 筛选条件变化时清空已记录的游标
+    const filterKey = `${nameFilter}|${typeFilter}`;
+    if (filterKey !== cursorFilterKey || page === 1) {
+        pageCursors = {};
+        cursorFilterKey = filterKey;
+    }
+    if (pageCursors[page]) {
+        params.append('cursor', pageCursors[page]);
+    }
+    
     // 显示加载状态
     const nodeListElement = document.getElementById('node-list');
     if (nodeListElement) {
@@ -253,6 +265,11 @@ function loadNodes(page) {
             currentPage = data.page || 1;
             totalPages = data.pages || 1;
             
+            // 记录下一页的游标
+            if (data.next_cursor) {
+                pageCursors[currentPage + 1] = data.next_cursor;
+            }
+            
             // 渲染节点列表
             renderNodeTable(data.nodes || []);
             
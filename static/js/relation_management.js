@@ -5,6 +5,8 @@
 // 全局变量
 let currentPage = 1;
 let totalPages = 1;
+let pageCursors = {};  // 页码 -> 游标，翻到相邻页时按游标查询，避免深分页
+let cursorFilterKey = '';
 let relationsList = [];
 let relationTypes = [];
 let currentRelationId = null;
@@ -302,6 +304,14 @@ function loadRelations(page) {
     if (relation) url += `&type=${encodeURIComponent(relation)}`;
     if (target) url += `&target=${encodeURIComponent(target)}`;
     
+    // 筛选条件变化时清空已记录的游标
+    const filterKey = `${source}|${relation}|${target}`;
+    if (filterKey !== cursorFilterKey || page === 1) {
+        pageCursors = {};
+        cursorFilterKey = filterKey;
+    }
+    if (pageCursors[page]) url += `&cursor=${encodeURIComponent(pageCursors[page])}`;
+    
     // 发送请求
     fetch(url)
         .then(response => response.json())
@@ -310,6 +320,11 @@ function loadRelations(page) {
             totalPages = data.pages || 1;
             currentPage = page;
             
+            // 记录下一页的游标
+            if (data.next_cursor) {
+                pageCursors[page + 1] = data.next_cursor;
+            }
+            
             // 更新关系列表
             updateRelationsList();
             
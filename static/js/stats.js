@@ -2,6 +2,12 @@
 // 注意：此文件依赖 Chart.js，请确保在使用此文件前引入 Chart.js
 // <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
 
+// 自动刷新间隔(毫秒)
+const STATS_REFRESH_INTERVAL = 30000;
+
+// 各接口上次响应的ETag
+const responseEtags = {};
+
 document.addEventListener('DOMContentLoaded', () => {
     // 检查是否已加载 Chart.js
     if (typeof Chart === 'undefined') {
@@ -14,6 +20,13 @@ document.addEventListener('DOMContentLoaded', () => {
     loadGraphStats();
     loadNodeTypes();
     loadRelationTypes();
+    
+    // 定时刷新，数据未变化时服务器返回304，不会重复下载和重绘
+    setInterval(() => {
+        loadGraphStats();
+        loadNodeTypes();
+        loadRelationTypes();
+    }, STATS_REFRESH_INTERVAL);
 });
 
 /**
@@ -102,6 +115,9 @@ function createNodeTypeChart(nodeTypes) {
     const labels = nodeTypes.map(item => item.type);
     const counts = nodeTypes.map(item => item.count);
     
+    // 刷新时先销毁旧图表
+    destroyChart(chartContainer);
+    
     // 创建图表
     new Chart(chartContainer, {
         type: 'doughnut',
@@ -165,6 +181,9 @@ function createRelationTypeChart(relationTypes) {
     const labels = topRelations.map(item => item.type);
     const counts = topRelations.map(item => item.count);
     
+    // 刷新时先销毁旧图表
+    destroyChart(chartContainer);
+    
     // 创建图表
     new Chart(chartContainer, {
         type: 'bar',
@@ -193,10 +212,22 @@ function createRelationTypeChart(relationTypes) {
     });
 }
 
+/**
+ * 销毁画布上已有的图表，Chart.js 不允许在同一画布上重复创建
+ */
+function destroyChart(container) {
+    const chart = Chart.getChart(container);
+    if (chart) {
+        chart.destroy();
+    }
+}
+
 /**
  * 显示空图表提示
  */
 function showEmptyChart(container, message) {
+    destroyChart(container);
+    
     // 创建空图表
     new Chart(container, {
         type: 'bar',
@@ -312,8 +343,17 @@ function fetchData(url, callback) {
     const retryDelay = 1000; // 1秒
     
     function doFetch() {
-        fetch(url)
+        const headers = {};
+        if (responseEtags[url]) {
+            headers['If-None-Match'] = responseEtags[url];
+        }
+        
+        fetch(url, { headers })
             .then(response => {
+                // 数据未变化
+                if (response.status === 304) {
+                    return null;
+                }
                 if (!response.ok) {
                     if (response.status === 500 && retryCount < maxRetries) {
                         retryCount++;
@@ -323,10 +363,14 @@ function fetchData(url, callback) {
                     }
                     throw new Error(`服务器响应错误: ${response.status}`);
                 }
+                const etag = response.headers.get('ETag');
+                if (etag) {
+                    responseEtags[url] = etag;
+                }
                 return response.json();
             })
             .then(data => {
-                if (!data) return; // 重试请求，直接返回
+                if (!data) return; // 重试请求或数据未变化，直接返回
                 callback(data);
             })
             .catch(error => {
@@ -64,7 +64,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
         try {
             showStatus('正在上传文件并处理...', 'info');
-            const response = await fetch('/upload', {
+            const response = await fetch('/upload?async=1', {
                 method: 'POST',
                 body: formData
             });
@@ -74,7 +74,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(errorData.error || '上传失败');
             }
 
-            const data = await response.json();
+            const data = await waitForJob(await response.json());
             currentData = data; // 保存数据
             showStatus('文件处理成功，正在生成图谱...', 'success');
             visualizeGraph(data);
@@ -100,7 +100,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ text: text })
+                body: JSON.stringify({ text: text, async: true })
             });
             
             if (!response.ok) {
@@ -108,7 +108,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(errorData.error || '处理失败');
             }
             
-            const data = await response.json();
+            const data = await waitForJob(await response.json());
             currentData = data; // 保存数据
             showStatus('文本处理成功，正在生成图谱...', 'success');
             visualizeGraph(data);
@@ -117,6 +117,40 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // 轮询后台任务，直到任务结束后返回处理结果
+    async function waitForJob(job) {
+        const stageText = {
+            queued: '排队中',
+            reading: '正在读取文件',
+            extracting: '正在提取实体和关系',
+            saving: '正在保存到数据库'
+        };
+        
+        while (job.status === 'queued' || job.status === 'running') {
+            const progress = job.progress || {};
+            const stage = progress.stage || job.status;
+            let detail = '';
+            if (progress.total_pages) {
+                detail = ` (已解析 ${progress.pages_processed || 0}/${progress.total_pages} 页)`;
+            } else if (progress.chunks_processed) {
+                detail = ` (已处理 ${progress.chunks_processed} 个文本块)`;
+            }
+            showStatus(`任务处理中: ${stageText[stage] || stage}${detail}...`, 'info');
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            
+            const response = await fetch(job.status_url);
+            if (!response.ok) {
+                throw new Error('无法获取任务状态');
+            }
+            job = await response.json();
+        }
+        
+        if (job.status === 'failed') {
+            throw new Error(job.error || '任务执行失败');
+        }
+        return job.result;
+    }
+
     // 显示状态信息
     function showStatus(message, type) {
         statusBar.textContent = message;
@@ -0,0 +1,234 @@
+"""
+测试公共设置：用内存中的假驱动代替 Neo4j，同步视图和 ASGI 异步视图读取同一份数据
+
+app_final 在导入时读取配置，这里先关闭需要数据库的后台功能，使用内存任务队列，
+响应缓存的版本号写到临时目录。依赖 backend 夹具的测试分别在 memory 和 sqlite 两种缓存后端下运行。
+"""
+import os
+import sys
+import tempfile
+
+os.environ.update(
+    JOB_BACKEND="memory",
+    RESPONSE_CACHE_BACKEND="memory",
+    RESPONSE_CACHE_PATH=os.path.join(tempfile.mkdtemp(prefix="kg-tests-"), "response_cache.db"),
+    FULLTEXT_INDEX_ENABLED="False",
+    AUTOCOMPLETE_ENABLED="False",
+    SCHEMA_AUTO_APPLY="False",
+    STATS_RECONCILE_INTERVAL="3600"
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from neo4j import exceptions
+
+
+class FakeNode(dict):
+    def __init__(self, node_id, label="Entity"):
+        super().__init__(name=f"n{node_id}")
+        self.id = node_id
+        self.element_id = f"4:test:{node_id}"
+        self.labels = {label}
+
+
+class FakeRelationship(dict):
+    def __init__(self, rel_id, start_node, end_node, rel_type="REL"):
+        super().__init__()
+        self.id = rel_id
+        self.element_id = f"5:test:{rel_id}"
+        self.start_node = start_node
+        self.end_node = end_node
+        self.type = rel_type
+
+
+class FakeGraph:
+    """
+    按查询文本返回固定图谱的记录
+
+    节点 0 与 1..30 相连，节点 1 与 40..44 相连；error 不为空时每个查询都抛出该异常。
+    """
+
+    def __init__(self):
+        self.nodes = {i: FakeNode(i, "Person" if i % 2 else "Entity") for i in range(50)}
+        self.edges = []
+        for i in range(1, 31):
+            self.connect(0, i, "KNOWS" if i % 2 else "REL")
+        for i in range(40, 45):
+            self.connect(1, i)
+        self.error = None
+
+    def connect(self, a, b, rel_type="REL"):
+        self.edges.append(FakeRelationship(len(self.edges), self.nodes[a], self.nodes[b], rel_type))
+
+    def neighbors(self, node_id, params):
+        relation_types = params.get("relation_types")
+        count = 0
+        for edge in self.edges:
+            if node_id not in (edge.start_node.id, edge.end_node.id):
+                continue
+            if relation_types is not None and edge.type not in relation_types:
+                continue
+            if count >= params["fanout"]:
+                break
+            other = edge.end_node if edge.start_node.id == node_id else edge.start_node
+            count += 1
+            yield edge, other
+
+    def run(self, query, params):
+        if self.error is not None:
+            raise self.error
+        if "UNWIND $frontier" in query:
+            return [
+                {"from_id": node_id, "r": edge, "rel_id": edge.id, "m": other, "neighbor_id": other.id,
+                 "is_known": False}
+                for node_id in params["frontier"]
+                for edge, other in self.neighbors(node_id, params)
+            ]
+        if "RETURN n LIMIT 1" in query:
+            node = self.nodes.get(params["node_id"])
+            return [{"n": node}] if node is not None else []
+        if "RETURN n, r, m" in query:
+            return [{"n": e.start_node, "r": e, "m": e.end_node} for e in self.edges][:params["limit"] * 3]
+        if "AS title" in query and "query" in params:
+            return [
+                {"id": n.id, "name": n["name"], "title": None, "type": next(iter(n.labels))}
+                for n in self.nodes.values() if params["query"] in n["name"]
+            ][:params["limit"]]
+        return []
+
+
+class FakeResult(list):
+    def consume(self):
+        return None
+
+
+class FakeSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None, **kwargs):
+        return FakeResult(self.graph.run(getattr(query, "text", query), dict(params or {}, **kwargs)))
+
+
+class FakeDriver:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def session(self, **kwargs):
+        return FakeSession(self.graph)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeAsyncResult:
+    def __init__(self, records):
+        self._records = iter(records)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._records)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, params=None, **kwargs):
+        return FakeAsyncResult(self.graph.run(getattr(query, "text", query), dict(params or {}, **kwargs)))
+
+
+class FakeAsyncDriver:
+    def __init__(self, graph, available=True):
+        self.graph = graph
+        self.available = available
+
+    def session(self, **kwargs):
+        return FakeAsyncSession(self.graph)
+
+    async def verify_connectivity(self):
+        if not self.available:
+            raise exceptions.ServiceUnavailable("数据库不可用")
+
+    async def close(self):
+        pass
+
+
+class Backend:
+    """同时控制同步连接池和异步客户端使用的假驱动"""
+
+    def __init__(self, monkeypatch, app_final, asgi_app):
+        from backend.utils import async_neo4j
+
+        self.graph = FakeGraph()
+        self.available = True
+        self.pool = app_final.Neo4jConnection.get_pool()
+        monkeypatch.setattr(self.pool, "_driver", FakeDriver(self.graph))
+        monkeypatch.setattr(self.pool, "get_driver", lambda: self.pool._driver if self.available else None)
+        monkeypatch.setattr(async_neo4j.AsyncGraphDatabase, "driver",
+                            lambda *args, **kwargs: FakeAsyncDriver(self.graph, self.available))
+        # 每个测试使用新的异步客户端（驱动与事件循环绑定），连接失败时不等待重试
+        config = app_final.app.config
+        monkeypatch.setattr(asgi_app, "neo4j_client", async_neo4j.AsyncNeo4jClient(
+            config['NEO4J_URI'], config['NEO4J_USER'], config['NEO4J_PASSWORD'],
+            max_retries=1, on_error=app_final.mark_degraded
+        ))
+
+    def unavailable(self):
+        """模拟无法连接数据库"""
+        self.available = False
+
+    def fail_queries(self, error=None):
+        """模拟查询出错（连接正常）"""
+        self.graph.error = error or exceptions.ClientError("查询出错")
+
+
+@pytest.fixture(scope="session")
+def app_final():
+    import app_final
+    return app_final
+
+
+@pytest.fixture(scope="session")
+def asgi_app(app_final):
+    import asgi_app
+    return asgi_app
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache_backend(request, monkeypatch, tmp_path, app_final):
+    """响应缓存后端：memory 为默认配置（共享版本号），sqlite 在进程间共享缓存内容"""
+    from backend.utils.response_cache import create_cache_backend
+
+    cache = create_cache_backend(request.param, path=str(tmp_path / "response_cache.db"))
+    monkeypatch.setattr(app_final.response_cache, "backend", cache)
+    return cache
+
+
+@pytest.fixture
+def backend(monkeypatch, app_final, asgi_app, cache_backend):
+    backend = Backend(monkeypatch, app_final, asgi_app)
+    app_final.response_cache.backend.clear()
+    app_final.graph_stats.reconcile()
+    yield backend
+    app_final.response_cache.backend.clear()
@@ -0,0 +1,98 @@
+"""管理接口的节点/关系列表：按写入时保存的 sort_key 分页，每个标签一个按索引顺序读取的分支"""
+import pytest
+from backend.utils.crud_queries import UPDATE_NODE_QUERY, create_node_query
+from backend.utils.cypher import without_sort_key
+from backend.utils.graph_import import IMPORT_ENTITY_QUERY, IMPORT_RELATION_QUERY
+from backend.utils.neo4j_utils import ENTITY_UNWIND_QUERY, NAMED_ENTITY_UNWIND_QUERY
+from backend.utils.pagination import encode_cursor
+
+SORT_KEY = "sort_key = COALESCE({var}.title, {var}.name, '未命名节点')"
+
+
+class RecordingQueries:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, query, params=None, raise_errors=False, timeout=None):
+        self.calls.append((query, dict(params or {})))
+        if "count(" in query:
+            return [{"total": len(self.rows)}]
+        return self.rows
+
+
+@pytest.fixture
+def queries(monkeypatch, app_final):
+    recording = RecordingQueries([])
+    monkeypatch.setattr(app_final.Neo4jConnection, "run_query", recording)
+    monkeypatch.setattr(app_final.graph_stats, "snapshot", lambda: {
+        "node_types": [{"type": "Person", "count": 3}, {"type": "Entity", "count": 5}]
+    })
+    app_final.count_cache.clear()
+    return recording
+
+
+def page_query(recording):
+    return next((q, p) for q, p in recording.calls if "UNION" in q or "$branch_limit" in q)
+
+
+def test_node_writes_maintain_sort_key():
+    assert ("SET n += $props SET n." + SORT_KEY.format(var="n")) in UPDATE_NODE_QUERY
+    assert ("SET n = $props SET n." + SORT_KEY.format(var="n")) in create_node_query("Person")
+    assert ("ON CREATE SET n." + SORT_KEY.format(var="n")) in NAMED_ENTITY_UNWIND_QUERY
+    assert ("SET n." + SORT_KEY.format(var="n")) in ENTITY_UNWIND_QUERY
+    assert IMPORT_ENTITY_QUERY.endswith("SET n." + SORT_KEY.format(var="n"))
+    for var in ("a", "b"):
+        assert ("ON CREATE SET " + var + "." + SORT_KEY.format(var=var)) in IMPORT_RELATION_QUERY
+
+
+def test_first_node_page_reads_each_label_in_sort_key_order(app_final, queries):
+    client = app_final.app.test_client()
+    assert client.get("/api/admin/nodes?page=2&limit=10").status_code == 200
+    query, params = page_query(queries)
+    assert query.count("ORDER BY n.sort_key, id(n) LIMIT $branch_limit") == 2
+    assert "MATCH (n:`Entity`) WHERE n.sort_key IS NOT NULL" in query
+    assert " UNION MATCH (n:`Person`)" in query
+    assert "COALESCE" not in query
+    assert params["branch_limit"] == 21 and params["skip"] == 10
+
+
+def test_node_cursor_seeks_on_sort_key(app_final, queries):
+    client = app_final.app.test_client()
+    cursor = encode_cursor(["Bob", 7])
+    assert client.get(f"/api/admin/nodes?type=Person&name=o&cursor={cursor}").status_code == 200
+    query, params = page_query(queries)
+    assert "UNION" not in query
+    assert "MATCH (n:`Person`) WHERE n.name CONTAINS $name AND n.sort_key >= $after_0 AND " in query
+    assert params["after_0"] == "Bob" and params["after_1"] == 7
+    assert params["skip"] == 0 and params["branch_limit"] == 11
+
+
+def test_node_list_hides_sort_key_and_sets_next_cursor(app_final, queries):
+    queries.rows = [
+        {"id": i, "name": f"n{i}", "title": None, "type": "Person",
+         "properties": {"name": f"n{i}", "sort_key": f"n{i}"}, "sort_key": f"n{i}"}
+        for i in range(3)
+    ]
+    data = app_final.app.test_client().get("/api/admin/nodes?limit=2").get_json()
+    assert [node["properties"] for node in data["nodes"]] == [{"name": "n0"}, {"name": "n1"}]
+    assert data["nodes"][0]["prop_count"] == 1
+    assert data["has_more"] is True
+    assert data["next_cursor"] == encode_cursor(["n1", 1])
+
+
+def test_relation_page_is_ordered_by_source_sort_key(app_final, queries):
+    client = app_final.app.test_client()
+    cursor = encode_cursor(["Alice", "KNOWS", "Bob", 3])
+    assert client.get(f"/api/admin/relations?type=KNOWS&cursor={cursor}").status_code == 200
+    query, params = page_query(queries)
+    assert "MATCH (source:`Entity`)-[r:`KNOWS`]->(target) WHERE source.sort_key >= $after_0 AND " in query
+    assert query.count("ORDER BY source.sort_key, type(r), COALESCE(target.sort_key, ''), id(r)") == 2
+    assert params["after_0"] == "Alice" and params["after_3"] == 3
+
+
+def test_without_sort_key_copies_properties():
+    properties = {"name": "a", "sort_key": "a"}
+    assert without_sort_key(properties) == {"name": "a"}
+    assert properties == {"name": "a", "sort_key": "a"}
+    assert without_sort_key(None) == {}
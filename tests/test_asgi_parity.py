@@ -0,0 +1,153 @@
+"""
+ASGI 异步视图与同步 Flask 视图的一致性测试
+
+同一请求分别交给 Flask 测试客户端和 asgi_app.app，状态码、响应体以及缓存/ETag 相关的响应头应当相同，
+包括数据库不可用和查询出错时的降级结果。
+"""
+import time
+import asyncio
+import pytest
+
+READ_URLS = [
+    "/api/graph?limit=20",
+    "/api/graph?limit=20&format=columnar",
+    "/api/graph?limit=abc",
+    "/api/graph/subgraph/1?depth=2&limit=30&fanout=20",
+    "/api/graph/subgraph/0?depth=1&relation_types=KNOWS",
+    "/api/graph/subgraph/999",
+    "/api/graph/subgraph/1?depth=x",
+    "/api/search/nodes?query=n1&limit=5",
+    "/api/search/nodes",
+    "/api/stats",
+]
+
+COMPARED_HEADERS = ("Content-Type", "ETag", "X-Cache", "Cache-Control")
+
+
+async def asgi_get(asgi_app, url, headers=()):
+    path, _, query_string = url.partition("?")
+    scope = {
+        "type": "http", "method": "GET", "path": path, "root_path": "", "scheme": "http",
+        "query_string": query_string.encode(), "http_version": "1.1",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "server": ("localhost", 80), "client": ("127.0.0.1", 1),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    response = {"body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+        else:
+            response["body"] += message.get("body", b"")
+
+    await asgi_app.app(scope, receive, send)
+    return response
+
+
+def fetch_both(app_final, asgi_app, url, headers=()):
+    """依次用同步和异步方式请求，每次请求前清空响应缓存"""
+    app_final.response_cache.backend.clear()
+    sync = app_final.app.test_client().get(url, headers=dict(headers))
+    app_final.response_cache.backend.clear()
+    async_ = asyncio.run(asgi_get(asgi_app, url, headers))
+    return sync, async_
+
+
+def assert_same(sync, async_):
+    assert sync.status_code == async_["status"]
+    assert sync.get_data() == async_["body"]
+    for name in COMPARED_HEADERS:
+        assert sync.headers.get(name) == async_["headers"].get(name.lower()), name
+
+
+@pytest.mark.parametrize("url", READ_URLS)
+def test_read_endpoints_match(backend, app_final, asgi_app, url):
+    sync, async_ = fetch_both(app_final, asgi_app, url)
+    assert_same(sync, async_)
+
+
+@pytest.mark.parametrize("url", READ_URLS)
+def test_database_unavailable_matches(backend, app_final, asgi_app, url):
+    backend.unavailable()
+    sync, async_ = fetch_both(app_final, asgi_app, url)
+    assert_same(sync, async_)
+
+
+@pytest.mark.parametrize("url", READ_URLS)
+def test_query_errors_match(backend, app_final, asgi_app, url):
+    backend.fail_queries()
+    sync, async_ = fetch_both(app_final, asgi_app, url)
+    assert_same(sync, async_)
+
+
+def test_unavailable_graph_is_server_error(backend, app_final, asgi_app):
+    backend.unavailable()
+    sync, async_ = fetch_both(app_final, asgi_app, "/api/graph?limit=20")
+    assert sync.status_code == async_["status"] == 500
+
+
+@pytest.mark.parametrize("url", ["/api/graph?limit=20", "/api/graph?limit=20&format=columnar"])
+def test_degraded_responses_are_not_cached(backend, app_final, asgi_app, url):
+    backend.fail_queries()
+    client = app_final.app.test_client()
+    assert client.get(url).headers["X-Cache"] == "MISS"
+    assert client.get(url).headers["X-Cache"] == "MISS"
+
+    async def twice():
+        return [await asgi_get(asgi_app, url) for _ in range(2)]
+
+    first, second = asyncio.run(twice())
+    assert first["headers"]["x-cache"] == second["headers"]["x-cache"] == "MISS"
+
+
+def test_cache_is_shared_between_modes(backend, app_final, asgi_app):
+    url = "/api/graph?limit=20"
+    app_final.response_cache.backend.clear()
+    sync = app_final.app.test_client().get(url)
+    async_ = asyncio.run(asgi_get(asgi_app, url))
+    assert sync.headers["X-Cache"] == "MISS"
+    assert async_["headers"]["x-cache"] == "HIT"
+    assert sync.get_data() == async_["body"]
+
+
+@pytest.mark.parametrize("url", ["/api/graph?limit=20", "/api/stats"])
+def test_conditional_get_matches(backend, app_final, asgi_app, url):
+    sync, async_ = fetch_both(app_final, asgi_app, url)
+    etag = sync.headers["ETag"]
+    sync, async_ = fetch_both(app_final, asgi_app, url, headers=[("If-None-Match", etag)])
+    assert sync.status_code == async_["status"] == 304
+    assert sync.headers["ETag"] == async_["headers"]["etag"]
+
+
+def test_slow_cache_does_not_block_event_loop(backend, app_final, asgi_app, monkeypatch):
+    """缓存读取（如等待SQLite锁）在线程中执行，同时到达的其他请求不受影响"""
+    get = app_final.response_cache.get
+
+    def slow_get(key):
+        time.sleep(0.5)
+        return get(key)
+
+    monkeypatch.setattr(app_final.response_cache, "get", slow_get)
+
+    async def run():
+        started = time.perf_counter()
+
+        async def timed(url):
+            await asgi_get(asgi_app, url)
+            return time.perf_counter() - started
+
+        return await asyncio.gather(timed("/api/graph?limit=20"), timed("/api/stats"))
+
+    graph_elapsed, stats_elapsed = asyncio.run(run())
+    assert graph_elapsed >= 0.5
+    assert stats_elapsed < 0.25
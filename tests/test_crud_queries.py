@@ -0,0 +1,83 @@
+"""管理接口的写查询模板：属性作为参数传入，标签和关系类型经白名单校验"""
+import pytest
+from backend.utils.crud_queries import (
+    NameWhitelist, create_node_query, create_relation_query, merge_relation_query, property_map
+)
+
+
+class Loader:
+    def __init__(self, names, error=None):
+        self.names = names
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return list(self.names)
+
+
+def test_existing_names_are_allowed_and_cached():
+    load = Loader(["Person", "Weird Label"])
+    whitelist = NameWhitelist(load, "节点类型", allow_new=False)
+    assert whitelist.check(" Person ") == "Person"
+    assert whitelist.check("Weird Label") == "Weird Label"
+    assert load.calls == 1
+
+
+def test_unknown_names_reload_once_before_rejecting():
+    load = Loader(["Person"])
+    whitelist = NameWhitelist(load, "节点类型", allow_new=False)
+    whitelist.check("Person")
+    load.names.append("Company")
+    assert whitelist.check("Company") == "Company"
+    with pytest.raises(ValueError, match="不允许的节点类型"):
+        whitelist.check("Planet")
+    assert load.calls == 3
+
+
+def test_new_names_must_match_the_pattern():
+    whitelist = NameWhitelist(Loader([]), "关系类型")
+    assert whitelist.check("工作于") == "工作于"
+    assert whitelist.check("WORKS_AT") == "WORKS_AT"
+    for name in ("1abc", "a b", "a`b", "x" * 65):
+        with pytest.raises(ValueError, match="只能包含字母"):
+            whitelist.check(name)
+    with pytest.raises(ValueError, match="不能为空"):
+        whitelist.check("  ")
+
+
+def test_accepted_new_names_are_remembered():
+    load = Loader(["Person"])
+    whitelist = NameWhitelist(load, "节点类型")
+    whitelist.check("Person")
+    whitelist.check("Company")
+    whitelist.check("Company")
+    assert load.calls == 2
+
+
+def test_load_failure_still_validates_new_names():
+    whitelist = NameWhitelist(Loader([], error=RuntimeError("down")), "节点类型")
+    assert whitelist.check("Person") == "Person"
+    with pytest.raises(ValueError):
+        whitelist.check("a-b")
+
+
+def test_templates_depend_only_on_label_or_type():
+    assert create_node_query("Person") == create_node_query("Person")
+    assert "$props" in create_node_query("Person")
+    assert create_node_query("x`y").startswith("CREATE (n:`x``y`) SET n = $props")
+    assert "[r:`WORKS AT`]" in create_relation_query("WORKS AT")
+    assert "SET r = $props" in merge_relation_query("KNOWS", replace_properties=True)
+    assert "SET r" not in merge_relation_query("KNOWS")
+    assert "DELETE old" in merge_relation_query("KNOWS", original_type="LIKES")
+
+
+def test_property_map_validation():
+    assert property_map(None) == {}
+    assert property_map({"a": 1}) == {"a": 1}
+    with pytest.raises(ValueError):
+        property_map(["a"])
+    with pytest.raises(ValueError):
+        property_map({" ": 1})
@@ -0,0 +1,51 @@
+"""查询构建：标签和关系类型的转义、标签模式以及使用计数存储的计数查询"""
+from backend.utils.cypher import (
+    count_nodes_query, count_relationships_query, escape_name, label_count_queries, node_pattern,
+    relationship_pattern, where_clause
+)
+
+
+def test_escape_name_doubles_backticks():
+    assert escape_name("Person") == "`Person`"
+    assert escape_name("人物") == "`人物`"
+    assert escape_name("a`) DETACH DELETE n //") == "`a``) DETACH DELETE n //`"
+    assert escape_name("``") == "``````"
+
+
+def test_type_filters_become_patterns():
+    assert node_pattern("n", "Person") == "(n:`Person`)"
+    assert node_pattern("n", "") == "(n)"
+    assert node_pattern("m", None) == "(m)"
+    assert relationship_pattern("r", "WORKS AT") == "[r:`WORKS AT`]"
+    assert relationship_pattern("r") == "[r]"
+    assert node_pattern("n", "x`y") == "(n:`x``y`)"
+
+
+def test_where_clause_skips_empty_conditions():
+    assert where_clause([]) == ""
+    assert where_clause(["", None]) == ""
+    assert where_clause(["a", "", "b"]) == "WHERE a AND b"
+
+
+def test_plain_counts_use_the_count_store():
+    assert count_nodes_query("Person") == "MATCH (n:`Person`) RETURN count(n) AS total"
+    assert count_nodes_query() == "MATCH (n) RETURN count(n) AS total"
+    assert count_relationships_query("KNOWS") == "MATCH ()-[r:`KNOWS`]->() RETURN count(r) AS total"
+    assert count_relationships_query(None, [""]) == "MATCH ()-[r]->() RETURN count(r) AS total"
+
+
+def test_filtered_counts_keep_endpoint_variables():
+    assert count_nodes_query("Person", ["n.name CONTAINS $name"]) == (
+        "MATCH (n:`Person`) WHERE n.name CONTAINS $name RETURN count(n) AS total"
+    )
+    assert count_relationships_query("KNOWS", ["source.name = $s"]) == (
+        "MATCH (source)-[r:`KNOWS`]->(target) WHERE source.name = $s RETURN count(r) AS total"
+    )
+
+
+def test_label_count_queries_follow_label_order():
+    queries = label_count_queries(["B", "A"])
+    assert queries == {
+        "label_0": {"query": "MATCH (n:`B`) RETURN count(n) AS count"},
+        "label_1": {"query": "MATCH (n:`A`) RETURN count(n) AS count"},
+    }
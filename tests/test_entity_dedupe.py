@@ -0,0 +1,81 @@
+"""text2kg 写入前的实体去重，以及合并 "Unknown" 重复节点的迁移"""
+from backend.utils.entity_dedupe import merge_unknown_duplicates, move_relationships_query
+from backend.utils.neo4j_utils import NAMED_RELATION_UNWIND_QUERY, dedupe_named_entities
+
+
+def test_typed_rows_replace_unknown_rows_of_the_same_name():
+    rows, endpoint_types = dedupe_named_entities([
+        {"name": "Apple", "type": "Unknown"},
+        {"name": "Apple", "type": "Organization"},
+        {"name": "Apple", "type": "Organization"},
+        {"name": "Paris", "type": "Unknown"},
+        {"name": "Mercury", "type": "Location"},
+        {"name": "Mercury", "type": "Person"},
+    ])
+    assert rows == [
+        {"name": "Apple", "type": "Organization"},
+        {"name": "Paris", "type": "Unknown"},
+        {"name": "Mercury", "type": "Location"},
+        {"name": "Mercury", "type": "Person"},
+    ]
+    assert endpoint_types == {"Apple": "Organization", "Paris": "Unknown", "Mercury": "Location"}
+
+
+def test_relation_endpoints_match_a_single_node():
+    assert NAMED_RELATION_UNWIND_QUERY.count("LIMIT 1") == 2
+    assert "row.source_type" in NAMED_RELATION_UNWIND_QUERY
+    assert "row.target_type" in NAMED_RELATION_UNWIND_QUERY
+
+
+class FakeRunQuery:
+    def __init__(self, mergeable=2, ambiguous=1, rel_types=("RELATION", "WORKS AT")):
+        self.mergeable = mergeable
+        self.ambiguous = ambiguous
+        self.rel_types = rel_types
+        self.queries = []
+
+    def __call__(self, query, params=None, raise_errors=False):
+        assert raise_errors
+        self.queries.append(query)
+        if "AS mergeable" in query:
+            return [{"mergeable": self.mergeable, "ambiguous": self.ambiguous, "relationships": 5}]
+        if "db.relationshipTypes" in query:
+            return [{"relationshipType": t} for t in self.rel_types]
+        if "AS moved" in query:
+            return [{"moved": 1}]
+        if "AS merged" in query:
+            return [{"merged": self.mergeable}]
+        raise AssertionError(query)
+
+
+def test_dry_run_only_counts():
+    run_query = FakeRunQuery()
+    result = merge_unknown_duplicates(run_query, dry_run=True)
+    assert result == {"mergeable": 2, "ambiguous": 1, "relationships": 5}
+    assert len(run_query.queries) == 1
+
+
+def test_nothing_to_merge_does_not_write():
+    run_query = FakeRunQuery(mergeable=0)
+    assert merge_unknown_duplicates(run_query)["mergeable"] == 0
+    assert len(run_query.queries) == 1
+
+
+def test_moves_every_relationship_type_in_both_directions_before_deleting():
+    run_query = FakeRunQuery()
+    result = merge_unknown_duplicates(run_query)
+    assert result["moved"] == 4
+    assert result["merged"] == 2
+    moves = [q for q in run_query.queries if "AS moved" in q]
+    assert len(moves) == 4
+    assert all("`WORKS AT`" in q for q in moves[2:])
+    assert run_query.queries[-1].rstrip().endswith("RETURN count(*) AS merged")
+
+
+def test_move_query_keeps_direction():
+    outgoing = move_relationships_query("RELATION", True)
+    incoming = move_relationships_query("RELATION", False)
+    assert "MATCH (u)-[r:`RELATION`]->(other)" in outgoing
+    assert "CREATE (t)-[n:`RELATION`]->(other)" in outgoing
+    assert "MATCH (other)-[r:`RELATION`]->(u)" in incoming
+    assert "CREATE (other)-[n:`RELATION`]->(t)" in incoming
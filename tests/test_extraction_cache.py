@@ -0,0 +1,84 @@
+"""抽取结果缓存：键由文本、模型、温度和上下文决定，按 TTL 和条目数淘汰"""
+import time
+from types import SimpleNamespace
+
+from backend.utils.extraction_cache import ExtractionCache, make_cache_key
+from backend.utils.kg_gen import _cache_key, generate_graph
+
+
+class CountingClient:
+    def __init__(self, model="model-a", temperature=0.3):
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+
+    def generate(self, input_data, context, cluster):
+        self.calls += 1
+        return SimpleNamespace(entities={input_data[:3]}, relations=set(), edges=set())
+
+
+def test_key_changes_with_each_part():
+    client = CountingClient()
+    base = _cache_key(client, "generate", "text", "新闻", False)
+    assert base == _cache_key(CountingClient(), "generate", "text", "新闻", False)
+    assert base != _cache_key(CountingClient(model="model-b"), "generate", "text", "新闻", False)
+    assert base != _cache_key(CountingClient(temperature=0.0), "generate", "text", "新闻", False)
+    assert base != _cache_key(client, "generate", "text", "科技", False)
+    assert base != _cache_key(client, "generate", "text", "新闻", True)
+    assert base != _cache_key(client, "cluster", "text", "新闻", False)
+    assert base != _cache_key(client, "generate", "text ", "新闻", False)
+
+
+def test_make_cache_key_is_order_sensitive_and_stable():
+    assert make_cache_key("a", ["b", 1]) == make_cache_key("a", ["b", 1])
+    assert make_cache_key("a", "b") != make_cache_key("b", "a")
+    assert len(make_cache_key("x")) == 64
+
+
+def test_repeated_text_skips_the_model(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    client = CountingClient()
+    first = generate_graph("同一篇文章", client=client, cache=cache)
+    second = generate_graph("同一篇文章", client=client, cache=cache)
+    assert client.calls == 1
+    assert second.entities == first.entities
+    assert cache.metrics()["hits"] == 1
+
+    # 换模型或换上下文（提示）后重新抽取
+    other = CountingClient(model="model-b")
+    generate_graph("同一篇文章", client=other, cache=cache)
+    generate_graph("同一篇文章", client=client, cache=cache, context="科技")
+    assert other.calls == 1 and client.calls == 2
+
+
+def test_overlapping_documents_reuse_cached_chunks(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    client = CountingClient()
+    shared = "\n".join(f"第{i}段的内容。" for i in range(4))
+    generate_graph(shared, client=client, cache=cache, chunk_size=10, overlap=0, cluster=False)
+    calls = client.calls
+    generate_graph(shared + "\n新增的一段。", client=client, cache=cache, chunk_size=10, overlap=0, cluster=False)
+    assert client.calls == calls + 1
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"), ttl=0.05)
+    cache.put("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["evictions"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"), max_entries=2, ttl=0)
+    cache.put("a", 1)
+    time.sleep(0.01)
+    cache.put("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    time.sleep(0.01)
+    cache.put("c", 3)
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.metrics()["entries"] == 2
@@ -0,0 +1,143 @@
+"""批量导入：实体按 (name, type) 合并，没有类型的实体和端点按名称确定类型"""
+import io
+import threading
+from types import SimpleNamespace
+
+from backend.utils.entity_types import UNKNOWN_TYPE
+from backend.utils.graph_import import (
+    ENTITY_TYPES_QUERY, IMPORT_ENTITY_QUERY, IMPORT_RELATION_QUERY, BulkImporter, normalize_row,
+    partition_rounds, read_rows
+)
+
+
+class FakeImportDriver:
+    """在内存中执行导入语句：记录 (name, type) 节点和关系"""
+
+    def __init__(self, nodes=()):
+        self.nodes = set(nodes)
+        self.relations = set()
+        self.lock = threading.Lock()
+
+    def session(self, **kwargs):
+        return FakeImportSession(self)
+
+    def write(self, query, rows):
+        created = {"nodes": 0, "relationships": 0}
+        with self.lock:
+            for row in rows:
+                if query == IMPORT_ENTITY_QUERY:
+                    keys = [(row["name"], row["type"])]
+                else:
+                    keys = [(row["source"], row["source_type"]), (row["target"], row["target_type"])]
+                for key in keys:
+                    if key not in self.nodes:
+                        self.nodes.add(key)
+                        created["nodes"] += 1
+                if query == IMPORT_RELATION_QUERY:
+                    self.relations.add((keys[0], row["relation"], keys[1]))
+                    created["relationships"] += 1
+        return created
+
+
+class FakeImportSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, names=None, rows=None):
+        if query == ENTITY_TYPES_QUERY:
+            types = {}
+            for name, entity_type in sorted(self.driver.nodes):
+                if name in names:
+                    types.setdefault(name, []).append(entity_type)
+            return [{"name": name, "types": t} for name, t in types.items()]
+        created = self.driver.write(query, rows)
+        counters = SimpleNamespace(nodes_created=created["nodes"], relationships_created=created["relationships"])
+        return SimpleNamespace(consume=lambda: SimpleNamespace(counters=counters))
+
+    def execute_write(self, work, *args):
+        return work(self, *args)
+
+
+def run_import(driver, text, fmt="ndjson", **kwargs):
+    importer = BulkImporter(driver, partitions=3, batch_size=2, **kwargs)
+    result = importer.run(read_rows(io.StringIO(text), fmt))
+    return importer, result
+
+
+def ndjson(*lines):
+    return "\n".join(lines) + "\n"
+
+
+def test_typed_rows_merge_on_name_and_type():
+    driver = FakeImportDriver()
+    importer, _ = run_import(driver, ndjson(
+        '{"name": "Apple", "type": "Organization"}',
+        '{"name": "Apple", "type": "Fruit"}',
+        '{"name": "Apple", "type": "Organization"}',
+        '{"source": "Tim", "source_type": "Person", "relation": "works at", '
+        '"target": "Apple", "target_type": "Organization"}',
+    ))
+    assert driver.nodes == {("Apple", "Organization"), ("Apple", "Fruit"), ("Tim", "Person")}
+    assert driver.relations == {(("Tim", "Person"), "works at", ("Apple", "Organization"))}
+    assert importer.stats["invalid"] == 0
+
+
+def test_untyped_rows_use_the_single_existing_type():
+    driver = FakeImportDriver(nodes={("Paris", "City")})
+    run_import(driver, ndjson(
+        '{"name": "Paris"}',
+        '{"name": "France", "type": "Country"}',
+        '{"source": "Paris", "relation": "capital of", "target": "France"}',
+    ))
+    assert driver.nodes == {("Paris", "City"), ("France", "Country")}
+    assert driver.relations == {(("Paris", "City"), "capital of", ("France", "Country"))}
+
+
+def test_unknown_names_become_unknown_type():
+    driver = FakeImportDriver()
+    run_import(driver, ndjson('{"subject": "Ann", "predicate": "knows", "object": "Bob"}'))
+    assert driver.nodes == {("Ann", UNKNOWN_TYPE), ("Bob", UNKNOWN_TYPE)}
+
+
+def test_ambiguous_untyped_rows_are_rejected():
+    driver = FakeImportDriver(nodes={("Mercury", "Planet"), ("Mercury", "Element")})
+    importer, result = run_import(driver, ndjson(
+        '{"name": "Mercury"}',
+        '{"source": "Mercury", "relation": "near", "target": "Sun", "target_type": "Star"}',
+        '{"source": "Mercury", "source_type": "Planet", "relation": "near", "target": "Sun", "target_type": "Star"}',
+    ))
+    assert result["invalid"] == 2
+    assert result["entities"] == 0 and result["relations"] == 1
+    assert [e["line"] for e in importer.errors] == [1, 2]
+    assert "Mercury" in importer.errors[0]["error"]
+    assert driver.relations == {(("Mercury", "Planet"), "near", ("Sun", "Star"))}
+
+
+def test_invalid_rows_are_reported_with_line_numbers():
+    driver = FakeImportDriver()
+    importer, result = run_import(driver, "name,type\nAlice,Person\n,Person\n", fmt="csv")
+    assert driver.nodes == {("Alice", "Person")}
+    assert result["invalid"] == 1
+    assert importer.errors == [{"line": 3, "error": "实体缺少 name"}]
+
+
+def test_extra_columns_become_properties():
+    kind, row = normalize_row({"name": " Ann ", "type": "", "age": "30", "tags": ["a", "b"], "meta": {"x": 1}})
+    assert kind == "entity"
+    assert row == {"name": "Ann", "type": None, "properties": {"age": "30", "tags": ["a", "b"], "meta": '{"x": 1}'}}
+
+
+def test_partition_rounds_never_share_a_partition():
+    for partitions in range(1, 7):
+        rounds = partition_rounds(partitions)
+        pairs = [pair for r in rounds for pair in r]
+        assert sorted(pairs) == sorted((i, j) for i in range(partitions) for j in range(i, partitions))
+        for r in rounds:
+            used = [p for pair in r for p in set(pair)]
+            assert len(used) == len(set(used))
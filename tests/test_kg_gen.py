@@ -0,0 +1,149 @@
+"""长文本分块抽取：用假的抽取客户端驱动 generate_graph，检查分块、重叠、并发和跨块去重"""
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from backend.utils import kg_gen
+from backend.utils.kg_gen import generate_graph, merge_graphs
+from backend.utils.text_chunker import chunk_text
+
+TRIPLE = re.compile(r"(\S+) (\S+) (\S+?)\.")
+
+
+class FakeClient:
+    """把文本中每个 "主语 关系 宾语." 句子抽取为一个三元组，记录每次调用"""
+
+    model = "fake-model"
+    temperature = 0.0
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.clustered = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def generate(self, input_data, context, cluster):
+        with self._lock:
+            self.calls.append({"text": input_data, "context": context, "cluster": cluster})
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            relations = {match.groups() for match in TRIPLE.finditer(input_data)}
+            # 实体名称带有空白，合并时应规范化
+            entities = {f" {name} " for s, _, t in relations for name in (s, t)}
+            return SimpleNamespace(entities=entities, relations=relations, edges={r[1] for r in relations})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def cluster(self, graph, context):
+        self.clustered.append(graph)
+        return graph
+
+
+@pytest.fixture(autouse=True)
+def no_extraction_cache(monkeypatch):
+    """不使用 logs/ 下的全局抽取缓存"""
+    monkeypatch.setattr(kg_gen, "_cache", None)
+    monkeypatch.setattr(kg_gen, "CACHE_ENABLED", False)
+
+
+def lines(count, start=0):
+    return "\n".join(f"A{i:02d} knows B{i:02d}." for i in range(start, start + count))
+
+
+def test_short_text_is_extracted_in_one_clustered_call():
+    client = FakeClient()
+    text = lines(2)
+    graph = generate_graph(text, client=client, chunk_size=1000, context="测试")
+    assert client.calls == [{"text": text, "context": "测试", "cluster": True}]
+    assert client.clustered == []
+    assert graph.relations == {("A00", "knows", "B00"), ("A01", "knows", "B01")}
+
+
+def test_empty_text_makes_no_calls():
+    client = FakeClient()
+    graph = generate_graph("  \n ", client=client)
+    assert client.calls == []
+    assert graph.entities == set() and graph.relations == set()
+
+
+def test_chunks_respect_size_and_sentence_boundaries():
+    client = FakeClient()
+    text = lines(9)
+    generate_graph(text, client=client, chunk_size=60, overlap=0, max_workers=2)
+    texts = sorted(call["text"] for call in client.calls)
+    assert texts == sorted(chunk_text(text, 60, 0))
+    assert all(len(t) <= 60 for t in texts)
+    # 每个句子完整地出现在某一个文本块中，没有被截断或重复
+    sentences = [s for t in texts for s in t.split("\n")]
+    assert sorted(sentences) == sorted(text.split("\n"))
+    assert all(call["cluster"] is False for call in client.calls)
+
+
+def test_long_paragraph_is_split_at_sentence_ends():
+    client = FakeClient()
+    paragraph = " ".join(f"C{i:02d} likes D{i:02d}." for i in range(8))
+    graph = generate_graph(paragraph, client=client, chunk_size=40, overlap=0)
+    assert len(client.calls) > 1
+    assert all(call["text"].endswith(".") for call in client.calls)
+    assert len(graph.relations) == 8
+
+
+def test_overlap_repeats_the_tail_sentence_in_the_next_chunk():
+    client = FakeClient()
+    text = lines(9)
+    generate_graph(text, client=client, chunk_size=60, overlap=20, max_workers=1)
+    chunks = [call["text"] for call in client.calls]
+    assert chunks == chunk_text(text, 60, 20)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split("\n")[0] == previous.split("\n")[-1]
+
+
+def test_chunks_are_extracted_concurrently():
+    client = FakeClient(delay=0.05)
+    generate_graph(lines(16), client=client, chunk_size=40, overlap=0, max_workers=4)
+    assert len(client.calls) == 8
+    assert 1 < client.max_active <= 4
+
+
+def test_progress_counts_chunks_across_windows():
+    client = FakeClient()
+    reported = []
+    generate_graph(lines(20), client=client, chunk_size=20, overlap=0, max_workers=2,
+                   progress=lambda chunks_processed: reported.append(chunks_processed))
+    assert reported == [4, 8, 12, 16, 20]
+
+
+def test_entities_and_relations_are_deduplicated_across_chunks_before_clustering():
+    client = FakeClient()
+    # 同一个句子出现在多个文本块中，重叠部分也会被抽取两次
+    text = "\n".join([lines(3), lines(3), lines(2, start=1)])
+    graph = generate_graph(text, client=client, chunk_size=45, overlap=20, max_workers=3, context="新闻")
+    assert len(client.calls) > 2
+    assert len(client.clustered) == 1
+    assert client.clustered[0] is graph
+    assert graph.relations == {("A00", "knows", "B00"), ("A01", "knows", "B01"), ("A02", "knows", "B02")}
+    assert graph.entities == {"A00", "A01", "A02", "B00", "B01", "B02"}
+
+
+def test_clustering_is_skipped_when_disabled():
+    client = FakeClient()
+    graph = generate_graph(lines(9), client=client, chunk_size=60, overlap=0, cluster=False)
+    assert client.clustered == []
+    assert len(graph.relations) == 9
+
+
+def test_merge_graphs_expands_list_targets_and_drops_blank_names():
+    graphs = [
+        SimpleNamespace(entities={"A", " ", "B"}, relations={("A", "knows", ("B", "C"))}),
+        SimpleNamespace(entities={"B "}, relations={("A ", " knows", "B"), ("A", "", "D")}),
+    ]
+    entities, relations = merge_graphs(graphs)
+    assert entities == {"A", "B", "C"}
+    assert relations == {("A", "knows", "B"), ("A", "knows", "C")}
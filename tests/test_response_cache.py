@@ -0,0 +1,77 @@
+"""响应缓存：进程内缓存共享 SQLite 版本号，读取不写磁盘，条目数增量维护"""
+import os
+import time
+from backend.utils.response_cache import (
+    MemoryCacheBackend, ResponseCache, SQLiteCacheBackend, SQLiteVersionStore, create_cache_backend
+)
+
+
+def db_files_state(path):
+    return {p: os.stat(p).st_mtime_ns for p in (path, path + "-wal") if os.path.exists(p)}
+
+
+def test_memory_backend_shares_version_between_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    # 两个后端相当于两个工作进程
+    first = ResponseCache(create_cache_backend("memory", path=path))
+    second = ResponseCache(create_cache_backend("memory", path=path))
+
+    key = first.key("graph", [("limit", "20")])
+    first.set(key, {"body": "x", "mimetype": "application/json"})
+    assert first.get(key) == {"body": "x", "mimetype": "application/json"}
+    assert second.key("graph", [("limit", "20")]) == key
+
+    second.bump_version()
+    new_key = first.key("graph", [("limit", "20")])
+    assert new_key != key
+    assert first.get(new_key) is None
+    assert first.backend.metrics()["entries"] == 0
+
+
+def test_memory_backend_without_path_is_process_local():
+    backend = create_cache_backend("memory")
+    assert isinstance(backend, MemoryCacheBackend)
+    assert backend.versions is None
+    assert backend.bump() == 1
+    assert backend.version() == 1
+
+
+def test_hits_do_not_write(tmp_path):
+    path = str(tmp_path / "cache.db")
+    for backend in (MemoryCacheBackend(versions=SQLiteVersionStore(path)), SQLiteCacheBackend(path)):
+        cache = ResponseCache(backend)
+        key = cache.key("graph", [])
+        cache.set(key, {"body": "x", "mimetype": "m"})
+        before = db_files_state(path)
+        time.sleep(0.01)
+        for _ in range(20):
+            assert cache.get(cache.key("graph", [])) is not None
+        assert db_files_state(path) == before
+
+
+def test_sqlite_backend_counts_entries_and_evicts_oldest(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=3, ttl=0)
+    for i in range(5):
+        backend.set(f"k{i}", {"i": i})
+    backend.set("k4", {"i": 44})
+    assert backend.metrics()["entries"] == 3
+    assert backend.evictions == 2
+    assert backend.get("k0") is None and backend.get("k1") is None
+    assert backend.get("k4") == {"i": 44}
+
+    version = backend.version()
+    assert backend.bump() == version + 1
+    assert backend.metrics()["entries"] == 0
+    assert backend.get("k4") is None
+
+    # 重新打开时沿用已有的条目数
+    backend.set("a", 1)
+    assert SQLiteCacheBackend(backend.path, max_entries=3).metrics()["entries"] == 1
+
+
+def test_sqlite_backend_expires_entries(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), ttl=0.05)
+    backend.set("k", 1)
+    assert backend.get("k") == 1
+    time.sleep(0.1)
+    assert backend.get("k") is None
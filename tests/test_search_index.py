@@ -0,0 +1,96 @@
+"""全文索引管理：出现新标签时在新索引名下重建，填充完成后再切换"""
+from backend.utils.search_index import FulltextIndexManager, build_lucene_query
+
+
+class FakeSchema:
+    """记录全文索引及其状态；awaitIndex 调用前新建的索引保持 POPULATING"""
+
+    def __init__(self, labels):
+        self.labels = set(labels)
+        self.indexes = {}
+        self.statements = []
+        self.seen_during_await = []
+
+    def run_query(self, query, params=None, raise_errors=False):
+        params = params or {}
+        self.statements.append(query)
+        if query.startswith("CALL db.labels()"):
+            return [{"label": label} for label in sorted(self.labels)]
+        if query.startswith("SHOW FULLTEXT INDEXES"):
+            return [dict(index, name=name) for name, index in self.indexes.items()]
+        if query.startswith("CREATE FULLTEXT INDEX"):
+            name = query.split("`")[1]
+            labels = query.split("FOR (n:")[1].split(")")[0].replace("`", "").split("|")
+            self.indexes[name] = {"labelsOrTypes": labels, "properties": ["name", "title"], "state": "POPULATING"}
+            return []
+        if query.startswith("CALL db.awaitIndex"):
+            self.seen_during_await.append(self.manager.name)
+            self.indexes[params["name"]]["state"] = "ONLINE"
+            return []
+        if query.startswith("DROP INDEX"):
+            self.indexes.pop(query.split("`")[1], None)
+            return []
+        raise AssertionError(query)
+
+
+def make_manager(labels):
+    schema = FakeSchema(labels)
+    manager = FulltextIndexManager(schema.run_query, name="fts")
+    schema.manager = manager
+    return schema, manager
+
+
+def test_first_index_is_available_once_online():
+    schema, manager = make_manager(["Person"])
+    assert manager.ensure() is True
+    assert manager.name == "fts"
+    assert manager.available is True
+    assert list(schema.indexes) == ["fts"]
+
+
+def test_new_label_builds_replacement_before_switching():
+    schema, manager = make_manager(["Person"])
+    manager.ensure()
+
+    schema.labels.add("Company")
+    assert manager.ensure() is True
+    # 新索引填充期间仍然使用旧索引
+    assert schema.seen_during_await == ["fts", "fts"]
+    assert manager.name == "fts_v1"
+    assert manager.available is True
+    assert list(schema.indexes) == ["fts_v1"]
+    assert set(schema.indexes["fts_v1"]["labelsOrTypes"]) == {"Person", "Company"}
+    assert not any(s.startswith("DROP INDEX `fts_v1`") for s in schema.statements)
+
+    schema.labels.add("Place")
+    manager.ensure()
+    assert manager.name == "fts_v2"
+    assert list(schema.indexes) == ["fts_v2"]
+
+
+def test_covering_index_is_reused_without_rebuild():
+    schema, manager = make_manager(["Person"])
+    manager.ensure()
+    created = sum(s.startswith("CREATE") for s in schema.statements)
+
+    restarted = FulltextIndexManager(schema.run_query, name="fts")
+    schema.manager = restarted
+    assert restarted.ensure() is True
+    assert sum(s.startswith("CREATE") for s in schema.statements) == created
+
+
+def test_failure_of_dropped_index_does_not_disable_new_one():
+    schema, manager = make_manager(["Person"])
+    manager.ensure()
+    schema.labels.add("Company")
+    manager.ensure()
+
+    manager.mark_failed(RuntimeError("no such index"), "fts")
+    assert manager.available is True
+    manager.mark_failed(RuntimeError("boom"), "fts_v1")
+    assert manager.available is False
+
+
+def test_lucene_query_escapes_special_characters():
+    assert build_lucene_query("  ") is None
+    assert build_lucene_query('a+b "c') == '"a+b \\"c" OR a\\+b* OR \\"c*'